@@ -1,12 +1,11 @@
 import os
-import json
-import shutil
 import uuid
 from datetime import datetime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                            QLabel, QComboBox, QLineEdit, QFileDialog, QGroupBox,
-                           QMessageBox)
+                           QMessageBox, QCheckBox)
 from PyQt5.QtCore import Qt, QRectF
+from src.utils.page_transaction import PageTransaction
 
 class AddModeWindow(QWidget):
     def __init__(self, main_window):
@@ -14,6 +13,7 @@ class AddModeWindow(QWidget):
         self.main_window = main_window
         self.current_regions = []  # 儲存當前頁面的文字框
         self.selected_region = None  # 當前選中的文字框
+        self.transaction = PageTransaction()  # 批次編輯暫存的操作
         self.initUI()
         
     def initUI(self):
@@ -37,6 +37,11 @@ class AddModeWindow(QWidget):
         add_layout.addWidget(category_label)
         add_layout.addWidget(self.category_combo)
         
+        # 自動偵測文字框
+        self.proposal_checkbox = QCheckBox("顯示自動偵測文字框")
+        self.proposal_checkbox.toggled.connect(self.main_window.toggleProposals)
+        add_layout.addWidget(self.proposal_checkbox)
+        
         # 音檔選擇和名稱
         audio_label = QLabel("音檔:")
         self.audio_path_label = QLabel("未選擇音檔")
@@ -81,6 +86,26 @@ class AddModeWindow(QWidget):
         info_group.setLayout(info_layout)
         layout.addWidget(info_group)
         
+        # 批次編輯：新增 / 刪除 / 移動先暫存，提交時一次保存
+        batch_group = QGroupBox("批次編輯")
+        batch_layout = QVBoxLayout()
+        self.batch_checkbox = QCheckBox("暫存變更，提交時一次保存")
+        self.batch_checkbox.toggled.connect(self.set_batch_mode)
+        self.pending_label = QLabel("暫存變更：0")
+        batch_buttons = QHBoxLayout()
+        self.commit_button = QPushButton("提交變更")
+        self.commit_button.clicked.connect(self.commit_transaction)
+        self.discard_button = QPushButton("放棄變更")
+        self.discard_button.clicked.connect(self.discard_transaction)
+        batch_buttons.addWidget(self.commit_button)
+        batch_buttons.addWidget(self.discard_button)
+        batch_layout.addWidget(self.batch_checkbox)
+        batch_layout.addWidget(self.pending_label)
+        batch_layout.addLayout(batch_buttons)
+        batch_group.setLayout(batch_layout)
+        layout.addWidget(batch_group)
+        self.update_pending_label()
+        
         # 添加彈性空間
         layout.addStretch()
 
@@ -148,6 +173,10 @@ class AddModeWindow(QWidget):
             QMessageBox.warning(self, "警告", "請選擇音檔")
             return
         print(f"Audio path: {self.audio_path_label.text()}")
+        audio_error = self.check_audio_source(self.audio_path_label.text())
+        if audio_error:
+            QMessageBox.warning(self, "警告", audio_error)
+            return
             
         # 檢查清除 self.selected_region
         if not hasattr(self, 'selected_region') or not self.selected_region:
@@ -192,17 +221,12 @@ class AddModeWindow(QWidget):
             os.makedirs(audio_target_dir, exist_ok=True)
             print(f"Audio target directory: {audio_target_dir}")
             
-            # 複製音檔
+            # 於背景匯入音檔（相同內容以硬連結去重；批次編輯時於提交時才匯入）
             audio_source = new_region['audio_path']
             audio_target = os.path.join(audio_target_dir, new_region['audio_name'])
-            print(f"Copying audio from {audio_source} to {audio_target}")
-            
-            # 檢查源文件和目標文件是否相同，只有不同時才複製
-            if os.path.normpath(audio_source) != os.path.normpath(audio_target):
-                shutil.copy2(audio_source, audio_target)
-                print(f"Audio file copied successfully")
-            else:
-                print(f"Source and target audio files are the same, skipping copy")
+            if not self.batch_checkbox.isChecked():
+                print(f"Queueing audio import from {audio_source} to {audio_target}")
+                self.queue_audio_import(audio_source, audio_target_dir, new_region['audio_name'], text)
             
             # 3. 產生新的文字框資料
             current_page = self.main_window.page_combo.currentIndex()
@@ -224,22 +248,21 @@ class AddModeWindow(QWidget):
             
             # 4. 直接添加到元素列表
             # 設置新的元素代碼
-            rect = new_region['rect']
-            new_element = {
-                'Text': new_region['text'],
-                'Category': new_region['category'],
-                'Image': image_name,
-                'X1': int(rect.x()),
-                'Y1': int(rect.y()),
-                'X2': int(rect.x() + rect.width()),
-                'Y2': int(rect.y() + rect.height()),
-                'English_Audio_File': new_region['audio_name'],
-                # 中文標籤與音檔
-                '中文翻譯': new_region['text'],
-                'Chinese_Audio_File': new_region['audio_name']
-            }
+            new_element = self.create_element(new_region, image_name)
             print(f"Created new element: {new_element}")
             
+            if self.batch_checkbox.isChecked():
+                # 批次編輯：暫存並直接顯示，不寫入檔案也不重新載入頁面
+                self.transaction.add(new_element, audio_source, audio_target)
+                new_region['element'] = new_element
+                self.current_regions.append(new_region)
+                self.selected_region = None
+                self.main_window.image_viewer.selected_region = None
+                self.update_regions_display()
+                self.update_pending_label()
+                self.clear_inputs()
+                return
+            
             # 添加到 book_data 的元素列表中
             self.main_window.book_data.elements.append(new_element)
             
@@ -247,22 +270,9 @@ class AddModeWindow(QWidget):
             if image_name in self.main_window.book_data.pages:
                 self.main_window.book_data.pages[image_name].append(new_element)
             
-            # 保存 JSON 文件
-            # 创建可序列化的数据副本
-            elements_to_save = []
-            for elem in self.main_window.book_data.elements:
-                # 创建仅包含可序列化数据的副本
-                elem_copy = {}
-                for key, value in elem.items():
-                    # 跳过rect属性，它是QRectF对象，不能被序列化
-                    if key != 'rect':
-                        elem_copy[key] = value
-                elements_to_save.append(elem_copy)
-            
-            with open(self.main_window.book_data.json_path, 'w', encoding='utf-8') as f:
-                json.dump(elements_to_save, f, ensure_ascii=False, indent=2)
-            
-            print("Saved JSON file successfully")
+            # 在背景執行緒保存 JSON 文件
+            self.main_window.autosave_functions.save_now()
+            self.main_window.book_data.refresh_coord_store()
             
             # 清除選中狀態
             self.selected_region = None
@@ -272,11 +282,7 @@ class AddModeWindow(QWidget):
             self.main_window.loadPage(current_page)
             
             # 清空輸入
-            self.text_input.clear()
-            self.audio_path_label.setText("未選擇音檔")
-            self.audio_name_input.clear()
-            self.coord_label.setText('X1: -, Y1: -\nX2: -, Y2: -')
-            self.info_label.setText("未選擇文字框")
+            self.clear_inputs()
             
             # 顯示成功訊息
             QMessageBox.information(self, "成功", "文字框已新增")
@@ -286,12 +292,169 @@ class AddModeWindow(QWidget):
             traceback.print_exc()
             QMessageBox.critical(self, "錯誤", f"新增文字框時發生錯誤：{str(e)}")
             
+    def check_audio_source(self, path):
+        """匯入前確認來源音檔存在且可讀取，有問題時回傳錯誤訊息"""
+        if not os.path.isfile(path):
+            return f"找不到音檔：{path}"
+        if not os.access(path, os.R_OK):
+            return f"無法讀取音檔：{path}"
+        return None
+        
+    def queue_audio_import(self, source, target_dir, name, text):
+        """於背景匯入音檔，失敗時提醒是哪個文字框的音檔沒有匯入"""
+        def warn(error):
+            QMessageBox.warning(
+                self, "音檔匯入失敗",
+                f"文字框「{text}」的音檔 {name} 匯入失敗：{str(error)}\n請重新選擇音檔並更新該文字框。")
+        self.main_window.audio_import_functions.enqueue(source, target_dir, name, on_error=warn)
+        
+    def create_element(self, region, image_name):
+        """由新增的文字框資料產生書籍元素"""
+        rect = region['rect']
+        return {
+            'Text': region['text'],
+            'Category': region['category'],
+            'Image': image_name,
+            'X1': int(rect.x()),
+            'Y1': int(rect.y()),
+            'X2': int(rect.x() + rect.width()),
+            'Y2': int(rect.y() + rect.height()),
+            'English_Audio_File': region['audio_name'],
+            # 中文標籤與音檔
+            '中文翻譯': region['text'],
+            'Chinese_Audio_File': region['audio_name']
+        }
+        
+    def clear_inputs(self):
+        self.text_input.clear()
+        self.audio_path_label.setText("未選擇音檔")
+        self.audio_name_input.clear()
+        self.coord_label.setText('X1: -, Y1: -\nX2: -, Y2: -')
+        self.info_label.setText("未選擇文字框")
+        
+    def element_for_region(self, region):
+        """文字框對應的書籍元素（暫存的新元素或目前頁面中的元素）"""
+        if region.get('element') is not None:
+            return region['element']
+        element_index = region.get('element_index')
+        page = self.main_window.book_data.get_page(self.main_window.page_combo.currentIndex())
+        if element_index is None or not page or element_index >= len(page):
+            return None
+        return page[element_index]
+        
+    def set_batch_mode(self, enabled):
+        """關閉批次編輯時提交暫存的變更"""
+        if not enabled and len(self.transaction):
+            self.commit_transaction()
+        
+    def update_pending_label(self):
+        count = len(self.transaction)
+        self.pending_label.setText(f"暫存變更：{count}")
+        self.commit_button.setEnabled(count > 0)
+        self.discard_button.setEnabled(count > 0)
+        
+    def with_pending(self, regions, page_index):
+        """頁面載入的文字框加上暫存的變更（移除暫存刪除、加入暫存新增）"""
+        if not len(self.transaction):
+            return regions
+        page = self.main_window.book_data.get_page(page_index) or []
+        visible = []
+        for region in regions:
+            element_index = region.get('element_index')
+            element = page[element_index] if element_index is not None and element_index < len(page) else None
+            if element is not None and self.transaction.is_deleted(element):
+                continue
+            fields = self.transaction.pending_fields(element) if element is not None else {}
+            if all(key in fields for key in ('X1', 'Y1', 'X2', 'Y2')):
+                region['rect'] = QRectF(fields['X1'], fields['Y1'],
+                                        fields['X2'] - fields['X1'], fields['Y2'] - fields['Y1'])
+            visible.append(region)
+        image_name = list(self.main_window.book_data.pages.keys())[page_index]
+        category = self.category_combo.currentText()
+        for element in self.transaction.pending_for_page(image_name):
+            if element.get('Category') != category:
+                continue
+            visible.append({
+                'rect': QRectF(element['X1'], element['Y1'],
+                               element['X2'] - element['X1'], element['Y2'] - element['Y1']),
+                'text': element.get('Text', ''),
+                'category': element.get('Category', ''),
+                'audio_name': element.get('English_Audio_File', ''),
+                'id': str(uuid.uuid4()),
+                'element': element,
+            })
+        return visible
+        
+    def stage_rect(self, region):
+        """批次編輯時暫存文字框的新座標"""
+        if not self.batch_checkbox.isChecked() or not self.main_window.book_data:
+            return
+        element = self.element_for_region(region)
+        if element is None:
+            return
+        rect = region['rect']
+        self.transaction.update(element, X1=int(rect.x()), Y1=int(rect.y()),
+                                X2=int(rect.x() + rect.width()), Y2=int(rect.y() + rect.height()))
+        self.update_pending_label()
+        
+    def apply_transaction(self):
+        """將暫存變更套用到書籍資料並保存一次（不重新整理頁面），回傳是否有套用"""
+        book_data = self.main_window.book_data
+        if not book_data or not len(self.transaction):
+            return False
+        # 先排入音檔匯入，再套用暫存的元素變更
+        for source, target, element in self.transaction.audio_copies:
+            self.queue_audio_import(source, os.path.dirname(target), os.path.basename(target),
+                                    element.get('Text', ''))
+        added, deleted, updated = self.transaction.commit(book_data)
+        print(f"Committed batch: {added} added, {deleted} deleted, {updated} updated")
+        self.main_window.autosave_functions.save_now()
+        book_data.refresh_coord_store()
+        self.update_pending_label()
+        return True
+        
+    def commit_transaction(self):
+        """一次套用所有暫存變更，保存一次並重新整理一次頁面"""
+        if not self.apply_transaction():
+            return
+        self.selected_region = None
+        self.main_window.image_viewer.selected_region = None
+        if self.main_window.page_combo.currentIndex() >= 0:
+            self.main_window.loadPage(self.main_window.page_combo.currentIndex())
+        
+    def discard_transaction(self):
+        """捨棄暫存的變更並恢復頁面顯示"""
+        if not len(self.transaction):
+            return
+        self.transaction.rollback()
+        self.selected_region = None
+        self.main_window.image_viewer.selected_region = None
+        self.update_pending_label()
+        if self.main_window.book_data and self.main_window.page_combo.currentIndex() >= 0:
+            self.main_window.loadPage(self.main_window.page_combo.currentIndex())
+        
     def delete_selected_region(self):
         """刪除選中的文字框"""
         if not self.selected_region:
             print("No selected region to delete")
             return
             
+        if self.batch_checkbox.isChecked():
+            # 批次編輯：暫存刪除並從顯示中移除
+            element = self.element_for_region(self.selected_region)
+            if element is None:
+                QMessageBox.warning(self, "錯誤", "找不到要刪除的文字框")
+                return
+            self.transaction.delete(element)
+            self.current_regions = [r for r in self.current_regions if r is not self.selected_region]
+            self.selected_region = None
+            self.main_window.image_viewer.selected_region = None
+            self.info_label.setText("未選擇文字框")
+            self.delete_button.setEnabled(False)
+            self.update_regions_display()
+            self.update_pending_label()
+            return
+            
         try:
             print("Starting to delete selected region")
             # 從當前頁面中刪除文字框
@@ -343,20 +506,9 @@ class AddModeWindow(QWidget):
                 
                 # 保存到JSON文件
                 try:
-                    # 处理元素，移除不能序列化的对象
-                    data_to_save = []
-                    for elem in self.main_window.book_data.elements:
-                        # 创建仅包含可序列化数据的副本
-                        elem_copy = {}
-                        for key, value in elem.items():
-                            # 跳过rect属性，它是QRectF对象，不能被序列化
-                            if key != 'rect':
-                                elem_copy[key] = value
-                        data_to_save.append(elem_copy)
-                    
-                    with open(self.main_window.book_data.json_path, 'w', encoding='utf-8') as f:
-                        json.dump(data_to_save, f, ensure_ascii=False, indent=2)
-                    print(f"Saved changes to {self.main_window.book_data.json_path}")
+                    # 在背景執行緒保存到JSON文件
+                    self.main_window.autosave_functions.save_now()
+                    self.main_window.book_data.refresh_coord_store()
                     
                     # 从当前区域列表中移除
                     self.current_regions = [r for r in self.current_regions 
@@ -468,6 +620,7 @@ class AddModeWindow(QWidget):
         if region and self.selected_region and 'rect' in region:
             # 更新座標資訊
             self.selected_region['rect'] = region['rect']
+            self.stage_rect(self.selected_region)
             rect = region['rect']
             self.coord_label.setText(
                 f'X1: {rect.x():.0f}, Y1: {rect.y():.0f}\n'
@@ -479,6 +632,7 @@ class AddModeWindow(QWidget):
         if region and self.selected_region and 'rect' in region:
             # 更新座標資訊
             self.selected_region['rect'] = region['rect']
+            self.stage_rect(self.selected_region)
             rect = region['rect']
             self.coord_label.setText(
                 f'X1: {rect.x():.0f}, Y1: {rect.y():.0f}\n'
@@ -492,6 +646,10 @@ class AddModeWindow(QWidget):
             
         try:
             print("Saving all regions...")
+            if len(self.transaction):
+                # 批次編輯暫存的文字框只經由提交寫入（提交後重新載入頁面），不走下方的直接新增
+                self.commit_transaction()
+                
             current_page = self.main_window.page_combo.currentIndex()
             page = self.main_window.book_data.get_page(current_page)
             
@@ -517,36 +675,24 @@ class AddModeWindow(QWidget):
             # 處理每個新增的文字框
             modified = False
             for region in self.current_regions:
-                if 'saved' not in region:  # 只處理未保存的文字框
+                # 只處理未保存的文字框；帶有 'element' 的是批次編輯的暫存文字框
+                if 'saved' not in region and region.get('element') is None:
                     print(f"Processing unsaved region: {region}")
                     
-                    # 複製音檔到目標目錄
+                    # 來源音檔已不存在時不新增元素，避免 JSON 指向不存在的音檔
                     audio_source = region['audio_path']
-                    audio_target = os.path.join(audio_target_dir, region['audio_name'])
-                    print(f"Copying audio from {audio_source} to {audio_target}")
+                    audio_error = self.check_audio_source(audio_source)
+                    if audio_error:
+                        QMessageBox.warning(self, "警告", f"文字框「{region.get('text', '')}」未保存：{audio_error}")
+                        continue
                     
-                    # 檢查源文件和目標文件是否相同，只有不同時才複製
-                    if os.path.normpath(audio_source) != os.path.normpath(audio_target):
-                        shutil.copy2(audio_source, audio_target)
-                        print(f"Audio file copied successfully")
-                    else:
-                        print(f"Source and target audio files are the same, skipping copy")
+                    # 於背景匯入音檔到目標目錄（相同內容以硬連結去重）
+                    print(f"Queueing audio import from {audio_source} to {audio_target_dir}")
+                    self.queue_audio_import(audio_source, audio_target_dir, region['audio_name'],
+                                            region.get('text', ''))
                     
                     # 創建新的元素
-                    rect = region['rect']
-                    new_element = {
-                        'Text': region['text'],
-                        'Category': region['category'],
-                        'Image': image_name,
-                        'X1': int(rect.x()),
-                        'Y1': int(rect.y()),
-                        'X2': int(rect.x() + rect.width()),
-                        'Y2': int(rect.y() + rect.height()),
-                        'English_Audio_File': region['audio_name'],
-                        # 中文標籤與音檔
-                        '中文翻譯': region['text'],
-                        'Chinese_Audio_File': region['audio_name']
-                    }
+                    new_element = self.create_element(region, image_name)
                     print(f"Created new element: {new_element}")
                     
                     # 添加到 book_data 的元素列表中
@@ -562,20 +708,9 @@ class AddModeWindow(QWidget):
             
             # 如果有變更，則保存到文件
             if modified:
-                # 创建可序列化的数据副本
-                elements_to_save = []
-                for elem in self.main_window.book_data.elements:
-                    # 创建仅包含可序列化数据的副本
-                    elem_copy = {}
-                    for key, value in elem.items():
-                        # 跳过rect属性，它是QRectF对象，不能被序列化
-                        if key != 'rect':
-                            elem_copy[key] = value
-                    elements_to_save.append(elem_copy)
-                
-                with open(self.main_window.book_data.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(elements_to_save, f, ensure_ascii=False, indent=2)
-                print("Saved JSON file successfully")
+                # 在背景執行緒保存到 JSON 文件
+                self.main_window.autosave_functions.save_now()
+                self.main_window.book_data.refresh_coord_store()
                 
             return True
             
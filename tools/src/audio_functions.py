@@ -2,7 +2,6 @@ from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtCore import QUrl
 import os
-import json
 import shutil
 from datetime import datetime
 
@@ -11,6 +10,28 @@ class AudioFunctions:
         self.main_window = main_window
         self.media_player = QMediaPlayer()
         
+    def find_audio_path(self, audio_file):
+        """回傳 (存在的音檔路徑或 None, 嘗試過的路徑)"""
+        # 可能的音檔路徑
+        possible_paths = [
+            # 無視 book_id 的路徑
+            os.path.join("D:/click_to_read/assets/audio/en", audio_file),
+            # 使用 V1 或 V2 作為子目錄
+            os.path.join("D:/click_to_read/assets/audio/en/V1", audio_file),
+            os.path.join("D:/click_to_read/assets/audio/en/V2", audio_file),
+        ]
+        
+        # 如果知道 book_id，也嘗試使用它
+        if hasattr(self.main_window.book_data, 'book_id'):
+            book_id = self.main_window.book_data.book_id
+            possible_paths.append(os.path.join("D:/click_to_read/assets/audio/en", book_id, audio_file))
+        
+        # 嘗試所有可能的路徑
+        for path in possible_paths:
+            if os.path.exists(path):
+                return path, possible_paths
+        return None, possible_paths
+        
     def play_audio(self):
         """播放音檔"""
         if not self.main_window.selected_element or not self.main_window.book_data:
@@ -35,27 +56,7 @@ class AudioFunctions:
                 print("No audio file specified in the selected element")
                 return
                 
-            # 可能的音檔路徑
-            possible_paths = [
-                # 無視 book_id 的路徑
-                os.path.join("D:/click_to_read/assets/audio/en", audio_file),
-                # 使用 V1 或 V2 作為子目錄
-                os.path.join("D:/click_to_read/assets/audio/en/V1", audio_file),
-                os.path.join("D:/click_to_read/assets/audio/en/V2", audio_file),
-            ]
-            
-            # 如果知道 book_id，也嘗試使用它
-            if hasattr(self.main_window.book_data, 'book_id'):
-                book_id = self.main_window.book_data.book_id
-                possible_paths.append(os.path.join("D:/click_to_read/assets/audio/en", book_id, audio_file))
-            
-            # 嘗試所有可能的路徑
-            audio_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    audio_path = path
-                    break
-                    
+            audio_path, possible_paths = self.find_audio_path(audio_file)
             if audio_path:
                 print(f'播放音檔: {audio_path}')
                 self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(audio_path)))
@@ -110,52 +111,15 @@ class AudioFunctions:
                         orig_element['audioFile'] = filename
                     print(f"Updated original JSON element: {orig_element}")
                     
-            # 保存到 JSON 文件
-            # 先备份原始文件
-            backup_path = self.main_window.book_data.json_path + '.bak'
-            try:
-                with open(self.main_window.book_data.json_path, 'r', encoding='utf-8') as f:
-                    original_data = json.load(f)
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    json.dump(original_data, f, ensure_ascii=False, indent=2)
-                print(f"Created backup at {backup_path}")
-            except Exception as e:
-                print(f"Could not create backup: {str(e)}")
-            
-            # 处理元素，移除不能序列化的对象
-            data_to_save = []
-            for elem in self.main_window.book_data.elements:
-                # 创建仅包含可序列化数据的副本
-                elem_copy = {}
-                for key, value in elem.items():
-                    # 跳过rect属性，它是QRectF对象，不能被序列化
-                    if key != 'rect':
-                        elem_copy[key] = value
-                data_to_save.append(elem_copy)
+            # 在背景執行緒保存到 JSON 文件
+            self.main_window.autosave_functions.save_now()
             
-            try:
-                with open(self.main_window.book_data.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(data_to_save, f, ensure_ascii=False, indent=2)
-                print(f"Saved changes to {self.main_window.book_data.json_path}")
-                
-                # 更新数据引用
-                self.main_window.book_data.elements = data_to_save
-                
-                # 重新加载页面以显示更新后的音频文件
-                self.main_window.loadPage(current_page)
-            except Exception as e:
-                print(f"Error saving JSON: {str(e)}")
-                # 如果保存失败且有备份，恢复原始文件
-                if os.path.exists(backup_path):
-                    try:
-                        os.replace(backup_path, self.main_window.book_data.json_path)
-                        print(f"Restored from backup {backup_path}")
-                    except Exception as restore_error:
-                        print(f"Error restoring from backup: {str(restore_error)}")
-                QMessageBox.critical(None, "錯誤", f"保存時發生錯誤：{str(e)}")
+            # 重新加载页面以显示更新后的音频文件
+            self.main_window.loadPage(current_page)
             
             # 更新音檔標籤顯示
             self.main_window.audio_label.setText(f'音檔: {filename}')
+            self.main_window.waveform_functions.show_element(self.main_window.selected_element)
             
             # 在預覽中播放新音檔
             self.play_audio()
@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from PyQt5.QtCore import QTimer
+from src.utils.audio_import import AudioLibrary, import_audio, summarize
+
+
+class AudioImportFunctions:
+    def __init__(self, main_window):
+        self.main_window = main_window
+        # 單一背景執行緒依序匯入，目錄索引只在該執行緒中使用
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.libraries = {}  # 目錄 -> AudioLibrary
+        self.pending = []  # (future, 完成後的回呼)
+        self.results = []  # 本批次已完成的結果
+        self.failed = 0
+
+        # 定期檢查背景匯入的進度
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(100)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def enqueue(self, source, target_dir, name, callback=None, on_error=None):
+        """排入一個音檔匯入，完成後以 ImportResult 呼叫 callback，失敗時以例外呼叫 on_error"""
+        if not self.pending:
+            # 新的批次：重新掃描目錄（檔案可能已在程式外變更）
+            self.libraries = {}
+            self.results = []
+            self.failed = 0
+        target_dir = os.path.normpath(target_dir)
+        library = self.libraries.setdefault(target_dir, AudioLibrary(target_dir))
+        future = self.executor.submit(import_audio, source, name, library)
+        self.pending.append((future, callback, on_error))
+        self.show_progress()
+        self.poll_timer.start()
+        return future
+
+    def poll(self):
+        """處理已完成的匯入並更新狀態列"""
+        remaining = []
+        for future, callback, on_error in self.pending:
+            if not future.done():
+                remaining.append((future, callback, on_error))
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error importing audio: {str(e)}")
+                self.failed += 1
+                if on_error:
+                    on_error(e)
+                continue
+            print(f"Audio {result.action}: {result.source} -> {result.name}")
+            self.results.append(result)
+            if callback:
+                callback(result)
+        self.pending = remaining
+        self.show_progress()
+        if not self.pending:
+            self.poll_timer.stop()
+
+    def show_progress(self):
+        total = len(self.results) + self.failed + len(self.pending)
+        if self.pending:
+            message = f"匯入音檔 {len(self.results) + self.failed}/{total}..."
+        else:
+            message = f"已匯入 {summarize(self.results)}"
+        if self.failed:
+            message += f"，{self.failed} 個失敗"
+        self.main_window.statusBar().showMessage(message)
+
+    def wait_pending(self):
+        """等待所有匯入完成（關閉視窗前使用）"""
+        while self.pending:
+            wait([future for future, _, _ in self.pending])
+            self.poll()
+
+    def shutdown(self):
+        """完成剩餘的匯入並結束背景執行緒"""
+        self.wait_pending()
+        self.poll_timer.stop()
+        self.executor.shutdown(wait=True)
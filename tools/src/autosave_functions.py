@@ -0,0 +1,161 @@
+import os
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QMessageBox
+from src.utils import json_codec
+from src.utils.version_store import VersionStore
+
+
+def write_snapshot(json_path, elements, store=None, dirty_pages=None):
+    """將元素快照以暫存檔原子替換寫入 JSON，並記錄到版本歷史（於背景執行緒執行）
+
+    沿用同一個 store 時只需重新編碼 dirty_pages（None 表示未知，改以內容比對）中的頁面。
+    """
+    store = store or VersionStore(json_path)
+    if dirty_pages is not None and store.json_changed():
+        # 檔案在上次記錄後被其他途徑寫入，各頁改以內容比對
+        dirty_pages = None
+    if store.head() is None and os.path.exists(json_path):
+        # 第一次保存前先記錄原始檔案
+        store.commit(json_codec.load(json_path), '原始檔案')
+    temp_path = json_path + '.tmp'
+    try:
+        json_codec.dump(elements, temp_path)
+        os.replace(temp_path, json_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    try:
+        store.commit(elements, '保存', dirty_pages)
+    except (OSError, ValueError) as e:
+        print(f"Could not record version: {str(e)}")
+    return json_path
+
+
+class AutosaveFunctions:
+    # 最後一次編輯後等待多久才寫入（毫秒），連續編輯只寫入一次
+    AUTOSAVE_DELAY = 1500
+
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.enabled = False
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.dirty = False  # 是否有尚未寫入的變更
+        self.error = None  # 最近一次寫入失敗的訊息，成功後清除
+        self.dirty_pages = set()  # 上次寫入後有變更的圖片名稱，None 表示未知
+        self.stores = {}  # JSON 路徑 -> VersionStore（保留最新版本以只記錄變更的頁面）
+
+        # 編輯停止一段時間後才寫入
+        self.delay_timer = QTimer()
+        self.delay_timer.setSingleShot(True)
+        self.delay_timer.setInterval(self.AUTOSAVE_DELAY)
+        self.delay_timer.timeout.connect(self.flush)
+
+        # 定期檢查背景寫入是否完成
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(100)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def set_enabled(self, enabled):
+        """開啟或關閉自動保存"""
+        self.enabled = bool(enabled)
+        if self.enabled and self.dirty:
+            self.delay_timer.start()
+
+    def add_dirty_page(self, page_index=None):
+        """記錄變更的頁面；未指定頁面時視為未知，寫入時改以內容比對"""
+        book_data = self.main_window.book_data
+        page_keys = list(book_data.pages.keys()) if book_data else []
+        if page_index is None or not 0 <= page_index < len(page_keys):
+            self.dirty_pages = None
+        elif self.dirty_pages is not None:
+            self.dirty_pages.add(page_keys[page_index])
+
+    def mark_dirty(self, page_index=None):
+        """記錄有新的編輯，自動保存開啟時延後寫入"""
+        self.dirty = True
+        self.add_dirty_page(page_index)
+        if self.enabled:
+            self.delay_timer.start()
+            self.show_status('有未保存的變更')
+
+    def save_now(self, page_index=None):
+        """立即在背景寫入目前的資料（保存按鈕使用）"""
+        self.dirty = True
+        self.add_dirty_page(page_index)
+        self.delay_timer.stop()
+        self.flush()
+
+    def flush(self):
+        """擷取元素快照並交給背景執行緒寫入；寫入中時等完成後再寫一次"""
+        book_data = self.main_window.book_data
+        if not self.dirty or not book_data:
+            return
+        if self.future is not None:
+            return
+        # 元素欄位皆為不可變值，淺層複製即為一致的快照，之後的編輯不會影響寫入內容
+        snapshot = book_data.serializable_elements()
+        dirty_pages, self.dirty_pages = self.dirty_pages, set()
+        self.dirty = False
+        store = self.stores.get(book_data.json_path)
+        if store is None:
+            store = self.stores[book_data.json_path] = VersionStore(book_data.json_path)
+        self.future = self.executor.submit(write_snapshot, book_data.json_path, snapshot, store, dirty_pages)
+        # 資料已變更，同步更新搜尋索引
+        self.main_window.search_functions.sync()
+        self.show_status('保存中...')
+        self.poll_timer.start()
+
+    def poll(self, report=True):
+        """取得背景寫入的結果，期間若有新的變更則再寫入一次"""
+        if self.future is None or not self.future.done():
+            return
+        self.poll_timer.stop()
+        future, self.future = self.future, None
+        try:
+            json_path = future.result()
+        except Exception as e:
+            print(f"Error saving JSON: {str(e)}")
+            # 快照未寫入，變更仍視為未保存（變更的頁面改以內容比對）
+            self.dirty = True
+            self.dirty_pages = None
+            self.error = str(e)
+            self.show_status(f'保存失敗：{str(e)}')
+            if report:
+                self.report_error()
+            return
+        self.error = None
+        print(f"Saved changes to {json_path}")
+        self.show_status(f"已保存 {datetime.now().strftime('%H:%M:%S')}")
+        if self.dirty:
+            self.flush()
+
+    def show_status(self, message):
+        self.main_window.statusBar().showMessage(message)
+
+    def report_error(self):
+        QMessageBox.critical(self.main_window, "錯誤", f"保存時發生錯誤：{self.error}")
+
+    def wait_pending(self):
+        """等待背景寫入完成並寫入剩餘的變更（切換書籍或關閉視窗前使用），回傳是否全部寫入成功"""
+        self.delay_timer.stop()
+        self.flush()
+        while self.future is not None:
+            wait([self.future])
+            self.poll(report=False)
+        return self.error is None and not self.dirty
+
+    def discard(self):
+        """放棄尚未寫入的變更（使用者確認後切換書籍或關閉視窗時使用）"""
+        self.delay_timer.stop()
+        self.dirty = False
+        self.dirty_pages = set()
+        self.error = None
+
+    def shutdown(self):
+        """寫入尚未保存的變更並結束背景執行緒"""
+        self.wait_pending()
+        self.poll_timer.stop()
+        self.executor.shutdown(wait=True)
@@ -1,8 +1,15 @@
-import json
 import os
+import sys
 import shutil
 from datetime import datetime
 
+# 直接執行本檔（python src/fix_translation.py 或於 src 目錄下執行）時，將 tools 目錄加入 Python 路徑
+tools_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if tools_dir not in sys.path:
+    sys.path.append(tools_dir)
+
+from src.utils.migrations import run_migrations
+
 def fix_translation_source():
     """
     修正翻譯文字匯入來源，使用Chinese_Audio_File而不是中文翻譯欄位
@@ -23,39 +30,10 @@ def fix_translation_source():
         shutil.copy2(book_models_path, os.path.join(backup_dir, "book_models.dart"))
         print(f"已備份 {book_models_path} 到 {backup_dir}")
     
-    # 處理JSON數據文件，添加從音頻文件中提取的翻譯
-    for file_name in os.listdir(book_data_dir):
-        if file_name.endswith(".json"):
-            json_path = os.path.join(book_data_dir, file_name)
-            
-            # 備份數據文件
-            shutil.copy2(json_path, os.path.join(backup_dir, file_name))
-            print(f"已備份 {json_path} 到 {backup_dir}")
-            
-            # 讀取JSON數據
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # 更新數據：從Chinese_Audio_File提取翻譯
-            for item in data:
-                if "Chinese_Audio_File" in item and item["Chinese_Audio_File"]:
-                    audio_file = item["Chinese_Audio_File"]
-                    # 從音頻文件名提取翻譯文字
-                    if audio_file.startswith("zh_"):
-                        translation_text = audio_file[3:]  # 移除前缀 "zh_"
-                        if translation_text.lower().endswith(".mp3"):
-                            translation_text = translation_text[:-4]  # 移除後缀 ".mp3"
-                        
-                        # 更新中文翻譯
-                        if "中文翻譯" in item:
-                            if item["中文翻譯"] != translation_text:
-                                print(f"更新翻譯: {item['中文翻譯']} -> {translation_text}")
-                                item["中文翻譯"] = translation_text
-            
-            # 保存更新後的數據
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"已更新 {json_path} 中的翻譯數據")
+    # 處理JSON數據文件：從Chinese_Audio_File提取翻譯（只寫回有變更的檔案，並先備份）
+    json_paths = [os.path.join(book_data_dir, file_name)
+                  for file_name in sorted(os.listdir(book_data_dir)) if file_name.endswith(".json")]
+    run_migrations(json_paths, ['translation_from_audio'], backup_dir=backup_dir)
     
     # 部署新的模型文件
     fixed_models_path = os.path.join(models_dir, "book_models_fixed.dart")
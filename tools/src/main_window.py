@@ -2,17 +2,29 @@ import os
 import uuid
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QPushButton, QLabel, QComboBox, QFileDialog, QFrame,
-                            QGroupBox, QMessageBox, QTabWidget, QLineEdit)
+                            QGroupBox, QMessageBox, QTabWidget, QLineEdit, QCheckBox,
+                            QListWidget)
 from PyQt5.QtCore import Qt, QRectF, QTimer
 from PyQt5.QtGui import QColor
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtCore import QUrl
 from src.widgets.image_viewer import ImageViewer
+from src.widgets.thumbnail_strip import ThumbnailStrip
+from src.widgets.waveform_view import WaveformView
 from src.utils.book_data import BookData
 from src.utils.audio_updater import AudioUpdater
 from src.audio_functions import AudioFunctions
 from src.page_functions import PageFunctions
 from src.region_functions import RegionFunctions
+from src.reprojection_functions import ReprojectionFunctions
+from src.overlap_functions import OverlapFunctions
+from src.proposal_functions import ProposalFunctions
+from src.snap_functions import SnapFunctions
+from src.thumbnail_functions import ThumbnailFunctions
+from src.autosave_functions import AutosaveFunctions
+from src.audio_import_functions import AudioImportFunctions
+from src.search_functions import SearchFunctions
+from src.waveform_functions import WaveformFunctions
 from src.add_mode_window import AddModeWindow
 from datetime import datetime
 
@@ -79,15 +91,30 @@ class MainWindow(QMainWindow):
         
         main_layout.addWidget(content_widget)
         
+        # 創建頁面縮圖列
+        self.thumbnail_strip = ThumbnailStrip(self)
+        self.thumbnail_strip.pageSelected.connect(self.page_combo.setCurrentIndex)
+        main_layout.addWidget(self.thumbnail_strip)
+        
         # 初始化功能模組
         self.audio_functions = AudioFunctions(self)
         self.page_functions = PageFunctions(self)
         self.region_functions = RegionFunctions(self)
+        self.reprojection_functions = ReprojectionFunctions(self)
+        self.overlap_functions = OverlapFunctions(self)
+        self.proposal_functions = ProposalFunctions(self)
+        self.snap_functions = SnapFunctions(self)
+        self.thumbnail_functions = ThumbnailFunctions(self)
+        self.autosave_functions = AutosaveFunctions(self)
+        self.audio_import_functions = AudioImportFunctions(self)
+        self.search_functions = SearchFunctions(self)
+        self.waveform_functions = WaveformFunctions(self)
         
         # 連接信號
         self.image_viewer.regionSelected.connect(self.onRegionSelected)
         self.image_viewer.regionMoved.connect(self.onRegionMoved)
         self.image_viewer.regionResized.connect(self.onRegionResized)
+        self.image_viewer.regionsTransformed.connect(self.onRegionsTransformed)
         self.tab_widget.currentChanged.connect(self.onTabChanged)
         
         # 設置窗口屬性
@@ -122,16 +149,74 @@ class MainWindow(QMainWindow):
         audio_group = QGroupBox("音檔控制")
         audio_layout = QVBoxLayout()
         self.audio_label = QLabel('音檔: 未選擇')
+        self.waveform_view = WaveformView()
         self.play_button = QPushButton('播放')
         self.update_audio_button = QPushButton('更新音檔')
         self.play_button.clicked.connect(self.playAudio)
         self.update_audio_button.clicked.connect(self.updateAudio)
         audio_layout.addWidget(self.audio_label)
+        audio_layout.addWidget(self.waveform_view)
         audio_layout.addWidget(self.play_button)
         audio_layout.addWidget(self.update_audio_button)
         audio_group.setLayout(audio_layout)
         layout.addWidget(audio_group)
         
+        # 搜尋組
+        search_group = QGroupBox("搜尋")
+        search_layout = QVBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('搜尋文字 / 中文翻譯')
+        self.search_input.textChanged.connect(self.searchElements)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(160)
+        self.search_results.itemClicked.connect(self.jumpToSearchHit)
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.search_results)
+        search_group.setLayout(search_layout)
+        layout.addWidget(search_group)
+        
+        # 多選排列組（Shift 點選或在空白處框選多個文字框）
+        arrange_group = QGroupBox("多選排列")
+        arrange_layout = QVBoxLayout()
+        align_row = QHBoxLayout()
+        for label, edge in (('靠左', 'left'), ('靠右', 'right'), ('靠上', 'top'), ('靠下', 'bottom')):
+            button = QPushButton(label)
+            button.clicked.connect(lambda _, edge=edge: self.alignSelection(edge))
+            align_row.addWidget(button)
+        arrange_layout.addLayout(align_row)
+        scale_row = QHBoxLayout()
+        for label, factor in (('放大', 1.05), ('縮小', 1 / 1.05)):
+            button = QPushButton(label)
+            button.clicked.connect(lambda _, factor=factor: self.scaleSelection(factor))
+            scale_row.addWidget(button)
+        self.undo_button = QPushButton('復原')
+        self.undo_button.clicked.connect(self.undoEdit)
+        self.redo_button = QPushButton('重做')
+        self.redo_button.clicked.connect(self.redoEdit)
+        scale_row.addWidget(self.undo_button)
+        scale_row.addWidget(self.redo_button)
+        arrange_layout.addLayout(scale_row)
+        arrange_group.setLayout(arrange_layout)
+        layout.addWidget(arrange_group)
+        
+        # 工具組
+        tools_group = QGroupBox("工具")
+        tools_layout = QVBoxLayout()
+        self.reproject_button = QPushButton('重新投影頁面')
+        self.reproject_button.clicked.connect(self.reprojectPage)
+        tools_layout.addWidget(self.reproject_button)
+        self.overlap_checkbox = QCheckBox('標示重疊 / 重複文字框')
+        self.overlap_checkbox.toggled.connect(self.toggleOverlapHighlight)
+        tools_layout.addWidget(self.overlap_checkbox)
+        self.snap_checkbox = QCheckBox('文字框邊緣吸附文字')
+        self.snap_checkbox.toggled.connect(self.toggleSnap)
+        tools_layout.addWidget(self.snap_checkbox)
+        self.autosave_checkbox = QCheckBox('自動保存')
+        self.autosave_checkbox.toggled.connect(self.toggleAutosave)
+        tools_layout.addWidget(self.autosave_checkbox)
+        tools_group.setLayout(tools_layout)
+        layout.addWidget(tools_group)
+        
         # 保存按鈕
         self.save_button = QPushButton('保存變更')
         self.save_button.setStyleSheet('background-color: #007AFF; color: white; padding: 8px;')
@@ -171,25 +256,36 @@ class MainWindow(QMainWindow):
         )
         
         if json_file:
-            self.book_data = BookData(json_file)
-            if self.book_data.load():
-                self.file_label.setText(os.path.basename(json_file))
-                # 初始化音檔更新器
-                self.audio_updater = AudioUpdater(self.book_data)
-                # 設置更新回調
-                self.audio_updater.set_update_callback(self.audio_functions.on_audio_updated)
-                
-                # 更新頁面下拉選單
-                self.page_combo.clear()
-                total_pages = self.book_data.get_total_pages()
-                for i in range(total_pages):
-                    self.page_combo.addItem(f"第 {i + 1} 頁")
-                    
-                # 載入第一頁
-                self.loadPage(0)
-            else:
-                self.file_label.setText('載入失敗')
+            self.openBook(json_file)
+            
+    def openBook(self, json_file):
+        """開啟書籍 JSON 並載入第一頁，回傳是否成功"""
+        # 先確認批次編輯暫存的變更，並寫入目前書籍尚未保存的變更
+        if not self.confirmPendingBatch() or not self.confirmUnsavedChanges():
+            return False
+        self.book_data = BookData(json_file)
+        if self.book_data.load():
+            self.file_label.setText(os.path.basename(json_file))
+            # 初始化音檔更新器
+            self.audio_updater = AudioUpdater(self.book_data, self.autosave_functions.save_now)
+            # 設置更新回調
+            self.audio_updater.set_update_callback(self.audio_functions.on_audio_updated)
+            
+            # 更新頁面下拉選單
+            self.page_combo.clear()
+            total_pages = self.book_data.get_total_pages()
+            for i in range(total_pages):
+                self.page_combo.addItem(f"第 {i + 1} 頁")
                 
+            # 載入第一頁
+            self.loadPage(0)
+            # 建立頁面縮圖列與搜尋索引
+            self.thumbnail_functions.load_volume()
+            self.search_functions.add_book(self.book_data)
+            return True
+        self.file_label.setText('載入失敗')
+        return False
+            
     def loadPage(self, page_index):
         """載入頁面"""
         if not self.book_data:
@@ -221,6 +317,9 @@ class MainWindow(QMainWindow):
                                     if not region.get('new_created', False)]
             self.image_viewer.selected_region = None
 
+        # 同步縮圖列
+        self.thumbnail_strip.set_current_page(page_index)
+        
         # 載入圖片
         image_path = self.book_data.get_image_path(page_index)
         if image_path:
@@ -243,56 +342,58 @@ class MainWindow(QMainWindow):
                 current_category = self.add_mode.category_combo.currentText()
                 print(f"Current category filter: {current_category}")
                 
-                for i, elem in enumerate(page):
-                    # 只顯示當前選擇的類別
-                    elem_category = elem.get('Category', elem.get('category', ''))
-                    if elem_category == current_category:  # 注意大小寫
-                        print(f"Processing element: {elem.get('Text', 'Unknown')}")
-                        # 檢查座標是否存在
-                        if 'rect' in elem:
-                            print(f"Using pre-converted rect: {elem['rect']}")
-                            rect = elem['rect']
-                        elif all(k in elem for k in ['X1', 'Y1', 'X2', 'Y2']):
-                            print(f"Creating rect from X1={elem['X1']}, Y1={elem['Y1']}, X2={elem['X2']}, Y2={elem['Y2']}")
-                            rect = QRectF(
-                                elem['X1'],
-                                elem['Y1'],
-                                elem['X2'] - elem['X1'],
-                                elem['Y2'] - elem['Y1'])
-                        else:
-                            print(f"No valid coordinates found for: {elem.get('Text', 'Unknown')}")
-                            continue
-                            
-                        # 使用 uuid 生成唯一 ID（如果原始資料沒有 id）
-                        element_id = elem.get('id', str(uuid.uuid4()))
-                        element_data = {
-                            'rect': rect,
-                            'text': elem.get('Text', elem.get('text', '')),  # 注意大小寫
-                            'category': elem.get('Category', elem.get('category', 'Word')),  # 注意大小寫
-                            'audioFile': elem.get('English_Audio_File', elem.get('audioFile', '')),
-                            'audio_name': elem.get('English_Audio_File', elem.get('audioFile', '')),
-                            'id': element_id,
-                            'element_index': i,  # 使用当前循环内的i
-                            'saved': True  # 標記為已保存的元素
-                        }
-                        elements.append(element_data)
-                        print(f"Added element: {element_data}")
+                # 只顯示當前選擇的類別（以類別 / 頁面索引查詢）
+                for view in self.book_data.query().page(page_index).category(current_category):
+                    i = view.page_position
+                    elem = view.element
+                    print(f"Processing element: {elem.get('Text', 'Unknown')}")
+                    # 檢查座標是否存在
+                    if 'rect' in elem:
+                        print(f"Using pre-converted rect: {elem['rect']}")
+                        rect = elem['rect']
+                    elif all(k in elem for k in ['X1', 'Y1', 'X2', 'Y2']):
+                        print(f"Creating rect from X1={elem['X1']}, Y1={elem['Y1']}, X2={elem['X2']}, Y2={elem['Y2']}")
+                        rect = QRectF(
+                            elem['X1'],
+                            elem['Y1'],
+                            elem['X2'] - elem['X1'],
+                            elem['Y2'] - elem['Y1'])
                     else:
-                        if 'Category' in elem:
-                            print(f"Skipping element with category: {elem['Category']}")
-                        else:
-                            print(f"Skipping element without category: {elem}")
+                        print(f"No valid coordinates found for: {elem.get('Text', 'Unknown')}")
+                        continue
+                        
+                    # 使用 uuid 生成唯一 ID（如果原始資料沒有 id）
+                    element_id = elem.get('id', str(uuid.uuid4()))
+                    element_data = {
+                        'rect': rect,
+                        'text': elem.get('Text', elem.get('text', '')),  # 注意大小寫
+                        'category': elem.get('Category', elem.get('category', 'Word')),  # 注意大小寫
+                        'audioFile': elem.get('English_Audio_File', elem.get('audioFile', '')),
+                        'audio_name': elem.get('English_Audio_File', elem.get('audioFile', '')),
+                        'id': element_id,
+                        'element_index': i,  # 使用当前循环内的i
+                        'saved': True  # 標記為已保存的元素
+                    }
+                    elements.append(element_data)
+                    print(f"Added element: {element_data}")
                 
                 print(f"Processed {len(elements)} elements with category '{current_category}'")
-                self.add_mode.current_regions = elements
+                # 加上批次編輯暫存的新增 / 刪除
+                self.add_mode.current_regions = self.add_mode.with_pending(elements, page_index)
                 self.add_mode.update_regions_display()
             else:
                 print(f"No page data found for index: {page_index}")
+                
+        # 更新重疊標示圖層、自動偵測文字框與邊緣吸附資料
+        self.overlap_functions.refresh()
+        self.proposal_functions.refresh()
+        self.snap_functions.refresh()
             
     def onRegionSelected(self, region):
         if self.tab_widget.currentIndex() == 0:  # 編輯模式
             self.selected_element = region  # 更新選中的元素
             self.region_functions.on_region_selected(region)
+            self.waveform_functions.show_element(region)
         else:  # 新增模式
             # 修改 on_region_selected 調用，確保當前音檔資訊會被正確傳遞
             audio_info = {
@@ -304,21 +405,115 @@ class MainWindow(QMainWindow):
     def onRegionMoved(self, region):
         if self.tab_widget.currentIndex() == 0:  # 編輯模式
             self.region_functions.on_region_moved(region)
+            self.autosaveRegion(region)
         else:  # 新增模式
             self.add_mode.on_region_moved(region)
+        self.overlap_functions.refresh()
         
     def onRegionResized(self, region):
         if self.tab_widget.currentIndex() == 0:  # 編輯模式
             self.region_functions.on_region_resized(region)
+            self.autosaveRegion(region)
         else:  # 新增模式
             self.add_mode.on_region_resized(region)
+        self.overlap_functions.refresh()
         
+    def onRegionsTransformed(self, regions):
+        """多選文字框一起變換後，與單一文字框相同：自動保存開啟時一次寫回元素並排程寫入"""
+        if self.tab_widget.currentIndex() != 0:
+            return
+        if self.autosave_functions.enabled and self.region_functions.apply_region_rects(regions):
+            self.autosave_functions.mark_dirty(self.page_combo.currentIndex())
+        self.overlap_functions.refresh()
+        
+    def alignSelection(self, edge):
+        self.image_viewer.align_selection(edge)
+        
+    def scaleSelection(self, factor):
+        self.image_viewer.scale_selection(factor)
+        
+    def undoEdit(self):
+        self.image_viewer.undo()
+        
+    def redoEdit(self):
+        self.image_viewer.redo()
+        
+    def autosaveRegion(self, region):
+        """自動保存開啟時，將編輯模式中移動 / 調整的文字框寫回元素並排程寫入"""
+        if self.autosave_functions.enabled and self.region_functions.apply_region_rect(region):
+            self.autosave_functions.mark_dirty(self.page_combo.currentIndex())
+            
     def playAudio(self):
         self.audio_functions.play_audio()
         
     def updateAudio(self):
         self.audio_functions.update_audio()
         
+    def reprojectPage(self):
+        self.reprojection_functions.reproject_page()
+        
+    def toggleOverlapHighlight(self, checked):
+        self.overlap_functions.set_enabled(checked)
+        
+    def toggleProposals(self, checked):
+        self.proposal_functions.set_enabled(checked)
+        
+    def toggleSnap(self, checked):
+        self.snap_functions.set_enabled(checked)
+        
+    def searchElements(self, text):
+        self.search_functions.search(text)
+        
+    def jumpToSearchHit(self, item):
+        self.search_functions.jump_to(item)
+        
+    def toggleAutosave(self, checked):
+        self.autosave_functions.set_enabled(checked)
+        
+    def confirmPendingBatch(self):
+        """有批次編輯暫存的變更時詢問要提交、放棄或取消，回傳是否可以繼續"""
+        count = len(self.add_mode.transaction)
+        if not count:
+            return True
+        reply = QMessageBox.question(
+            self, "批次編輯",
+            f"有 {count} 項暫存的變更尚未提交，要提交嗎？",
+            QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel, QMessageBox.Save)
+        if reply == QMessageBox.Save:
+            self.add_mode.apply_transaction()
+        elif reply == QMessageBox.Discard:
+            self.add_mode.transaction.rollback()
+            self.add_mode.update_pending_label()
+        else:
+            return False
+        return True
+        
+    def confirmUnsavedChanges(self):
+        """寫入尚未保存的變更；寫入失敗時詢問是否放棄變更，回傳是否可以繼續"""
+        if self.autosave_functions.wait_pending():
+            return True
+        reply = QMessageBox.question(
+            self, "保存失敗",
+            f"保存時發生錯誤：{self.autosave_functions.error}\n\n仍要繼續嗎？未保存的變更將會遺失。",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return False
+        self.autosave_functions.discard()
+        return True
+        
+    def closeEvent(self, event):
+        """關閉視窗時結束背景行程與執行緒"""
+        if not self.confirmPendingBatch() or not self.confirmUnsavedChanges():
+            event.ignore()
+            return
+        self.audio_import_functions.shutdown()
+        self.autosave_functions.shutdown()
+        self.proposal_functions.shutdown()
+        self.snap_functions.shutdown()
+        self.thumbnail_functions.shutdown()
+        self.waveform_functions.shutdown()
+        super().closeEvent(event)
+        
     def onTabChanged(self, index):
         """處理分頁切換事件"""
         # 設置是否處於新增模式
@@ -372,10 +567,8 @@ class MainWindow(QMainWindow):
                             )
                 
                 # 強制重繪
+                self.overlap_functions.refresh()
                 self.image_viewer.update()
-                
-                # 顯示成功消息
-                QMessageBox.information(self, "成功", "變更已保存")
         else:  # 新增模式
             if self.add_mode.save_regions():
                 # 重要：更新页面数据中的 rect 属性
@@ -397,8 +590,5 @@ class MainWindow(QMainWindow):
                 
                 # 強制界面立即更新
                 self.image_viewer.update()
-                
-                # 顯示成功消息
-                QMessageBox.information(self, "成功", "變更已保存")
             else:
                 QMessageBox.warning(self, "錯誤", "保存失敗")
\ No newline at end of file
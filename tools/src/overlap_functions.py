@@ -0,0 +1,64 @@
+import numpy as np
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QColor
+from src.utils.overlap_analyzer import analyze_boxes
+
+# 疊加圖層名稱與顏色
+OVERLAP_LAYERS = {
+    'duplicates': QColor(255, 0, 255),    # 重複：洋紅
+    'overlaps': QColor(255, 0, 0),        # 重疊：紅
+    'orphan_words': QColor(255, 140, 0),  # 不在句子內的單字：橘
+}
+
+class OverlapFunctions:
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.enabled = False
+
+    def set_enabled(self, enabled):
+        """開啟或關閉重疊標示圖層"""
+        self.enabled = bool(enabled)
+        if self.enabled:
+            self.refresh()
+        else:
+            for name in OVERLAP_LAYERS:
+                self.main_window.image_viewer.clear_overlay(name)
+
+    def refresh(self):
+        """依目前頁面（含拖曳中的文字框）重新計算標示圖層"""
+        if not self.enabled:
+            return
+        book_data = self.main_window.book_data
+        page_index = self.main_window.page_combo.currentIndex()
+        if not book_data or book_data.coord_store is None or page_index < 0:
+            return
+
+        store = book_data.coord_store
+        page_rows = store.page_rows(page_index)
+        rows = page_rows[store.has_coords[page_rows]]
+        boxes = store.boxes(rows).copy()
+        position = {row: i for i, row in enumerate(rows.tolist())}
+
+        # 以檢視器中尚未保存的座標取代
+        for region in self.main_window.image_viewer.regions:
+            element_index = region.get('element_index')
+            rect = region.get('rect')
+            if element_index is None or rect is None or element_index >= len(page_rows):
+                continue
+            i = position.get(int(page_rows[element_index]))
+            if i is not None:
+                boxes[i] = (int(rect.x()), int(rect.y()),
+                            int(rect.x() + rect.width()), int(rect.y() + rect.height()))
+
+        report = analyze_boxes(boxes, np.zeros(len(rows), dtype=np.int32),
+                               store.category[rows], store.categories)
+        duplicate_rows, overlap_rows, orphan_rows = report.flagged_rows()
+        flagged = {
+            'duplicates': duplicate_rows,
+            'overlaps': overlap_rows,
+            'orphan_words': orphan_rows,
+        }
+        for name, color in OVERLAP_LAYERS.items():
+            rects = [QRectF(x1, y1, x2 - x1, y2 - y1)
+                     for x1, y1, x2, y2 in boxes[sorted(flagged[name])].tolist()]
+            self.main_window.image_viewer.set_overlay(name, rects, color)
@@ -26,54 +26,55 @@ class PageFunctions:
             current_category = self.main_window.category_combo.currentText()
             print(f"Current category: {current_category}")
             
-            for i, elem in enumerate(page):
-                # 注意: 新的JSON格式會有不同的大小寫
-                if elem.get('Category', elem.get('category', '')) == current_category:
-                    print(f"Processing element {i}: {elem.get('Text', elem.get('text', 'Unknown'))}")
-                    
-                    # 首先檢查是否已有將座標轉換為 QRectF
-                    if 'rect' in elem and elem['rect'] is not None:
-                        print(f"Using existing rect: {elem['rect']}")
-                        rect = elem['rect']
-                    # 否則從原始座標創建
-                    elif all(k in elem for k in ['X1', 'Y1', 'X2', 'Y2']):
-                        print(f"Creating rect from coordinates: X1={elem['X1']}, Y1={elem['Y1']}, X2={elem['X2']}, Y2={elem['Y2']}")
-                        rect = QRectF(
-                            elem['X1'],
-                            elem['Y1'],
-                            elem['X2'] - elem['X1'],
-                            elem['Y2'] - elem['Y1']
-                        )
-                    # 兼容舊的 JSON 格式
-                    elif 'coordinates' in elem and all(k in elem['coordinates'] for k in ['x1', 'y1', 'x2', 'y2']):
-                        coords = elem['coordinates']
-                        print(f"Creating rect from old format coordinates: {coords}")
-                        rect = QRectF(
-                            coords['x1'],
-                            coords['y1'],
-                            coords['x2'] - coords['x1'],
-                            coords['y2'] - coords['y1']
-                        )
-                    else:
-                        print(f"No valid coordinates found for element {i}")
-                        continue
-                        
-                    # 兼容不同的屬性名稱
-                    text = elem.get('Text', elem.get('text', ''))
-                    category = elem.get('Category', elem.get('category', 'Word'))
-                    audio_file = elem.get('English_Audio_File', elem.get('audioFile', ''))
-                    
-                    # 添加到元素列表
-                    elements.append({
-                        'rect': rect,
-                        'text': text,
-                        'category': category,
-                        'audioFile': audio_file,
-                        'element_index': i,
-                        'id': elem.get('id', f"elem_{i}")  # 確保有唯一ID
-                    })
-                    print(f"Added element {i} to display list")
+            # 以類別 / 頁面索引查詢，不逐一比較字串
+            for view in self.main_window.book_data.query().page(page_index).category(current_category):
+                i = view.page_position
+                elem = view.element
+                print(f"Processing element {i}: {elem.get('Text', elem.get('text', 'Unknown'))}")
+                
+                # 首先檢查是否已有將座標轉換為 QRectF
+                if 'rect' in elem and elem['rect'] is not None:
+                    print(f"Using existing rect: {elem['rect']}")
+                    rect = elem['rect']
+                # 否則從原始座標創建
+                elif all(k in elem for k in ['X1', 'Y1', 'X2', 'Y2']):
+                    print(f"Creating rect from coordinates: X1={elem['X1']}, Y1={elem['Y1']}, X2={elem['X2']}, Y2={elem['Y2']}")
+                    rect = QRectF(
+                        elem['X1'],
+                        elem['Y1'],
+                        elem['X2'] - elem['X1'],
+                        elem['Y2'] - elem['Y1']
+                    )
+                # 兼容舊的 JSON 格式
+                elif 'coordinates' in elem and all(k in elem['coordinates'] for k in ['x1', 'y1', 'x2', 'y2']):
+                    coords = elem['coordinates']
+                    print(f"Creating rect from old format coordinates: {coords}")
+                    rect = QRectF(
+                        coords['x1'],
+                        coords['y1'],
+                        coords['x2'] - coords['x1'],
+                        coords['y2'] - coords['y1']
+                    )
+                else:
+                    print(f"No valid coordinates found for element {i}")
+                    continue
                     
+                # 兼容不同的屬性名稱
+                text = elem.get('Text', elem.get('text', ''))
+                category = elem.get('Category', elem.get('category', 'Word'))
+                audio_file = elem.get('English_Audio_File', elem.get('audioFile', ''))
+                
+                # 添加到元素列表
+                elements.append({
+                    'rect': rect,
+                    'text': text,
+                    'category': category,
+                    'audioFile': audio_file,
+                    'element_index': i,
+                    'id': elem.get('id', f"elem_{i}")  # 確保有唯一ID
+                })
+                print(f"Added element {i} to display list")
+                
             # 設置區域並更新顯示
             print(f"Setting {len(elements)} regions to display")
             self.main_window.image_viewer.set_regions(elements)
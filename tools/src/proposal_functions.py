@@ -0,0 +1,111 @@
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5.QtCore import QRectF, QTimer
+from src.utils.region_proposals import get_proposals
+
+# 候選框與既有文字框重疊超過此比例時不顯示
+EXISTING_OVERLAP_RATIO = 0.5
+
+class ProposalFunctions:
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.enabled = False
+        self.executor = None
+        self.futures = {}  # 圖片路徑 -> Future
+        self.results = {}  # 圖片路徑 -> 候選框
+
+        # 定期檢查背景計算是否完成
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(200)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def set_enabled(self, enabled):
+        """開啟或關閉自動偵測文字框"""
+        self.enabled = bool(enabled)
+        if self.enabled:
+            self.prefetch_volume()
+            self.refresh()
+        else:
+            self.main_window.image_viewer.set_proposals([])
+
+    def request(self, image_path):
+        """在背景行程中計算（或讀取快取）指定頁面的候選框"""
+        if not image_path or image_path in self.results or image_path in self.futures:
+            return
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=1)
+        self.futures[image_path] = self.executor.submit(get_proposals, image_path)
+        if not self.poll_timer.isActive():
+            self.poll_timer.start()
+
+    def prefetch_volume(self):
+        """依序排入整冊書的頁面，翻頁時可直接使用結果"""
+        book_data = self.main_window.book_data
+        if not book_data:
+            return
+        current = self.main_window.page_combo.currentIndex()
+        self.request(book_data.get_image_path(current))
+        for page_index in range(book_data.get_total_pages()):
+            self.request(book_data.get_image_path(page_index))
+
+    def poll(self):
+        """收集已完成的計算結果"""
+        updated = False
+        for image_path, future in list(self.futures.items()):
+            if not future.done():
+                continue
+            del self.futures[image_path]
+            try:
+                self.results[image_path] = future.result()
+                updated = True
+            except Exception as e:
+                print(f"Error computing proposals for {image_path}: {str(e)}")
+                self.results[image_path] = {'words': [], 'sentences': []}
+        if not self.futures:
+            self.poll_timer.stop()
+        if updated:
+            self.refresh()
+
+    def refresh(self):
+        """顯示目前頁面與類別的候選框（排除已有文字框的位置）"""
+        viewer = self.main_window.image_viewer
+        book_data = self.main_window.book_data
+        if not self.enabled or not book_data or self.main_window.tab_widget.currentIndex() != 1:
+            viewer.set_proposals([])
+            return
+
+        image_path = book_data.get_image_path(self.main_window.page_combo.currentIndex())
+        proposals = self.results.get(image_path)
+        if proposals is None:
+            viewer.set_proposals([])
+            self.request(image_path)
+            return
+
+        key = {'Word': 'words', 'Sentence': 'sentences'}.get(
+            self.main_window.add_mode.category_combo.currentText())
+        if key is None:
+            viewer.set_proposals([])
+            return
+
+        existing = [region['rect'] for region in viewer.regions
+                    if region.get('rect') is not None and not region.get('new_created', False)]
+        rects = []
+        for x1, y1, x2, y2 in proposals[key]:
+            rect = QRectF(x1, y1, x2 - x1, y2 - y1)
+            area = rect.width() * rect.height()
+            covered = False
+            for other in existing:
+                inter = rect.intersected(other)
+                if area > 0 and inter.width() * inter.height() >= EXISTING_OVERLAP_RATIO * area:
+                    covered = True
+                    break
+            if not covered:
+                rects.append(rect)
+        viewer.set_proposals(rects)
+
+    def shutdown(self):
+        """結束背景行程"""
+        self.poll_timer.stop()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.futures = {}
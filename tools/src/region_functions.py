@@ -1,8 +1,6 @@
 from datetime import datetime
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import QRectF
-import json
-import os
 
 class RegionFunctions:
     def __init__(self, main_window):
@@ -63,6 +61,47 @@ class RegionFunctions:
                 f'X2: {rect.x() + rect.width():.0f}, Y2: {rect.y() + rect.height():.0f}'
             )
             
+    def apply_region_rect(self, region):
+        """將文字框目前的位置寫回頁面元素與座標欄位陣列（自動保存使用），回傳是否有變更"""
+        element = self._write_region_rect(region)
+        if element is None:
+            return False
+        self.main_window.book_data.sync_coords([element])
+        return True
+        
+    def apply_region_rects(self, regions):
+        """將多個文字框的位置一次寫回頁面元素與座標欄位陣列，回傳有變更的數量"""
+        changed = [element for element in map(self._write_region_rect, regions) if element is not None]
+        if changed:
+            self.main_window.book_data.sync_coords(changed)
+        return len(changed)
+        
+    def _write_region_rect(self, region):
+        """將文字框位置寫入對應的頁面元素，回傳有變更的元素（無變更時為 None）"""
+        book_data = self.main_window.book_data
+        element_index = region.get('element_index') if region else None
+        if not book_data or element_index is None or region.get('rect') is None:
+            return None
+        page_keys = list(book_data.pages.keys())
+        current_page = self.main_window.page_combo.currentIndex()
+        if current_page < 0 or current_page >= len(page_keys):
+            return None
+        page = book_data.pages[page_keys[current_page]]
+        if element_index >= len(page):
+            return None
+        rect = region['rect']
+        coords = {
+            'X1': int(rect.x()),
+            'Y1': int(rect.y()),
+            'X2': int(rect.x() + rect.width()),
+            'Y2': int(rect.y() + rect.height()),
+        }
+        element = page[element_index]
+        if all(element.get(key) == value for key, value in coords.items()):
+            return None
+        element.update(coords)
+        return element
+        
     def save_changes(self):
         """保存變更"""
         if not self.main_window.book_data:
@@ -109,37 +148,11 @@ class RegionFunctions:
                 QMessageBox.information(self.main_window, "提示", "沒有需要保存的變更")
                 return False
                 
-            # 先备份原始数据
-            backup_path = self.main_window.book_data.json_path + '.bak'
+            # 在背景執行緒寫入 JSON（含版本歷史），完成後於狀態列顯示，失敗時以對話框回報
             try:
-                with open(self.main_window.book_data.json_path, 'r', encoding='utf-8') as f:
-                    original_data = json.load(f)
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    json.dump(original_data, f, ensure_ascii=False, indent=2)
-                print(f"Created backup at {backup_path}")
-            except Exception as e:
-                print(f"Could not create backup: {str(e)}")
-            
-            # 处理元素，移除不能序列化的对象
-            data_to_save = []
-            for elem in self.main_window.book_data.elements:
-                # 创建仅包含可序列化数据的副本
-                elem_copy = {}
-                for key, value in elem.items():
-                    # 跳过rect属性，它是QRectF对象，不能被序列化
-                    if key != 'rect':
-                        elem_copy[key] = value
-                data_to_save.append(elem_copy)
-            
-            # 将更改保存到JSON文件
-            try:
-                with open(self.main_window.book_data.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(data_to_save, f, ensure_ascii=False, indent=2)
+                self.main_window.autosave_functions.save_now()
                 
-                print(f"Saved changes to {self.main_window.book_data.json_path}")
-                
-                # 更新数据引用
-                self.main_window.book_data.elements = data_to_save
+                # 保留原本的元素物件（與 pages 共用），不以序列化副本取代
                 
                 # 重要：同時更新rect屬性，以確保顯示一致性
                 for i, element in enumerate(self.main_window.book_data.elements):
@@ -151,6 +164,12 @@ class RegionFunctions:
                             element['Y2'] - element['Y1']
                         )
                 
+                # 重建座標欄位陣列，並一次驗證整本書的座標範圍
+                self.main_window.book_data.refresh_coord_store()
+                invalid_elements = self.main_window.book_data.validate_coordinates()
+                for elem in invalid_elements:
+                    print(f"Warning: coordinates out of bounds for {elem.get('Text', 'Unknown')} on {elem.get('Image', '')}")
+                
                 # 重要：更新頁面数据中的 rect 属性，确保翻页后回来还能看到更新后的位置
                 # 获取当前页面的数据并更新
                 page_keys = list(self.main_window.book_data.pages.keys())
@@ -184,13 +203,6 @@ class RegionFunctions:
                 
             except Exception as e:
                 print(f"Error saving JSON: {str(e)}")
-                # 如果保存失败且有备份，恢复原始文件
-                if os.path.exists(backup_path):
-                    try:
-                        os.replace(backup_path, self.main_window.book_data.json_path)
-                        print(f"Restored from backup {backup_path}")
-                    except Exception as restore_error:
-                        print(f"Error restoring from backup: {str(restore_error)}")
                 QMessageBox.critical(self.main_window, "錯誤", f"保存時發生錯誤：{str(e)}")
                 return False
                 
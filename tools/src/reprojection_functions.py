@@ -0,0 +1,78 @@
+import os
+import shutil
+from PyQt5.QtWidgets import QApplication, QFileDialog, QMessageBox
+from PyQt5.QtCore import Qt, QRectF
+from src.utils.reprojection import estimate_transform, preview_boxes
+
+class ReprojectionFunctions:
+    def __init__(self, main_window):
+        self.main_window = main_window
+
+    def reproject_page(self):
+        """以新掃描檔重新投影目前頁面的所有文字框"""
+        book_data = self.main_window.book_data
+        if not book_data:
+            print("No book data loaded")
+            return
+
+        page_index = self.main_window.page_combo.currentIndex()
+        old_image_path = book_data.get_image_path(page_index)
+        if not old_image_path or not os.path.exists(old_image_path):
+            QMessageBox.warning(self.main_window, "錯誤", "找不到目前頁面的圖片")
+            return
+
+        new_image_path, _ = QFileDialog.getOpenFileName(
+            self.main_window,
+            "選擇新的掃描檔",
+            os.path.dirname(old_image_path),
+            "Images (*.jpg *.jpeg *.png)"
+        )
+        if not new_image_path:
+            return
+
+        # 估計新舊圖片之間的轉換
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            matrix, score = estimate_transform(old_image_path, new_image_path)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self.main_window, "錯誤", f"估計轉換時發生錯誤：{str(e)}")
+            return
+        QApplication.restoreOverrideCursor()
+        print(f"Estimated transform for page {page_index}: {matrix.tolist()}, score={score:.3f}")
+
+        # 在新圖片上預覽轉換後的文字框
+        rows, boxes = preview_boxes(book_data.coord_store, page_index, matrix)
+        viewer = self.main_window.image_viewer
+        viewer.load_image(new_image_path)
+        viewer.selected_region = None
+        viewer.set_regions([])
+        viewer.set_overlay('reprojection', [
+            QRectF(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in boxes.tolist()
+        ], Qt.darkYellow)
+
+        reply = QMessageBox.question(
+            self.main_window,
+            "重新投影預覽",
+            f"縮放: {matrix[0, 0]:.4f} x {matrix[1, 1]:.4f}\n"
+            f"平移: {matrix[0, 2]:.1f}, {matrix[1, 2]:.1f}\n"
+            f"信心分數: {score:.2f}\n\n"
+            f"套用新座標（{len(rows)} 個文字框）並以新掃描檔取代頁面圖片？",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        viewer.clear_overlay('reprojection')
+
+        if reply == QMessageBox.Yes:
+            try:
+                book_data.transform_page_coords(page_index, matrix)
+                if os.path.normpath(new_image_path) != os.path.normpath(old_image_path):
+                    shutil.copy2(new_image_path, old_image_path)
+                    # 頁面圖片已取代，尺寸需重新讀取
+                    book_data.invalidate_page_sizes()
+                # 經由背景保存寫入，變更的頁面以內容比對記錄到版本歷史
+                self.main_window.autosave_functions.save_now()
+            except Exception as e:
+                QMessageBox.critical(self.main_window, "錯誤", f"套用重新投影時發生錯誤：{str(e)}")
+
+        # 重新載入頁面以顯示結果
+        self.main_window.loadPage(page_index)
@@ -0,0 +1,82 @@
+from PyQt5.QtWidgets import QListWidgetItem
+from PyQt5.QtCore import Qt
+from src.utils.search_index import SearchIndex
+
+class SearchFunctions:
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.index = SearchIndex()
+        self.books = {}  # book_id -> BookData（本次執行載入過的書籍）
+        self.hits = []
+
+    def add_book(self, book_data):
+        """載入書籍後建立（或重建）該書的索引"""
+        self.books[book_data.book_id] = book_data
+        self.index.add_book(book_data)
+        self.search(self.main_window.search_input.text())
+
+    def sync(self):
+        """資料變更後，增量更新目前書籍的索引（新增 / 刪除 / 文字變更的元素）"""
+        book_data = self.main_window.book_data
+        if not book_data or book_data.book_id not in self.books:
+            return
+        volume = book_data.book_id
+        current = {id(elem): elem for elem in book_data.elements}
+        indexed = {id(elem): elem for doc_volume, elem in self.index.documents.values() if doc_volume == volume}
+        for key, elem in indexed.items():
+            if key not in current:
+                self.index.remove_element(elem)
+        page_order = {image: index for index, image in enumerate(book_data.pages)}
+        for position, elem in enumerate(book_data.elements):
+            if id(elem) in indexed:
+                self.index.update_element(elem)
+            else:
+                self.index.add_element(volume, elem, (volume, page_order.get(elem.get('Image'), -1), position))
+        self.search(self.main_window.search_input.text())
+
+    def search(self, query):
+        """搜尋並更新結果列表"""
+        result_list = self.main_window.search_results
+        result_list.clear()
+        self.hits = self.index.search(query) if query.strip() else []
+        for row, hit in enumerate(self.hits):
+            book_data = self.books[hit.volume]
+            page_index = list(book_data.pages).index(hit.image) if hit.image in book_data.pages else -1
+            text = hit.element.get('Text', hit.element.get('text', ''))
+            translation = hit.element.get('中文翻譯', '')
+            item = QListWidgetItem(f"{hit.volume} 第 {page_index + 1} 頁 [{hit.element.get('Category', '')}] "
+                                   f"{text} / {translation}")
+            item.setData(Qt.UserRole, row)
+            result_list.addItem(item)
+
+    def jump_to(self, item):
+        """切換到搜尋結果所在的書籍、頁面與類別，並選取該文字框"""
+        hit = self.hits[item.data(Qt.UserRole)]
+        book_data = self.books.get(hit.volume)
+        if not book_data or hit.image not in book_data.pages:
+            return
+        page_index = list(book_data.pages).index(hit.image)
+        page = book_data.pages[hit.image]
+        element_index = next((i for i, elem in enumerate(page) if elem is hit.element), None)
+        if element_index is None:
+            return
+
+        main_window = self.main_window
+        if main_window.book_data is not book_data:
+            # 其他書籍：重新開啟該書（元素順序與檔案相同）
+            if not main_window.openBook(book_data.json_path):
+                return
+        main_window.tab_widget.setCurrentIndex(0)
+        category = hit.element.get('Category', hit.element.get('category', ''))
+        if category and main_window.category_combo.currentText() != category:
+            main_window.category_combo.setCurrentText(category)
+        if main_window.page_combo.currentIndex() != page_index:
+            main_window.page_combo.setCurrentIndex(page_index)
+
+        viewer = main_window.image_viewer
+        region = next((region for region in viewer.regions if region.get('element_index') == element_index), None)
+        if region is None:
+            return
+        viewer.selected_region = region
+        viewer.center_on(region['rect'])
+        main_window.onRegionSelected(region)
@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QTimer
+from src.utils.ink_profile import InkIntegral
+
+class SnapFunctions:
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.enabled = False
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.image_path = None  # 目前背景建立中或已建立的頁面
+        self.ink_integral = None
+
+        # 定期檢查背景建立是否完成
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(100)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def set_enabled(self, enabled):
+        """開啟或關閉文字框邊緣吸附"""
+        self.enabled = bool(enabled)
+        self.main_window.image_viewer.snap_enabled = self.enabled
+        if self.enabled:
+            self.refresh()
+
+    def refresh(self):
+        """頁面載入後，在背景執行緒建立目前頁面的墨跡積分影像"""
+        viewer = self.main_window.image_viewer
+        book_data = self.main_window.book_data
+        if not self.enabled or not book_data:
+            return
+
+        image_path = book_data.get_image_path(self.main_window.page_combo.currentIndex())
+        if image_path == self.image_path:
+            # 同一頁重新載入時直接沿用
+            if self.ink_integral is not None:
+                viewer.set_ink_integral(self.ink_integral)
+            return
+
+        self.image_path = image_path
+        self.ink_integral = None
+        viewer.set_ink_integral(None)
+        if not image_path:
+            return
+        self.future = self.executor.submit(InkIntegral.from_image, image_path)
+        self.poll_timer.start()
+
+    def poll(self):
+        """取得背景建立的結果（若頁面已切換則捨棄）"""
+        if self.future is None or not self.future.done():
+            return
+        self.poll_timer.stop()
+        future, self.future = self.future, None
+        try:
+            ink_integral = future.result()
+        except Exception as e:
+            print(f"Error building ink profile: {str(e)}")
+            self.image_path = None
+            return
+
+        book_data = self.main_window.book_data
+        current_path = book_data.get_image_path(self.main_window.page_combo.currentIndex()) if book_data else None
+        if current_path != self.image_path:
+            # 建立期間已換頁，改為建立新頁面
+            self.image_path = None
+            self.refresh()
+            return
+        self.ink_integral = ink_integral
+        self.main_window.image_viewer.set_ink_integral(ink_integral)
+
+    def shutdown(self):
+        """結束背景執行緒"""
+        self.poll_timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,72 @@
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5.QtCore import QTimer
+from src.utils.thumbnails import cached_thumbnail, make_thumbnail
+
+class ThumbnailFunctions:
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.executor = None
+        self.futures = {}  # 頁面索引 -> Future
+
+        # 定期檢查背景產生是否完成
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(200)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def load_volume(self):
+        """建立目前書籍的縮圖列：已快取者立即顯示，其餘在行程池中產生"""
+        book_data = self.main_window.book_data
+        strip = self.main_window.thumbnail_strip
+        self.cancel()
+        if not book_data:
+            strip.set_pages([])
+            return
+
+        total_pages = book_data.get_total_pages()
+        strip.set_pages([f"第 {i + 1} 頁" for i in range(total_pages)])
+        missing = []
+        for page_index in range(total_pages):
+            image_path = book_data.get_image_path(page_index)
+            if not image_path:
+                continue
+            path = cached_thumbnail(image_path)
+            if path:
+                strip.set_thumbnail(page_index, path)
+            else:
+                missing.append((page_index, image_path))
+
+        if missing:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor()
+            for page_index, image_path in missing:
+                self.futures[page_index] = self.executor.submit(make_thumbnail, image_path)
+            self.poll_timer.start()
+        print(f"Thumbnails: {total_pages - len(missing)} cached, {len(missing)} generating")
+        strip.set_current_page(self.main_window.page_combo.currentIndex())
+
+    def poll(self):
+        """將已完成的縮圖加入縮圖列"""
+        for page_index, future in list(self.futures.items()):
+            if not future.done():
+                continue
+            del self.futures[page_index]
+            try:
+                self.main_window.thumbnail_strip.set_thumbnail(page_index, future.result())
+            except Exception as e:
+                print(f"Error generating thumbnail for page {page_index}: {str(e)}")
+        if not self.futures:
+            self.poll_timer.stop()
+
+    def cancel(self):
+        """取消尚未完成的縮圖工作"""
+        for future in self.futures.values():
+            future.cancel()
+        self.futures = {}
+        self.poll_timer.stop()
+
+    def shutdown(self):
+        """結束背景行程"""
+        self.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
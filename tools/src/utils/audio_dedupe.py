@@ -0,0 +1,260 @@
+"""書籍音檔的去重與孤兒檔案清理
+
+以內容雜湊索引 <音檔根目錄>/<en|zh>/<book_id>/ 中的所有音檔，並對照書籍 JSON 的
+English_Audio_File / Chinese_Audio_File 引用，列出：
+- 重複：同一目錄中內容完全相同的多個檔案（引用次數最多的檔名為代表）
+- 孤兒：沒有任何元素引用的檔案
+- 缺少：有引用但不存在的檔案
+
+--consolidate 會將引用改寫為代表檔名並移除其餘重複檔案，--prune 會移除孤兒檔案。
+移除的檔案一律移到 tools/.audio_trash/<時間>/ 並寫入清單，可以 --restore 還原；
+書籍 JSON 以原子替換寫入並記錄到版本歷史。只處理有提供書籍 JSON 的目錄。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.audio_dedupe ../assets/audio ../assets/Book_data/V1_book_data.json ../assets/Book_data/V2_book_data.json
+    python -m src.utils.audio_dedupe ../assets/audio ../assets/Book_data/V1_book_data.json --consolidate --prune
+    python -m src.utils.audio_dedupe --restore .audio_trash/20250101-120000/manifest.json
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+from datetime import datetime
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from src.utils import json_codec
+from src.utils.file_hash import file_digest
+from src.utils.version_store import VersionStore
+from src.utils.element_query import AUDIO_FIELDS
+from src.utils.audio_import import AUDIO_EXTENSIONS, format_size
+
+# 移除的音檔暫存位置：tools/.audio_trash
+TRASH_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    '.audio_trash'
+)
+MANIFEST_NAME = 'manifest.json'
+
+
+def book_id_for(json_path):
+    """與 BookData 相同，從檔名取得 book_id"""
+    return os.path.basename(json_path).split('_')[0]
+
+
+@dataclass
+class AudioReport:
+    """單一音檔目錄的分析結果"""
+    language: str
+    book_id: str
+    directory: str
+    files: Dict[str, tuple] = field(default_factory=dict)  # 檔名 -> (大小, 雜湊)
+    references: Dict[str, int] = field(default_factory=dict)  # 檔名 -> 引用次數
+    duplicates: List[List[str]] = field(default_factory=list)  # 每組第一個為代表檔名
+    orphans: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
+    def duplicate_bytes(self):
+        return sum(self.files[name][0] for group in self.duplicates for name in group[1:])
+
+    def orphan_bytes(self):
+        # 同時是重複檔案的孤兒只計算一次
+        duplicated = {name for group in self.duplicates for name in group[1:]}
+        return sum(self.files[name][0] for name in self.orphans if name not in duplicated)
+
+    def total_bytes(self):
+        return sum(size for size, _ in self.files.values())
+
+
+def collect_references(books):
+    """{(語言, book_id): {檔名: 引用次數}}"""
+    references = {}
+    for json_path, elements in books.items():
+        book_id = book_id_for(json_path)
+        for language in AUDIO_FIELDS.values():
+            references.setdefault((language, book_id), {})
+        for elem in elements:
+            for audio_field, language in AUDIO_FIELDS.items():
+                name = elem.get(audio_field)
+                if name:
+                    counts = references[(language, book_id)]
+                    counts[name] = counts.get(name, 0) + 1
+    return references
+
+
+def index_directory(directory, workers=None):
+    """{檔名: (大小, 內容雜湊)}（以執行緒池計算雜湊）"""
+    try:
+        names = sorted(entry.name for entry in os.scandir(directory)
+                       if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS))
+    except OSError:
+        return {}
+    paths = [os.path.join(directory, name) for name in names]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = list(executor.map(file_digest, paths))
+    return {name: (os.path.getsize(path), digest) for name, path, digest in zip(names, paths, digests)}
+
+
+def canonical_order(names, references):
+    """代表檔名優先：引用次數多、檔名短、字母順序"""
+    return sorted(names, key=lambda name: (-references.get(name, 0), len(name), name))
+
+
+def analyze(audio_root, books, workers=None):
+    """分析所有提供書籍的音檔目錄，回傳 AudioReport 列表"""
+    reports = []
+    for (language, book_id), references in collect_references(books).items():
+        directory = os.path.join(audio_root, language, book_id)
+        report = AudioReport(language, book_id, directory, index_directory(directory, workers), references)
+        groups = {}
+        for name, (size, digest) in report.files.items():
+            groups.setdefault((size, digest), []).append(name)
+        report.duplicates = sorted(canonical_order(names, references)
+                                   for names in groups.values() if len(names) > 1)
+        report.orphans = [name for name in report.files if name not in references]
+        report.missing = sorted(name for name in references if name not in report.files)
+        reports.append(report)
+    return reports
+
+
+def format_report(reports, verbose=False):
+    lines = []
+    total = duplicate = orphan = 0
+    for report in reports:
+        total += report.total_bytes()
+        duplicate += report.duplicate_bytes()
+        orphan += report.orphan_bytes()
+        lines.append(f"{report.language}/{report.book_id}: {len(report.files)} files "
+                     f"({format_size(report.total_bytes())}), {len(report.references)} referenced, "
+                     f"{sum(len(group) - 1 for group in report.duplicates)} duplicates "
+                     f"({format_size(report.duplicate_bytes())}), {len(report.orphans)} orphans "
+                     f"({format_size(report.orphan_bytes())}), {len(report.missing)} missing")
+        if verbose:
+            for group in report.duplicates:
+                lines.append(f"  duplicate: {group[0]} <- {', '.join(group[1:])}")
+            for name in report.orphans:
+                lines.append(f"  orphan: {name}")
+            for name in report.missing:
+                lines.append(f"  missing: {name}")
+    lines.append(f"Total {format_size(total)}, reclaimable {format_size(duplicate + orphan)} "
+                 f"(duplicates {format_size(duplicate)}, orphans {format_size(orphan)})")
+    return '\n'.join(lines)
+
+
+def consolidate(reports, books):
+    """將重複檔案的引用改寫為代表檔名，回傳 (有變更的 JSON 路徑集合, {(語言, book_id): 不再使用的檔名})"""
+    renames = {}
+    for report in reports:
+        mapping = {name: group[0] for group in report.duplicates for name in group[1:]}
+        if mapping:
+            renames[(report.language, report.book_id)] = mapping
+    changed = set()
+    for json_path, elements in books.items():
+        book_id = book_id_for(json_path)
+        for elem in elements:
+            for audio_field, language in AUDIO_FIELDS.items():
+                mapping = renames.get((language, book_id), {})
+                if elem.get(audio_field) in mapping:
+                    elem[audio_field] = mapping[elem[audio_field]]
+                    changed.add(json_path)
+    return changed, {key: sorted(mapping) for key, mapping in renames.items()}
+
+
+def write_book(json_path, elements, label):
+    """以原子替換寫入書籍 JSON，並記錄寫入前後的版本"""
+    store = VersionStore(json_path)
+    if store.head() is None and os.path.exists(json_path):
+        store.commit(json_codec.load(json_path), '原始檔案')
+    temp_path = json_path + '.tmp'
+    json_codec.dump(elements, temp_path)
+    os.replace(temp_path, json_path)
+    store.commit(elements, label)
+
+
+def move_to_trash(audio_root, files, trash_dir):
+    """將檔案移到垃圾目錄（保留 語言/book_id 結構）並寫入還原清單，回傳移動的數量"""
+    moved = []
+    for (language, book_id), names in files.items():
+        for name in names:
+            source = os.path.join(audio_root, language, book_id, name)
+            if not os.path.exists(source):
+                continue
+            target = os.path.join(trash_dir, language, book_id, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(source, target)
+            moved.append({'from': os.path.abspath(source), 'to': os.path.abspath(target)})
+    if moved:
+        manifest_path = os.path.join(trash_dir, MANIFEST_NAME)
+        previous = []
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(previous + moved, f, ensure_ascii=False, indent=2)
+    return len(moved)
+
+
+def restore(manifest_path):
+    """依清單將移除的檔案移回原位置（原位置已有檔案時略過），回傳還原的數量"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        moved = json.load(f)
+    restored = 0
+    for entry in moved:
+        if os.path.exists(entry['to']) and not os.path.exists(entry['from']):
+            os.makedirs(os.path.dirname(entry['from']), exist_ok=True)
+            shutil.move(entry['to'], entry['from'])
+            restored += 1
+    return restored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='書籍音檔的去重與孤兒檔案清理')
+    parser.add_argument('audio_root', nargs='?', help='音檔根目錄（包含 en / zh 子目錄）')
+    parser.add_argument('json_paths', nargs='*', help='書籍 JSON 檔案')
+    parser.add_argument('--consolidate', action='store_true', help='改寫重複音檔的引用並移除多餘的檔案')
+    parser.add_argument('--prune', action='store_true', help='移除沒有被引用的音檔')
+    parser.add_argument('--trash', default=None, help='移除檔案的存放目錄（預設 tools/.audio_trash/<時間>）')
+    parser.add_argument('--restore', metavar='MANIFEST', default=None, help='依清單還原移除的檔案')
+    parser.add_argument('--verbose', action='store_true', help='列出每個重複 / 孤兒 / 缺少的檔案')
+    parser.add_argument('--workers', type=int, default=None, help='計算雜湊的執行緒數量')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.restore:
+            print(f"Restored {restore(args.restore)} files")
+            return 0
+        if not args.audio_root or not args.json_paths:
+            parser.error('需要音檔根目錄與至少一個書籍 JSON')
+
+        books = {json_path: json_codec.load(json_path) for json_path in args.json_paths}
+        reports = analyze(args.audio_root, books, args.workers)
+        print(format_report(reports, args.verbose))
+        if not args.consolidate and not args.prune:
+            return 0
+
+        trash_dir = args.trash or os.path.join(TRASH_ROOT, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        removed = {}
+        if args.consolidate:
+            changed, unused = consolidate(reports, books)
+            # 先寫入改寫後的 JSON，成功後才移除檔案
+            for json_path in sorted(changed):
+                write_book(json_path, books[json_path], '音檔去重')
+                print(f"Rewrote audio references in {json_path}")
+            for key, names in unused.items():
+                removed.setdefault(key, set()).update(names)
+        if args.prune:
+            for report in reports:
+                removed.setdefault((report.language, report.book_id), set()).update(report.orphans)
+        count = move_to_trash(args.audio_root, {key: sorted(names) for key, names in removed.items()}, trash_dir)
+        if count:
+            print(f"Moved {count} files to {trash_dir} (restore with --restore "
+                  f"{os.path.join(trash_dir, MANIFEST_NAME)})")
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""以內容雜湊去重的音檔匯入
+
+將音檔匯入書籍的音檔目錄前，先以檔案大小篩選、再以內容雜湊比對目錄中既有的音檔：
+- 目標檔名已是相同內容：略過
+- 目錄中已有相同內容的其他檔案：建立硬連結（不佔額外空間，檔案系統不支援時才複製），
+  或選擇沿用既有檔名（reference），由呼叫端改寫元素的音檔欄位
+- 其他情況：複製
+
+檔案皆先寫到暫存檔再原子替換，不會就地改寫與其他檔名共用的硬連結內容。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.audio_import D:/click_to_read/assets/audio/en/V1 新音檔/*.mp3 [--reference]
+"""
+import os
+import sys
+import shutil
+import argparse
+from dataclasses import dataclass
+from src.utils.file_hash import file_digest
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.opus')
+# 摘要中各動作的名稱
+ACTION_LABELS = {'copied': '複製', 'linked': '硬連結', 'reused': '沿用既有', 'skipped': '略過'}
+
+
+@dataclass
+class ImportResult:
+    """單一音檔的匯入結果"""
+    source: str
+    name: str  # 元素應使用的音檔名稱（reference 時為既有檔名）
+    action: str  # 'copied'、'linked'、'reused' 或 'skipped'
+    saved_bytes: int  # 因去重而未寫入的位元組數（只有 'linked' 與 'reused' 會大於 0）
+
+
+class AudioLibrary:
+    """目錄中既有音檔的內容索引（依大小分組，只在大小相同時才計算雜湊）"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sizes = None  # 檔名 -> 大小（第一次使用時掃描）
+        self.by_size = {}  # 大小 -> 檔名集合
+        self.hashes = {}  # 檔名 -> 內容雜湊
+
+    def _scan(self):
+        if self.sizes is not None:
+            return
+        self.sizes = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                self._set(entry.name, entry.stat().st_size)
+
+    def _set(self, name, size, digest=None):
+        old_size = self.sizes.get(name)
+        if old_size is not None:
+            self.by_size.get(old_size, set()).discard(name)
+        self.sizes[name] = size
+        self.by_size.setdefault(size, set()).add(name)
+        if digest:
+            self.hashes[name] = digest
+        else:
+            self.hashes.pop(name, None)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def digest(self, name):
+        if name not in self.hashes:
+            self.hashes[name] = file_digest(self.path(name))
+        return self.hashes[name]
+
+    def contains(self, name):
+        self._scan()
+        return name in self.sizes
+
+    def find(self, digest, size, exclude=None):
+        """回傳內容相同的既有檔名，沒有時回傳 None"""
+        self._scan()
+        for name in sorted(self.by_size.get(size, ())):
+            if name != exclude and self.digest(name) == digest:
+                return name
+        return None
+
+    def add(self, name, size, digest):
+        self._scan()
+        self._set(name, size, digest)
+
+
+def _replace_with(target, write):
+    """以暫存檔寫入後原子替換目標檔案"""
+    temp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        write(temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def import_audio(source, name, library, reference=False):
+    """將一個音檔匯入 library 的目錄，回傳 ImportResult"""
+    size = os.path.getsize(source)
+    target = library.path(name)
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return ImportResult(source, name, 'skipped', 0)
+
+    digest = file_digest(source)
+    if library.contains(name) and library.digest(name) == digest:
+        # 目標已是相同內容，沒有因去重而少寫入的空間
+        return ImportResult(source, name, 'skipped', 0)
+
+    existing = library.find(digest, size, exclude=name)
+    if existing and reference:
+        return ImportResult(source, existing, 'reused', size)
+
+    os.makedirs(library.directory, exist_ok=True)
+    action, saved = 'copied', 0
+    if existing:
+        try:
+            _replace_with(target, lambda temp_path: os.link(library.path(existing), temp_path))
+            action, saved = 'linked', size
+        except OSError:
+            # 檔案系統不支援硬連結（例如 FAT / 跨磁碟），改為複製
+            pass
+    if action == 'copied':
+        _replace_with(target, lambda temp_path: shutil.copy2(source, temp_path))
+    library.add(name, size, digest)
+    return ImportResult(source, name, action, saved)
+
+
+def format_size(size):
+    return f"{size / (1024 * 1024):.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.1f} KB"
+
+
+def summarize(results):
+    """匯入結果摘要：各動作數量與節省的空間"""
+    counts = {}
+    for result in results:
+        counts[result.action] = counts.get(result.action, 0) + 1
+    actions = '、'.join(f"{ACTION_LABELS[action]} {count}" for action, count in counts.items())
+    saved = sum(result.saved_bytes for result in results)
+    return f"{len(results)} 個音檔（{actions or '無'}），節省 {format_size(saved)}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='以內容雜湊去重匯入音檔')
+    parser.add_argument('target_dir', help='書籍的音檔目錄')
+    parser.add_argument('sources', nargs='+', help='要匯入的音檔')
+    parser.add_argument('--reference', action='store_true',
+                        help='已有相同內容的檔案時沿用既有檔名，不建立新檔名')
+    args = parser.parse_args(argv)
+
+    library = AudioLibrary(args.target_dir)
+    results = []
+    for source in args.sources:
+        try:
+            result = import_audio(source, os.path.basename(source), library, args.reference)
+        except OSError as e:
+            print(f"Error importing {source}: {str(e)}")
+            continue
+        results.append(result)
+        suffix = f" -> {result.name}" if result.name != os.path.basename(source) else ''
+        print(f"{result.action:>7}  {source}{suffix}")
+    print(summarize(results))
+    return 0 if len(results) == len(args.sources) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""將每頁引用的音檔合併成音檔精靈圖 (audio sprite)
+
+每頁每種語言輸出一個 MP3，片段之間以短暫靜音分隔；匯出的書籍 JSON 中
+每個元素新增 <語言>_Audio_Sprite 欄位（檔名與起訖秒數），網頁閱讀器一頁只需下載一次音檔。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.audio_sprite ../assets/Book_data/V1_book_data.json ../assets/audio 輸出目錄
+
+輸出結構：
+    <輸出目錄>/audio/sprites/<book_id>/<頁面>_en.mp3
+    <輸出目錄>/<book_id>_book_data.json
+"""
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import soundfile as sf
+
+# 元素中的音檔欄位、語言目錄與輸出欄位
+SPRITE_FIELDS = {
+    'English_Audio_File': ('en', 'English_Audio_Sprite'),
+    'Chinese_Audio_File': ('zh', 'Chinese_Audio_Sprite'),
+}
+SAMPLE_RATE = 44100
+# 片段前後的靜音長度（秒），同時吸收 MP3 編碼延遲
+SILENCE_GAP = 0.25
+
+
+def read_mono(path, sample_rate=SAMPLE_RATE):
+    """讀取音檔為單聲道 float32，取樣率不同時以線性內插轉換"""
+    data, rate = sf.read(path, dtype='float32', always_2d=True)
+    data = data.mean(axis=1)
+    if rate != sample_rate and len(data):
+        positions = np.arange(int(len(data) * sample_rate / rate)) * (rate / sample_rate)
+        data = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+    return data
+
+
+def pack_sprite(job):
+    """合併單頁單語言的片段並輸出 MP3，回傳 {檔名: (開始秒數, 結束秒數)}（供行程池使用）"""
+    clip_paths, output_path = job
+    gap = np.zeros(int(SILENCE_GAP * SAMPLE_RATE), dtype=np.float32)
+    parts = [gap]
+    offsets = {}
+    position = len(gap)
+    for name, path in clip_paths:
+        clip = read_mono(path)
+        offsets[name] = (round(position / SAMPLE_RATE, 3), round((position + len(clip)) / SAMPLE_RATE, 3))
+        parts.extend((clip, gap))
+        position += len(clip) + len(gap)
+
+    temp_path = f"{output_path}.tmp"
+    sf.write(temp_path, np.concatenate(parts), SAMPLE_RATE, format='MP3', subtype='MPEG_LAYER_III')
+    os.replace(temp_path, output_path)
+    return offsets
+
+
+def build_sprites(book_data, audio_root, output_dir, workers=None):
+    """輸出整本書的頁面音檔精靈圖與改寫後的書籍 JSON，回傳匯出的元素列表"""
+    sprite_dir = os.path.join(output_dir, 'audio', 'sprites', book_data.book_id)
+    os.makedirs(sprite_dir, exist_ok=True)
+
+    # 每頁每種語言一個工作，同一頁重複引用的音檔只放一次
+    jobs = []
+    for image_name, page in book_data.pages.items():
+        stem = os.path.splitext(image_name)[0]
+        for field, (language, _) in SPRITE_FIELDS.items():
+            clips = {}
+            for elem in page:
+                name = elem.get(field)
+                if not name or name in clips:
+                    continue
+                path = os.path.join(audio_root, language, book_data.book_id, name)
+                if os.path.exists(path):
+                    clips[name] = path
+                else:
+                    print(f"Missing audio file: {path}")
+            if clips:
+                sprite_name = f"{stem}_{language}.mp3"
+                jobs.append(((image_name, field, sprite_name),
+                             (list(clips.items()), os.path.join(sprite_dir, sprite_name))))
+
+    # 單頁合併失敗時只略過該頁該語言，其元素不加上精靈圖欄位
+    offsets = {}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(key, executor.submit(pack_sprite, job)) for key, job in jobs]
+        for (image_name, field, sprite_name), future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error packing {image_name} ({SPRITE_FIELDS[field][0]}): {str(e)}")
+                failed += 1
+                continue
+            offsets[(image_name, field)] = (sprite_name, result)
+            print(f"{sprite_name}: {len(result)} clips")
+
+    elements = book_data.serializable_elements()
+    for elem in elements:
+        for field, (_, sprite_field) in SPRITE_FIELDS.items():
+            sprite = offsets.get((elem.get('Image'), field))
+            if sprite and elem.get(field) in sprite[1]:
+                start, end = sprite[1][elem[field]]
+                elem[sprite_field] = {'file': sprite[0], 'start': start, 'end': end}
+
+    json_path = os.path.join(output_dir, f"{book_data.book_id}_book_data.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(elements, f, ensure_ascii=False, indent=2)
+    print(f"Packed {len(offsets)} sprites into {sprite_dir} ({failed} failed)")
+    return elements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='將每頁音檔合併成音檔精靈圖')
+    parser.add_argument('json_path', help='書籍 JSON 檔案')
+    parser.add_argument('audio_root', help='音檔根目錄（包含 en / zh 子目錄）')
+    parser.add_argument('output_dir', help='輸出目錄')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    args = parser.parse_args(argv)
+
+    from src.utils.book_data import BookData
+    book_data = BookData(args.json_path)
+    if not book_data.load():
+        return 1
+    build_sprites(book_data, args.audio_root, args.output_dir, args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""將書籍音檔轉成網頁用的低位元率格式
+
+以本機安裝的 ffmpeg 轉檔（Opus 或 AAC、單聲道），以執行緒池同時執行多個
+ffmpeg 行程。轉檔結果以「來源內容雜湊 + 格式」快取，重新執行時只處理有變更的音檔，
+並輸出音檔欄位已改寫的書籍 JSON 副本。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.audio_transcode ../assets/Book_data/V1_book_data.json ../assets/audio 輸出目錄 [--format aac]
+
+輸出結構：
+    <輸出目錄>/audio/en/<book_id>/*.m4a
+    <輸出目錄>/audio/zh/<book_id>/*.m4a
+    <輸出目錄>/<book_id>_book_data.json
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.file_hash import file_digest
+from src.utils.disk_cache import DiskCache
+
+# 元素中的音檔欄位與其語言目錄
+AUDIO_FIELDS = {
+    'English_Audio_File': 'en',
+    'Chinese_Audio_File': 'zh',
+}
+
+# 輸出格式：副檔名與 ffmpeg 編碼參數
+PRESETS = {
+    'opus': {'ext': '.opus', 'args': ['-c:a', 'libopus', '-b:a', '24k', '-vbr', 'on', '-application', 'voip']},
+    'aac': {'ext': '.m4a', 'args': ['-c:a', 'aac', '-b:a', '48k', '-movflags', '+faststart']},
+}
+# 編碼參數變更時遞增，使舊快取失效
+TRANSCODE_VERSION = 1
+
+
+def find_encoder():
+    """尋找本機的 ffmpeg，找不到時回傳 None"""
+    return shutil.which('ffmpeg')
+
+
+def transcode_clip(encoder, source_path, preset, cache):
+    """轉檔單一音檔（有快取時直接使用），回傳快取中的輸出檔路徑"""
+    settings = PRESETS[preset]
+    key = f"{file_digest(source_path)}_{preset}_v{TRANSCODE_VERSION}"
+    output_path = cache.path_for(key, settings['ext'])
+    if os.path.exists(output_path):
+        return output_path, False
+
+    temp_path = f"{output_path}.{os.getpid()}.tmp{settings['ext']}"
+    command = [encoder, '-hide_banner', '-loglevel', 'error', '-y',
+               '-i', source_path, '-vn', '-ac', '1', *settings['args'], temp_path]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise RuntimeError(result.stderr.strip() or f"ffmpeg exited with {result.returncode}")
+    os.replace(temp_path, output_path)
+    return output_path, True
+
+
+def collect_clips(book_data, audio_root):
+    """列出書籍引用的音檔，回傳 {(語言, 檔名): 來源路徑}（找不到的音檔會略過）"""
+    clips = {}
+    for elem in book_data.elements:
+        for field, language in AUDIO_FIELDS.items():
+            name = elem.get(field)
+            if not name or (language, name) in clips:
+                continue
+            path = os.path.join(audio_root, language, book_data.book_id, name)
+            if os.path.exists(path):
+                clips[(language, name)] = path
+            else:
+                print(f"Missing audio file: {path}")
+    return clips
+
+
+def output_names(clips, ext):
+    """決定每個音檔的輸出檔名：一般只換副檔名，同目錄下會撞名的（如 a.mp3 與 a.wav）
+    保留原副檔名（a.mp3.m4a），仍重複時再加上編號"""
+    stems = {}
+    for language, name in clips:
+        stem = os.path.splitext(name)[0]
+        stems.setdefault((language, stem), []).append(name)
+
+    names = {}
+    used = set()
+    for (language, stem), sources in sorted(stems.items()):
+        for name in sorted(sources):
+            new_name = stem + ext if len(sources) == 1 else name + ext
+            base, count = os.path.splitext(new_name)[0], 1
+            while (language, new_name) in used:
+                new_name = f"{base}_{count}{ext}"
+                count += 1
+            used.add((language, new_name))
+            names[(language, name)] = new_name
+    return names
+
+
+def transcode_book(book_data, audio_root, output_dir, preset='aac', workers=None):
+    """轉檔整本書引用的音檔並輸出改寫後的書籍 JSON，回傳 {(語言, 原檔名): 新檔名}"""
+    encoder = find_encoder()
+    if encoder is None:
+        raise RuntimeError("找不到 ffmpeg，請先安裝並加入 PATH")
+    settings = PRESETS[preset]
+    cache = DiskCache('audio_transcode')
+    clips = collect_clips(book_data, audio_root)
+    new_names = output_names(clips, settings['ext'])
+
+    renamed = {}
+    converted = failed = 0
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {clip: executor.submit(transcode_clip, encoder, path, preset, cache)
+                   for clip, path in clips.items()}
+        for (language, name), future in futures.items():
+            try:
+                cached_path, fresh = future.result()
+            except Exception as e:
+                print(f"Error transcoding {language}/{name}: {str(e)}")
+                failed += 1
+                continue
+            converted += fresh
+            new_name = new_names[(language, name)]
+            target_dir = os.path.join(output_dir, 'audio', language, book_data.book_id)
+            os.makedirs(target_dir, exist_ok=True)
+            shutil.copyfile(cached_path, os.path.join(target_dir, new_name))
+            renamed[(language, name)] = new_name
+
+    # 改寫音檔欄位（轉檔失敗者保留原檔名）
+    elements = book_data.serializable_elements()
+    for elem in elements:
+        for field, language in AUDIO_FIELDS.items():
+            if (language, elem.get(field)) in renamed:
+                elem[field] = renamed[(language, elem[field])]
+    json_path = os.path.join(output_dir, f"{book_data.book_id}_book_data.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(elements, f, ensure_ascii=False, indent=2)
+
+    print(f"Transcoded {len(renamed)} clips to {preset} "
+          f"({converted} encoded, {len(renamed) - converted} cached, {failed} failed)")
+    return renamed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='將書籍音檔轉成網頁用的低位元率格式')
+    parser.add_argument('json_path', help='書籍 JSON 檔案')
+    parser.add_argument('audio_root', help='音檔根目錄（包含 en / zh 子目錄）')
+    parser.add_argument('output_dir', help='輸出目錄')
+    parser.add_argument('--format', choices=sorted(PRESETS), default='aac', help='輸出格式')
+    parser.add_argument('--workers', type=int, default=None, help='同時執行的 ffmpeg 數量')
+    args = parser.parse_args(argv)
+
+    from src.utils.book_data import BookData
+    book_data = BookData(args.json_path)
+    if not book_data.load():
+        return 1
+    try:
+        transcode_book(book_data, args.audio_root, args.output_dir, args.format, args.workers)
+    except RuntimeError as e:
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
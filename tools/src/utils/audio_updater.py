@@ -8,8 +8,10 @@ from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from PyQt5.QtMultimedia import QMediaPlayer
 
 class AudioUpdater:
-    def __init__(self, book_data):
+    def __init__(self, book_data, save=None):
         self.book_data = book_data
+        # 保存函式：預設直接寫入 JSON；編輯器傳入背景保存，以一併記錄版本歷史
+        self.save = save
         self.supported_formats = ['.wav', '.mp3', '.ogg']
         self.current_player = None
         self.update_callback = None
@@ -104,7 +106,9 @@ class AudioUpdater:
             
             # 8. 更新元素資訊並保存
             element['updateTime'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            if not self.book_data.save():
+            if self.save is not None:
+                self.save()
+            elif not self.book_data.save():
                 raise Exception("保存 JSON 檔案失敗")
             
             # 9. 執行回調並通知
@@ -1,7 +1,11 @@
-import json
 import os
 from datetime import datetime
+import numpy as np
+from PIL import Image
 from PyQt5.QtCore import QRectF
+from src.utils.coord_store import CoordinateStore
+from src.utils.element_query import ElementIndex, AUDIO_FIELDS
+from src.utils import json_codec
 
 class BookData:
     def __init__(self, json_path):
@@ -11,13 +15,17 @@ class BookData:
         self.base_dir = "D:/click_to_read"  # 基礎目錄
         self.book_id = os.path.basename(json_path).split('_')[0]  # 從檔名取得 book_id
         self.elements = []  # 儲存所有元素
+        self.coord_store = None  # 座標欄位陣列（與 elements 同序）
+        self._page_sizes = None  # 頁面圖片尺寸快取
+        self._page_size_keys = None  # 建立尺寸快取時的頁面列表
+        self._element_index = None  # 元素查詢索引（隨座標欄位陣列重建）
         
     def load(self):
         """載入 JSON 檔案"""
         try:
             print(f"Loading JSON file: {self.json_path}")
-            with open(self.json_path, 'r', encoding='utf-8') as f:
-                self.elements = json.load(f)
+            with open(self.json_path, 'rb') as f:
+                self.elements = json_codec.loads(f.read())
                 # 建立頁面索引
                 self.pages = {}
                 print(f"Total elements: {len(self.elements)}")
@@ -46,6 +54,7 @@ class BookData:
                     
                     self.pages[image].append(element)
                 print(f"Pages created: {len(self.pages)}")
+                self.refresh_coord_store()
                 return True
         except Exception as e:
             print(f"Error loading JSON file: {e}")
@@ -56,8 +65,7 @@ class BookData:
         try:
             # 建立暫存檔案
             temp_path = self.json_path + '.tmp'
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(self.elements, f, ensure_ascii=False, indent=2)
+            json_codec.dump(self.serializable_elements(), temp_path)
             
             # 替換原檔案
             os.replace(temp_path, self.json_path)
@@ -69,6 +77,13 @@ class BookData:
                 os.remove(temp_path)
             return False
             
+    def serializable_elements(self, elements=None):
+        """建立可序列化的元素副本（移除 QRectF 快取），預設為整本書"""
+        if elements is None:
+            elements = self.elements
+        return [{key: value for key, value in elem.items() if key != 'rect'}
+                for elem in elements]
+            
     def get_page(self, index):
         """獲取指定頁面的資料"""
         if not hasattr(self, 'pages'):
@@ -176,7 +191,7 @@ class BookData:
     # 添加一个更新矩形的方法
     def update_rect(self, element_id, new_rect):
         """更新元素的矩形区域"""
-        for element in self.elements:
+        for row, element in enumerate(self.elements):
             if element.get('id') == element_id:
                 element['X1'] = int(new_rect.x())
                 element['Y1'] = int(new_rect.y())
@@ -190,5 +205,92 @@ class BookData:
                     new_rect.width(),
                     new_rect.height()
                 )
+                if self.coord_store is not None and row < len(self.coord_store):
+                    self.coord_store.set_rect(row, element['X1'], element['Y1'],
+                                              element['X2'], element['Y2'])
                 return True
-        return False
\ No newline at end of file
+        return False
+
+    def sync_coords(self, elements):
+        """將已直接寫入 X1/Y1/X2/Y2 的元素同步到座標欄位陣列（元素以物件本身識別）"""
+        if self.coord_store is None or len(self.coord_store) != len(self.elements):
+            self.refresh_coord_store()
+            return
+        targets = {id(elem) for elem in elements}
+        for row, elem in enumerate(self.elements):
+            if id(elem) in targets:
+                self.coord_store.set_rect(row, elem['X1'], elem['Y1'], elem['X2'], elem['Y2'])
+
+    def refresh_coord_store(self):
+        """依目前的元素列表重建座標欄位陣列"""
+        page_keys = list(self.pages.keys()) if hasattr(self, 'pages') else None
+        self.coord_store = CoordinateStore.from_elements(self.elements, page_keys)
+        return self.coord_store
+
+    def query(self, audio_root=None):
+        """建立元素查詢，例如 query().category('Word').page(0)"""
+        if self.coord_store is None or len(self.coord_store) != len(self.elements):
+            self.refresh_coord_store()
+        index = self._element_index
+        if index is None or index.store is not self.coord_store or audio_root is not None:
+            audio_root = audio_root or os.path.join(self.base_dir, 'assets', 'audio')
+            audio_dirs = {field: os.path.join(audio_root, language, self.book_id)
+                          for field, language in AUDIO_FIELDS.items()}
+            index = ElementIndex(self.elements, self.coord_store, audio_dirs)
+            self._element_index = index
+        return index.query()
+
+    def invalidate_page_sizes(self):
+        """清除頁面圖片尺寸快取（頁面圖片被取代後使用；頁面列表變更會自動偵測）"""
+        self._page_sizes = None
+
+    def get_page_sizes(self):
+        """獲取所有頁面圖片的尺寸（只讀取檔頭），回傳 (頁數, 2) 陣列"""
+        if not hasattr(self, 'pages'):
+            return np.zeros((0, 2), dtype=np.int32)
+        # 頁面列表未變更時沿用快取（圖片被取代時由呼叫端 invalidate_page_sizes）
+        page_keys = list(self.pages.keys())
+        if self._page_sizes is not None and page_keys == self._page_size_keys:
+            return self._page_sizes
+
+        sizes = np.zeros((len(self.pages), 2), dtype=np.int32)
+        for i, image_name in enumerate(self.pages.keys()):
+            image_path = os.path.join(self.base_dir, 'assets', 'books', self.book_id, image_name)
+            try:
+                with Image.open(image_path) as img:
+                    sizes[i] = img.size
+            except OSError:
+                print(f"Could not read image size: {image_path}")
+        self._page_sizes = sizes
+        self._page_size_keys = page_keys
+        return sizes
+
+    def validate_coordinates(self):
+        """一次驗證整本書的座標，回傳超出範圍或無效的元素列表"""
+        if self.coord_store is None:
+            return []
+        invalid_rows = np.flatnonzero(self.coord_store.validate_bounds(self.get_page_sizes()))
+        return [self.elements[row] for row in invalid_rows.tolist()]
+
+    def get_coordinate_stats(self):
+        """獲取整本書的座標統計"""
+        if self.coord_store is None:
+            return {}
+        return self.coord_store.stats()
+
+    def transform_page_coords(self, page_index, matrix):
+        """以 2x3 仿射矩陣向量化轉換指定頁面的所有文字框座標"""
+        if self.coord_store is None:
+            return 0
+        rows = self.coord_store.page_rows(page_index)
+        rows = rows[self.coord_store.has_coords[rows]]
+        if len(rows) == 0:
+            return 0
+        self.coord_store.transform(rows, matrix)
+        self.coord_store.write_back(self.elements, rows)
+        for row in rows.tolist():
+            elem = self.elements[row]
+            elem['rect'] = QRectF(elem['X1'], elem['Y1'],
+                                  elem['X2'] - elem['X1'], elem['Y2'] - elem['Y1'])
+        self.invalidate_page_sizes()
+        return len(rows)
@@ -0,0 +1,192 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+# 編輯器使用的文字框類別（順序即類別代碼）
+CATEGORIES = ['Word', 'Sentence', 'Full Text']
+
+
+class CoordinateStore:
+    """以 NumPy 欄位陣列保存整本書的文字框座標
+
+    第 i 列對應 BookData.elements[i]，page / category 以代碼儲存，
+    可一次完成整本書的邊界驗證、統計與匯出。
+    """
+
+    def __init__(self, x1, y1, x2, y2, page, category, has_coords,
+                 page_keys: List[str], categories: List[str]):
+        self.x1 = np.asarray(x1, dtype=np.int32)
+        self.y1 = np.asarray(y1, dtype=np.int32)
+        self.x2 = np.asarray(x2, dtype=np.int32)
+        self.y2 = np.asarray(y2, dtype=np.int32)
+        self.page = np.asarray(page, dtype=np.int32)
+        self.category = np.asarray(category, dtype=np.int8)
+        self.has_coords = np.asarray(has_coords, dtype=bool)
+        self.page_keys = list(page_keys)
+        self.categories = list(categories)
+
+    @classmethod
+    def from_elements(cls, elements: Sequence[dict],
+                      page_keys: Optional[List[str]] = None) -> 'CoordinateStore':
+        """由元素字典列表建立欄位陣列"""
+        n = len(elements)
+        if page_keys is None:
+            page_keys = list(dict.fromkeys(elem.get('Image', '') for elem in elements))
+        page_codes = {key: i for i, key in enumerate(page_keys)}
+        categories = list(CATEGORIES)
+        category_codes = {name: i for i, name in enumerate(categories)}
+
+        coords = np.zeros((n, 4), dtype=np.int32)
+        page = np.full(n, -1, dtype=np.int32)
+        category = np.full(n, -1, dtype=np.int8)
+        has_coords = np.zeros(n, dtype=bool)
+
+        for i, elem in enumerate(elements):
+            if all(k in elem for k in ('X1', 'Y1', 'X2', 'Y2')):
+                coords[i] = (elem['X1'], elem['Y1'], elem['X2'], elem['Y2'])
+                has_coords[i] = True
+            page[i] = page_codes.get(elem.get('Image'), -1)
+            name = elem.get('Category', elem.get('category', ''))
+            if name not in category_codes:
+                category_codes[name] = len(categories)
+                categories.append(name)
+            category[i] = category_codes[name]
+
+        return cls(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3],
+                   page, category, has_coords, page_keys, categories)
+
+    def __len__(self) -> int:
+        return len(self.x1)
+
+    @property
+    def widths(self) -> np.ndarray:
+        return self.x2 - self.x1
+
+    @property
+    def heights(self) -> np.ndarray:
+        return self.y2 - self.y1
+
+    def boxes(self, rows=None) -> np.ndarray:
+        """回傳 (n, 4) 的 x1, y1, x2, y2 陣列"""
+        boxes = np.column_stack((self.x1, self.y1, self.x2, self.y2))
+        return boxes if rows is None else boxes[rows]
+
+    def category_code(self, name: str) -> int:
+        """取得類別代碼，不存在時回傳 -1"""
+        return self.categories.index(name) if name in self.categories else -1
+
+    def page_rows(self, page_index: int) -> np.ndarray:
+        """取得指定頁面的所有列索引"""
+        return np.flatnonzero(self.page == page_index)
+
+    def set_rect(self, row: int, x1: int, y1: int, x2: int, y2: int) -> None:
+        """更新單一列的座標"""
+        self.x1[row], self.y1[row], self.x2[row], self.y2[row] = x1, y1, x2, y2
+        self.has_coords[row] = True
+
+    def validate_bounds(self, page_sizes: np.ndarray) -> np.ndarray:
+        """向量化驗證座標是否在頁面範圍內，回傳無效列的布林遮罩
+
+        page_sizes 為 (頁數, 2) 的寬高陣列；尺寸為 0 的頁面只檢查座標順序。
+        """
+        page_sizes = np.asarray(page_sizes, dtype=np.int32).reshape(-1, 2)
+        known_page = (self.page >= 0) & (self.page < len(page_sizes))
+        # 末端補一個 0 尺寸，讓未知頁面對應到「不限制範圍」
+        padded = np.vstack((page_sizes, np.zeros((1, 2), dtype=np.int32)))
+        safe_page = np.where(known_page, self.page, len(page_sizes))
+        width = padded[safe_page, 0]
+        height = padded[safe_page, 1]
+        unbounded = width <= 0
+
+        valid = ((0 <= self.x1) & (self.x1 < self.x2) &
+                 (0 <= self.y1) & (self.y1 < self.y2) &
+                 (unbounded | ((self.x2 <= width) & (self.y2 <= height))))
+        return self.has_coords & ~valid
+
+    def stats(self) -> Dict[str, dict]:
+        """整本書的批次統計：每頁 / 每類別的數量與尺寸"""
+        rows = self.has_coords
+        widths = self.widths[rows].astype(np.int64)
+        heights = self.heights[rows].astype(np.int64)
+        pages = self.page[rows]
+        categories = self.category[rows].astype(np.int32)
+
+        result = {'pages': {}, 'categories': {}}
+        n_pages = len(self.page_keys)
+        valid_page = pages >= 0
+        page_counts = np.bincount(pages[valid_page], minlength=n_pages)
+        page_width_sum = np.bincount(pages[valid_page], weights=widths[valid_page], minlength=n_pages)
+        page_height_sum = np.bincount(pages[valid_page], weights=heights[valid_page], minlength=n_pages)
+
+        # 每頁所有文字框的外接矩形
+        page_bbox = np.zeros((n_pages, 4), dtype=np.int64)
+        if n_pages:
+            page_bbox[:, :2] = np.iinfo(np.int32).max
+            page_bbox[:, 2:] = np.iinfo(np.int32).min
+            np.minimum.at(page_bbox[:, 0], pages[valid_page], self.x1[rows][valid_page])
+            np.minimum.at(page_bbox[:, 1], pages[valid_page], self.y1[rows][valid_page])
+            np.maximum.at(page_bbox[:, 2], pages[valid_page], self.x2[rows][valid_page])
+            np.maximum.at(page_bbox[:, 3], pages[valid_page], self.y2[rows][valid_page])
+
+        for i, key in enumerate(self.page_keys):
+            count = int(page_counts[i])
+            result['pages'][key] = {
+                'count': count,
+                'mean_width': float(page_width_sum[i] / count) if count else 0.0,
+                'mean_height': float(page_height_sum[i] / count) if count else 0.0,
+                'bbox': page_bbox[i].tolist() if count else None,
+            }
+
+        category_counts = np.bincount(categories, minlength=len(self.categories))
+        for i, name in enumerate(self.categories):
+            mask = categories == i
+            count = int(category_counts[i])
+            result['categories'][name] = {
+                'count': count,
+                'mean_width': float(widths[mask].mean()) if count else 0.0,
+                'mean_height': float(heights[mask].mean()) if count else 0.0,
+                'min_width': int(widths[mask].min()) if count else 0,
+                'min_height': int(heights[mask].min()) if count else 0,
+            }
+        return result
+
+    def transform(self, rows, matrix) -> None:
+        """對指定列套用 2x3 仿射矩陣（對兩個角點轉換後取外接矩形）"""
+        rows = np.asarray(rows)
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(2, 3)
+        corners = np.stack([
+            np.column_stack((self.x1[rows], self.y1[rows])),
+            np.column_stack((self.x2[rows], self.y2[rows])),
+        ]).astype(np.float64)
+        mapped = corners @ matrix[:, :2].T + matrix[:, 2]
+        lo = np.rint(mapped.min(axis=0)).astype(np.int32)
+        hi = np.rint(mapped.max(axis=0)).astype(np.int32)
+        self.x1[rows], self.y1[rows] = lo[:, 0], lo[:, 1]
+        self.x2[rows], self.y2[rows] = hi[:, 0], hi[:, 1]
+
+    def write_back(self, elements: Sequence[dict], rows=None) -> None:
+        """將欄位陣列的座標寫回元素字典"""
+        if rows is None:
+            rows = np.flatnonzero(self.has_coords)
+        rows = np.asarray(rows)
+        for row, (x1, y1, x2, y2) in zip(rows.tolist(), self.boxes(rows).tolist()):
+            elem = elements[row]
+            elem['X1'], elem['Y1'], elem['X2'], elem['Y2'] = x1, y1, x2, y2
+
+    def export_table(self) -> List[list]:
+        """一次匯出整本書的座標表：Image, Category, X1, Y1, X2, Y2"""
+        page_names = np.array(self.page_keys + [''], dtype=object)
+        category_names = np.array(self.categories, dtype=object)
+        rows = np.flatnonzero(self.has_coords)
+        images = page_names[self.page[rows]].tolist()
+        categories = category_names[self.category[rows]].tolist()
+        return [[image, category, *box]
+                for image, category, box in zip(images, categories, self.boxes(rows).tolist())]
+
+    def save_npz(self, path: str) -> None:
+        """將欄位陣列存為 .npz 檔"""
+        np.savez_compressed(
+            path,
+            x1=self.x1, y1=self.y1, x2=self.x2, y2=self.y2,
+            page=self.page, category=self.category, has_coords=self.has_coords,
+            page_keys=np.array(self.page_keys), categories=np.array(self.categories),
+        )
@@ -0,0 +1,191 @@
+"""網站部署前的內容雜湊 manifest 與增量差異
+
+計算網站目錄（flutter build web 的輸出）中每個檔案的 MD5，產生與
+flutter_service_worker.js 相同格式的 RESOURCES 預先快取清單並改寫 service worker，
+再與上次部署的 manifest 比較，只把新增或變更的檔案複製到暫存目錄。
+使用者端的 service worker 只會重新下載雜湊不同的資源。
+
+可選擇將書籍資料、頁面圖片與音檔改名為含內容雜湊的檔名（--content-addressed），
+原始路徑與新路徑的對照寫在 asset_map.json，閱讀器需透過此對照載入資源。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.deploy_manifest ../build/web 部署暫存目錄 --previous 上次的deploy_manifest.json
+"""
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.file_hash import file_digest, bytes_digest
+
+SERVICE_WORKER = 'flutter_service_worker.js'
+MANIFEST_NAME = 'deploy_manifest.json'
+CHANGES_NAME = 'deploy_changes.json'
+ASSET_MAP_NAME = 'asset_map.json'
+# 可改為內容雜湊檔名的資料資源
+DATA_PREFIXES = (
+    'assets/assets/Book_data/',
+    'assets/assets/Books/',
+    'assets/assets/audio/',
+)
+# 與 Dart 的 Uri.encodeFull 相同，保留 URI 保留字元
+URL_SAFE = "/:@!$&'()*+,;=?#-._~"
+RESOURCES_PATTERN = re.compile(r'const RESOURCES = \{.*?\};', re.DOTALL)
+
+
+def list_site_files(site_root):
+    """列出網站目錄下的檔案（相對路徑，以 / 分隔），略過隱藏檔與 service worker"""
+    paths = []
+    for directory, dirnames, filenames in os.walk(site_root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for name in sorted(filenames):
+            if name.startswith('.'):
+                continue
+            path = os.path.relpath(os.path.join(directory, name), site_root).replace(os.sep, '/')
+            if path != SERVICE_WORKER:
+                paths.append(path)
+    return paths
+
+
+def content_addressed_path(path, digest):
+    """在副檔名前加入雜湊：a/b.json -> a/b.<雜湊>.json"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest[:10]}{ext}"
+
+
+def build_manifest(site_root, content_addressed=False, workers=None):
+    """計算所有檔案的雜湊，回傳 {'files': {原始路徑: {'md5', 'size', 'path'}}, 'asset_map': {...}}"""
+    paths = list_site_files(site_root)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = list(executor.map(
+            lambda path: file_digest(os.path.join(site_root, path), 'md5'), paths))
+
+    files, asset_map = {}, {}
+    for path, digest in zip(paths, digests):
+        deployed = path
+        if content_addressed and path.startswith(DATA_PREFIXES):
+            deployed = content_addressed_path(path, digest)
+            asset_map[path] = deployed
+        files[path] = {
+            'md5': digest,
+            'size': os.path.getsize(os.path.join(site_root, path)),
+            'path': deployed,
+        }
+    return {'content_addressed': content_addressed, 'files': files, 'asset_map': asset_map}
+
+
+def diff_manifests(previous, current):
+    """比較兩次部署，回傳新增 / 變更 / 移除的部署路徑與需上傳的位元組數"""
+    old = {entry['path']: entry['md5'] for entry in previous.get('files', {}).values()}
+    new = {entry['path']: entry for entry in current['files'].values()}
+    added = sorted(path for path in new if path not in old)
+    changed = sorted(path for path in new if path in old and old[path] != new[path]['md5'])
+    removed = sorted(path for path in old if path not in new)
+    return {
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'unchanged': len(new) - len(added) - len(changed),
+        'upload_bytes': sum(new[path]['size'] for path in added + changed),
+    }
+
+
+def service_worker_resources(manifest):
+    """產生 flutter_service_worker.js 的 RESOURCES 對照（URL 編碼的部署路徑 -> MD5）"""
+    resources = {quote(entry['path'], safe=URL_SAFE): entry['md5']
+                 for entry in manifest['files'].values()}
+    if 'index.html' in resources:
+        resources['/'] = resources['index.html']
+    return resources
+
+
+def render_service_worker(template, resources):
+    """以新的 RESOURCES 取代 service worker 中的清單"""
+    body = ',\n'.join(f"{json.dumps(key, ensure_ascii=False)}: {json.dumps(value)}"
+                      for key, value in resources.items())
+    text, count = RESOURCES_PATTERN.subn(lambda _: f"const RESOURCES = {{{body}}};", template, count=1)
+    if count == 0:
+        raise ValueError(f"{SERVICE_WORKER} 中找不到 RESOURCES 清單")
+    return text
+
+
+def _add_generated(manifest, path, data):
+    """將產生的檔案（如 asset_map.json）加入 manifest"""
+    manifest['files'][path] = {'md5': bytes_digest(data, 'md5'), 'size': len(data), 'path': path}
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def prepare_deploy(site_root, output_dir, previous_path=None, content_addressed=False, workers=None):
+    """產生部署暫存目錄（只含需上傳的檔案）、manifest 與差異報告，回傳差異"""
+    manifest = build_manifest(site_root, content_addressed, workers)
+    generated = {}
+    if content_addressed:
+        generated[ASSET_MAP_NAME] = json.dumps(
+            manifest['asset_map'], ensure_ascii=False, indent=2).encode('utf-8')
+        _add_generated(manifest, ASSET_MAP_NAME, generated[ASSET_MAP_NAME])
+
+    service_worker_path = os.path.join(site_root, SERVICE_WORKER)
+    if os.path.exists(service_worker_path):
+        with open(service_worker_path, 'r', encoding='utf-8') as f:
+            template = f.read()
+        text = render_service_worker(template, service_worker_resources(manifest))
+        generated[SERVICE_WORKER] = text.encode('utf-8')
+        _add_generated(manifest, SERVICE_WORKER, generated[SERVICE_WORKER])
+
+    previous = {}
+    if previous_path:
+        with open(previous_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    changes = diff_manifests(previous, manifest)
+
+    # 複製需上傳的檔案
+    upload = set(changes['added']) | set(changes['changed'])
+    for path, entry in manifest['files'].items():
+        if entry['path'] not in upload:
+            continue
+        target = os.path.join(output_dir, entry['path'])
+        if path in generated:
+            _write(target, generated[path])
+        else:
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            shutil.copy2(os.path.join(site_root, path), target)
+
+    _write(os.path.join(output_dir, MANIFEST_NAME),
+           json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    _write(os.path.join(output_dir, CHANGES_NAME),
+           json.dumps(changes, ensure_ascii=False, indent=2).encode('utf-8'))
+    print(f"{len(changes['added'])} added, {len(changes['changed'])} changed, "
+          f"{len(changes['removed'])} removed, {changes['unchanged']} unchanged; "
+          f"upload {changes['upload_bytes'] / 1024 / 1024:.1f} MB")
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='產生內容雜湊 manifest 與增量部署檔案')
+    parser.add_argument('site_root', help='網站目錄（flutter build web 的輸出）')
+    parser.add_argument('output_dir', help='部署暫存目錄（只放需上傳的檔案）')
+    parser.add_argument('--previous', default=None, help='上次部署的 deploy_manifest.json')
+    parser.add_argument('--content-addressed', action='store_true',
+                        help='書籍資料、圖片與音檔改用含內容雜湊的檔名')
+    parser.add_argument('--workers', type=int, default=None, help='執行緒數量')
+    args = parser.parse_args(argv)
+
+    try:
+        prepare_deploy(args.site_root, args.output_dir, args.previous,
+                       args.content_addressed, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import os
+import json
+
+# 快取根目錄：tools/.cache
+CACHE_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    '.cache'
+)
+
+
+class DiskCache:
+    """以鍵值命名檔案的磁碟快取，每個 namespace 一個子目錄"""
+
+    def __init__(self, namespace, root=None):
+        self.directory = os.path.join(root or CACHE_ROOT, namespace)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key, ext='.json'):
+        """取得鍵值對應的快取檔案路徑"""
+        return os.path.join(self.directory, f"{key}{ext}")
+
+    def get_json(self, key):
+        """讀取 JSON 快取，不存在或損壞時回傳 None"""
+        path = self.path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set_json(self, key, value):
+        """以原子方式寫入 JSON 快取"""
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def get_bytes(self, key, ext):
+        """讀取二進位快取，不存在時回傳 None"""
+        try:
+            with open(self.path_for(key, ext), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set_bytes(self, key, ext, data):
+        """以原子方式寫入二進位快取"""
+        path = self.path_for(key, ext)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
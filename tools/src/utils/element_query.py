@@ -0,0 +1,223 @@
+"""書籍元素的索引查詢
+
+以 CoordinateStore 的欄位陣列為基礎，預先建立類別與頁面的布林遮罩 (bitmap)，
+多個條件以遮罩的 AND 組合，結果為指向原始元素的輕量 ElementView（不複製 dict）。
+
+    book_data.query().category('Word').pages(3, 7).intersects(0, 0, 800, 600).missing_audio()
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.element_query ../assets/Book_data/V1_book_data.json --category Word --pages 3 7 --missing-audio
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+# 音檔欄位與其語言目錄
+AUDIO_FIELDS = {
+    'English_Audio_File': 'en',
+    'Chinese_Audio_File': 'zh',
+}
+
+
+class ElementView:
+    """指向 BookData.elements 中單一元素的輕量檢視"""
+    __slots__ = ('index', 'row')
+
+    def __init__(self, index, row):
+        self.index = index
+        self.row = row
+
+    @property
+    def element(self):
+        """原始元素 dict（修改會直接反映到書籍資料）"""
+        return self.index.elements[self.row]
+
+    @property
+    def page(self):
+        return int(self.index.store.page[self.row])
+
+    @property
+    def page_position(self):
+        """在 BookData.pages[圖片] 中的索引（即文字框的 element_index）"""
+        return int(self.index.page_position[self.row])
+
+    @property
+    def image(self):
+        return self.element.get('Image', '')
+
+    @property
+    def category(self):
+        return self.index.store.categories[self.index.store.category[self.row]]
+
+    @property
+    def box(self):
+        """(x1, y1, x2, y2)，沒有座標時為 None"""
+        store = self.index.store
+        if not store.has_coords[self.row]:
+            return None
+        return (int(store.x1[self.row]), int(store.y1[self.row]),
+                int(store.x2[self.row]), int(store.y2[self.row]))
+
+    def get(self, key, default=None):
+        return self.element.get(key, default)
+
+    def __getitem__(self, key):
+        return self.element[key]
+
+    def __repr__(self):
+        return f"ElementView(row={self.row}, {self.image}, {self.get('Text', '')!r})"
+
+
+class ElementIndex:
+    """整本書的查詢索引（元素列表變更後需重建）"""
+
+    def __init__(self, elements, store, audio_dirs=None):
+        self.elements = elements
+        self.store = store
+        self.audio_dirs = audio_dirs or {}
+        n = len(store)
+        # 類別遮罩
+        self.category_masks = {name: store.category == code for code, name in enumerate(store.categories)}
+        # 各頁的列索引（依元素順序），以及每列在該頁中的位置
+        self.page_position = np.zeros(n, dtype=np.int32)
+        self.page_rows = {}
+        order = np.argsort(store.page, kind='stable')
+        boundaries = np.flatnonzero(np.diff(store.page[order])) + 1
+        for rows in np.split(order, boundaries) if n else []:
+            self.page_rows[int(store.page[rows[0]])] = rows
+            self.page_position[rows] = np.arange(len(rows), dtype=np.int32)
+        self._missing_audio = {}
+
+    def __len__(self):
+        return len(self.store)
+
+    def all_mask(self):
+        return np.ones(len(self.store), dtype=bool)
+
+    def page_mask(self, pages):
+        mask = np.zeros(len(self.store), dtype=bool)
+        for page in pages:
+            rows = self.page_rows.get(page)
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+    def missing_audio_mask(self, field):
+        """有指定音檔欄位但檔案不存在的元素（每個目錄只列出一次）"""
+        if field not in self._missing_audio:
+            directory = self.audio_dirs.get(field)
+            try:
+                existing = set(os.listdir(directory)) if directory else set()
+            except OSError:
+                existing = set()
+            self._missing_audio[field] = np.array(
+                [bool(elem.get(field)) and elem.get(field) not in existing for elem in self.elements],
+                dtype=bool)
+        return self._missing_audio[field]
+
+    def query(self):
+        return ElementQuery(self)
+
+
+class ElementQuery:
+    """可串接的查詢條件，每個條件回傳新的查詢（原查詢不變）"""
+
+    def __init__(self, index, mask=None):
+        self.index = index
+        self._mask = index.all_mask() if mask is None else mask
+
+    def _narrow(self, mask):
+        return ElementQuery(self.index, self._mask & mask)
+
+    def category(self, *names):
+        """類別為其中之一"""
+        mask = np.zeros(len(self.index), dtype=bool)
+        for name in names:
+            category_mask = self.index.category_masks.get(name)
+            if category_mask is not None:
+                mask |= category_mask
+        return self._narrow(mask)
+
+    def page(self, page_index):
+        return self._narrow(self.index.page_mask([page_index]))
+
+    def pages(self, start, stop):
+        """頁面索引介於 start 與 stop 之間（皆包含）"""
+        return self._narrow(self.index.page_mask(range(start, stop + 1)))
+
+    def has_coords(self):
+        return self._narrow(self.index.store.has_coords)
+
+    def intersects(self, x1, y1, x2, y2):
+        """座標與矩形相交"""
+        store = self.index.store
+        mask = store.has_coords & (store.x1 < x2) & (store.x2 > x1) & (store.y1 < y2) & (store.y2 > y1)
+        return self._narrow(mask)
+
+    def missing_audio(self, field='English_Audio_File'):
+        return self._narrow(self.index.missing_audio_mask(field))
+
+    def where(self, predicate):
+        """以任意函式過濾（只對目前符合的元素逐一呼叫）"""
+        mask = np.zeros(len(self.index), dtype=bool)
+        for row in np.flatnonzero(self._mask).tolist():
+            mask[row] = bool(predicate(self.index.elements[row]))
+        return self._narrow(mask)
+
+    def mask(self):
+        return self._mask
+
+    def rows(self):
+        return np.flatnonzero(self._mask)
+
+    def views(self):
+        return [ElementView(self.index, row) for row in self.rows().tolist()]
+
+    def __iter__(self):
+        return iter(self.views())
+
+    def __len__(self):
+        return int(np.count_nonzero(self._mask))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='查詢書籍元素')
+    parser.add_argument('json_path', help='書籍 JSON 檔案')
+    parser.add_argument('--category', nargs='+', default=None, help='類別')
+    parser.add_argument('--pages', type=int, nargs=2, default=None, metavar=('START', 'STOP'),
+                        help='頁面範圍（從 1 開始，皆包含）')
+    parser.add_argument('--bbox', type=int, nargs=4, default=None, metavar=('X1', 'Y1', 'X2', 'Y2'),
+                        help='與此矩形相交')
+    parser.add_argument('--missing-audio', action='store_true', help='英文音檔不存在')
+    parser.add_argument('--audio-root', default=None, help='音檔根目錄（包含 en / zh 子目錄）')
+    args = parser.parse_args(argv)
+
+    import io
+    import contextlib
+    from src.utils.book_data import BookData
+    book_data = BookData(args.json_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded = book_data.load()
+    if not loaded:
+        print(f"Error loading {args.json_path}")
+        return 1
+
+    query = book_data.query(args.audio_root)
+    if args.category:
+        query = query.category(*args.category)
+    if args.pages:
+        query = query.pages(args.pages[0] - 1, args.pages[1] - 1)
+    if args.bbox:
+        query = query.intersects(*args.bbox)
+    if args.missing_audio:
+        query = query.missing_audio()
+    for view in query:
+        print(f"{view.image} [{view.category}] {view.get('Text', '')} {view.box} "
+              f"{view.get('English_Audio_File', '')}")
+    print(f"{len(query)} elements")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+import hashlib
+
+# 讀取檔案時的區塊大小
+CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path, algorithm='sha1'):
+    """以串流方式計算檔案內容的雜湊值（十六進位字串）"""
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data, algorithm='sha1'):
+    """計算位元組資料的雜湊值（十六進位字串）"""
+    return hashlib.new(algorithm, data).hexdigest()
@@ -0,0 +1,56 @@
+"""多個文字框的群組變換
+
+選取的文字框堆疊成 (n, 4) 的 [x1, y1, x2, y2] 陣列，平移、縮放與對齊都以
+一次陣列運算套用到整組，不逐一計算每個矩形。
+"""
+import numpy as np
+from PyQt5.QtCore import QRectF
+
+# 對齊的邊：(座標欄位, 另一側欄位, 取最小值或最大值)
+ALIGN_EDGES = {
+    'left': (0, 2, np.min),
+    'right': (2, 0, np.max),
+    'top': (1, 3, np.min),
+    'bottom': (3, 1, np.max),
+}
+
+
+def rects_to_boxes(rects):
+    """QRectF 列表 -> (n, 4) 陣列"""
+    return np.array([[rect.left(), rect.top(), rect.right(), rect.bottom()] for rect in rects],
+                    dtype=np.float64).reshape(-1, 4)
+
+
+def boxes_to_rects(boxes):
+    """(n, 4) 陣列 -> QRectF 列表"""
+    return [QRectF(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in np.asarray(boxes).tolist()]
+
+
+def bounds(boxes):
+    """整組的外接矩形 [x1, y1, x2, y2]"""
+    return np.concatenate([boxes[:, :2].min(axis=0), boxes[:, 2:].max(axis=0)])
+
+
+def translate(boxes, dx, dy):
+    return boxes + np.array([dx, dy, dx, dy], dtype=np.float64)
+
+
+def scale(boxes, factor, origin=None):
+    """以 origin（預設為整組外接矩形的中心）為基準縮放位置與大小"""
+    if origin is None:
+        x1, y1, x2, y2 = bounds(boxes)
+        origin = ((x1 + x2) / 2, (y1 + y2) / 2)
+    origin = np.tile(np.asarray(origin, dtype=np.float64), 2)
+    return (boxes - origin) * factor + origin
+
+
+def align(boxes, edge):
+    """將各文字框的指定邊對齊到整組最外側的位置（大小不變）"""
+    if edge not in ALIGN_EDGES:
+        raise ValueError(f"Unknown edge: {edge}")
+    column, opposite, reduce = ALIGN_EDGES[edge]
+    offset = reduce(boxes[:, column]) - boxes[:, column]
+    aligned = boxes.copy()
+    aligned[:, column] += offset
+    aligned[:, opposite] += offset
+    return aligned
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Union
+import numpy as np
 from PyQt5.QtCore import QRectF
 
 @dataclass
@@ -10,13 +11,21 @@ class HistoryAction:
     old_rect: QRectF
     new_rect: QRectF
 
+@dataclass
+class GroupHistoryAction:
+    """多個文字框一起變換的歷史操作（座標為 (n, 4) 的 [x1, y1, x2, y2] 陣列）"""
+    action_type: str  # 'move'、'scale' 或 'align_left' 等
+    region_ids: List[str]
+    old_boxes: np.ndarray
+    new_boxes: np.ndarray
+
 class HistoryManager:
     def __init__(self, max_history: int = 50):
-        self.history: List[HistoryAction] = []
+        self.history: List[Union[HistoryAction, GroupHistoryAction]] = []
         self.current_index: int = -1
         self.max_history = max_history
         
-    def add_action(self, action: HistoryAction) -> None:
+    def add_action(self, action: Union[HistoryAction, GroupHistoryAction]) -> None:
         """添加新的操作到歷史記錄"""
         # 如果當前不在歷史記錄末尾，刪除之後的記錄
         if self.current_index < len(self.history) - 1:
@@ -39,7 +48,7 @@ class HistoryManager:
         """是否可以重做"""
         return self.current_index < len(self.history) - 1
         
-    def undo(self) -> Optional[HistoryAction]:
+    def undo(self) -> Optional[Union[HistoryAction, GroupHistoryAction]]:
         """撤銷操作"""
         if not self.can_undo():
             return None
@@ -48,7 +57,7 @@ class HistoryManager:
         self.current_index -= 1
         return action
         
-    def redo(self) -> Optional[HistoryAction]:
+    def redo(self) -> Optional[Union[HistoryAction, GroupHistoryAction]]:
         """重做操作"""
         if not self.can_redo():
             return None
@@ -0,0 +1,197 @@
+"""網頁版頁面圖片的多解析度輸出
+
+每頁輸出數種寬度的漸進式 JPEG 與 WebP，並產生 srcset 形式的 manifest 與
+座標正規化（0~1）的書籍 JSON，閱讀器可依裝置選擇適當解析度。
+以來源圖片的內容雜湊判斷是否需要重新輸出，重複建置時只處理有變更的頁面。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.image_export ../assets/Book_data/V1_book_data.json ../assets/Books/V1 輸出目錄
+"""
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, features
+from src.utils.file_hash import file_digest
+from src.utils.coord_store import CoordinateStore
+
+# 輸出寬度（像素），超過原始寬度者略過
+WIDTHS = (640, 1280, 1920)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+# 輸出參數變更時遞增，使舊的建置狀態失效
+PIPELINE_VERSION = 1
+STATE_NAME = '.build_state.json'
+MANIFEST_NAME = 'images.json'
+
+
+def output_formats():
+    """可輸出的格式（WebP 依 Pillow 編譯選項而定）"""
+    return ('jpeg', 'webp') if features.check('webp') else ('jpeg',)
+
+
+def target_widths(full_width, widths=WIDTHS):
+    """選出不超過原始寬度的輸出寬度，原圖較小時只輸出原始寬度"""
+    selected = [width for width in sorted(widths) if width < full_width]
+    return selected + [full_width] if full_width <= max(widths) else selected
+
+
+def render_page(job):
+    """輸出單頁的各種寬度與格式（供行程池使用）"""
+    image_path, output_dir, stem, widths, formats = job
+    with Image.open(image_path) as img:
+        full_size = img.size
+        image = img.convert('RGB')
+
+    sources = []
+    # 由大到小依序縮小，每次以上一個結果為來源
+    current = image
+    for width in sorted(target_widths(full_size[0], widths), reverse=True):
+        height = max(round(full_size[1] * width / full_size[0]), 1)
+        if current.size != (width, height):
+            current = current.resize((width, height), Image.LANCZOS)
+        source = {'width': width, 'height': height}
+        for fmt in formats:
+            name = f"{stem}_{width}.{'jpg' if fmt == 'jpeg' else fmt}"
+            path = os.path.join(output_dir, name)
+            if fmt == 'jpeg':
+                current.save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            else:
+                current.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+            source[fmt] = name
+            source[f"{fmt}_bytes"] = os.path.getsize(path)
+        sources.append(source)
+    sources.reverse()
+    return {'width': full_size[0], 'height': full_size[1], 'sources': sources}
+
+
+def srcset(sources, fmt):
+    """產生 HTML srcset 字串"""
+    return ', '.join(f"{source[fmt]} {source['width']}w" for source in sources if fmt in source)
+
+
+def normalized_elements(book_data, page_sizes):
+    """回傳座標換算為頁面比例（0~1）的元素副本，新增 Rel 欄位 [x1, y1, x2, y2]"""
+    elements = book_data.serializable_elements()
+    store = CoordinateStore.from_elements(elements, list(book_data.pages.keys()))
+    sizes = np.array([page_sizes.get(key, (0, 0)) for key in store.page_keys],
+                     dtype=np.float64).reshape(-1, 2)[store.page]
+    valid = store.has_coords & (sizes > 0).all(axis=1)
+    scale = np.where(valid[:, None], sizes, 1.0)[:, [0, 1, 0, 1]]
+    relative = np.round(store.boxes() / scale, 5)
+    for row in np.flatnonzero(valid).tolist():
+        elements[row]['Rel'] = relative[row].tolist()
+    return elements
+
+
+def _load_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, value, indent=None):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, indent=indent,
+                  separators=None if indent else (',', ':'))
+    os.replace(temp_path, path)
+
+
+def export_images(book_data, image_dir, output_dir, widths=WIDTHS, workers=None, force=False):
+    """輸出整本書的多解析度圖片、manifest 與正規化座標，回傳 manifest"""
+    os.makedirs(output_dir, exist_ok=True)
+    formats = output_formats()
+    state_path = os.path.join(output_dir, STATE_NAME)
+    state = _load_json(state_path, {})
+    if state.get('version') != PIPELINE_VERSION or state.get('widths') != list(widths) \
+            or state.get('formats') != list(formats):
+        state = {}
+    built = state.get('pages', {})
+
+    jobs, hashes = [], {}
+    for image_name in book_data.pages.keys():
+        image_path = os.path.join(image_dir, image_name)
+        if not os.path.exists(image_path):
+            print(f"Skipping {image_name}: image not found")
+            continue
+        digest = file_digest(image_path)
+        hashes[image_name] = digest
+        previous = built.get(image_name)
+        if not force and previous and previous['hash'] == digest and all(
+                os.path.exists(os.path.join(output_dir, source[fmt]))
+                for source in previous['result']['sources'] for fmt in formats):
+            continue
+        stem = os.path.splitext(image_name)[0]
+        jobs.append((image_name, (image_path, output_dir, stem, tuple(widths), formats)))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(render_page, [job for _, job in jobs])
+            for (image_name, _), result in zip(jobs, results):
+                built[image_name] = {'hash': hashes[image_name], 'result': result}
+                print(f"{image_name}: {len(result['sources'])} widths")
+    print(f"Rendered {len(jobs)} pages, {len(hashes) - len(jobs)} unchanged")
+
+    pages = []
+    for image_name in book_data.pages.keys():
+        if image_name not in hashes:
+            continue
+        result = built[image_name]['result']
+        page = {
+            'image': image_name,
+            'hash': hashes[image_name],
+            'width': result['width'],
+            'height': result['height'],
+            'sources': result['sources'],
+        }
+        for fmt in formats:
+            page[f"srcset_{fmt}"] = srcset(result['sources'], fmt)
+        pages.append(page)
+
+    manifest = {
+        'book_id': book_data.book_id,
+        'widths': list(widths),
+        'formats': list(formats),
+        'pages': pages,
+    }
+    _write_json(os.path.join(output_dir, MANIFEST_NAME), manifest, indent=2)
+
+    page_sizes = {page['image']: (page['width'], page['height']) for page in pages}
+    _write_json(os.path.join(output_dir, f"{book_data.book_id}_book_data.json"),
+                normalized_elements(book_data, page_sizes))
+
+    _write_json(state_path, {
+        'version': PIPELINE_VERSION,
+        'widths': list(widths),
+        'formats': list(formats),
+        'pages': {name: built[name] for name in hashes},
+    })
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='輸出網頁版多解析度頁面圖片')
+    parser.add_argument('json_path', help='書籍 JSON 檔案')
+    parser.add_argument('image_dir', help='頁面圖片目錄')
+    parser.add_argument('output_dir', help='輸出目錄')
+    parser.add_argument('--widths', type=int, nargs='+', default=list(WIDTHS), help='輸出寬度')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    parser.add_argument('--force', action='store_true', help='忽略建置狀態，全部重新輸出')
+    args = parser.parse_args(argv)
+
+    from src.utils.book_data import BookData
+    book_data = BookData(args.json_path)
+    if not book_data.load():
+        return 1
+    export_images(book_data, args.image_dir, args.output_dir,
+                  widths=tuple(args.widths), workers=args.workers, force=args.force)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
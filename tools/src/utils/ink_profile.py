@@ -0,0 +1,100 @@
+"""頁面墨跡的積分影像（summed-area table），供文字框邊緣吸附使用
+
+每頁只在背景建立一次；之後任意矩形內的墨跡量皆為 O(1) 查詢，
+吸附時只在固定半徑內搜尋，每次滑鼠事件的成本與圖片解析度無關。
+"""
+import numpy as np
+from src.utils.page_image import load_gray_array, ink_mask
+
+# 建立積分影像時使用的最大邊長（像素）
+WORK_SIZE = 2048
+# 吸附搜尋半徑與邊緣留白（原始像素）
+SNAP_RADIUS = 24
+SNAP_PADDING = 6
+
+EDGES = ('left', 'top', 'right', 'bottom')
+
+
+class InkIntegral:
+    def __init__(self, mask, full_size):
+        height, width = mask.shape
+        self.width = width
+        self.height = height
+        self.full_size = tuple(full_size)
+        # 原始像素 -> 工作陣列像素
+        self.scale_x = width / full_size[0]
+        self.scale_y = height / full_size[1]
+        self.table = np.zeros((height + 1, width + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(mask, axis=0, dtype=np.int32), axis=1, out=self.table[1:, 1:])
+
+    @classmethod
+    def from_image(cls, image_path, max_side=WORK_SIZE):
+        """由頁面圖片建立（耗時，應在背景執行緒呼叫）"""
+        gray, full_size = load_gray_array(image_path, max_side)
+        return cls(ink_mask(gray), full_size)
+
+    def ink_count(self, x1, y1, x2, y2):
+        """工作陣列座標矩形 [x1, x2) x [y1, y2) 內的墨跡像素數"""
+        t = self.table
+        return int(t[y2, x2] - t[y1, x2] - t[y2, x1] + t[y1, x1])
+
+    def _profile(self, vertical, lo, hi, span_lo, span_hi):
+        """計算 [lo, hi) 各欄（vertical）或各列在 span 範圍內的墨跡量"""
+        t = self.table
+        if vertical:
+            inside = t[span_hi, lo:hi + 1] - t[span_lo, lo:hi + 1]
+        else:
+            inside = t[lo:hi + 1, span_hi] - t[lo:hi + 1, span_lo]
+        return np.diff(inside)
+
+    def snap_edge(self, edge, value, span_lo, span_hi, radius=SNAP_RADIUS, padding=SNAP_PADDING):
+        """將文字框的一條邊吸附到附近的墨跡邊界（皆為原始像素座標）
+
+        edge 為 'left' / 'top' / 'right' / 'bottom'；span 為另一軸向上的文字框範圍。
+        半徑內找不到墨跡邊界時回傳原值。
+        """
+        vertical = edge in ('left', 'right')
+        scale, span_scale = (self.scale_x, self.scale_y) if vertical else (self.scale_y, self.scale_x)
+        size, span_size = (self.width, self.height) if vertical else (self.height, self.width)
+
+        span_lo = min(max(int(span_lo * span_scale), 0), span_size)
+        span_hi = min(max(int(np.ceil(span_hi * span_scale)), 0), span_size)
+        if span_hi <= span_lo:
+            return value
+
+        position = value * scale
+        pad = padding * scale
+        reach = radius * scale + pad + 1
+        lo = max(int(position - reach), 0)
+        hi = min(int(np.ceil(position + reach)), size)
+        if hi - lo < 2:
+            return value
+
+        has_ink = (self._profile(vertical, lo, hi, span_lo, span_hi) > 0).astype(np.int8)
+        change = np.diff(has_ink)
+        if edge in ('left', 'top'):
+            # 墨跡開始處（第一個有墨跡的欄 / 列）往外留白
+            candidates = lo + np.flatnonzero(change == 1) + 1 - pad
+        else:
+            # 墨跡結束處往外留白
+            candidates = lo + np.flatnonzero(change == -1) + 1 + pad
+        if len(candidates) == 0:
+            return value
+
+        best = candidates[np.argmin(np.abs(candidates - position))]
+        if abs(best - position) > radius * scale:
+            return value
+        return float(best / scale)
+
+    def snap_rect(self, x1, y1, x2, y2, edges, radius=SNAP_RADIUS, padding=SNAP_PADDING):
+        """吸附文字框指定的邊，回傳新的 (x1, y1, x2, y2)"""
+        box = {'left': x1, 'top': y1, 'right': x2, 'bottom': y2}
+        for edge in EDGES:
+            if edge not in edges:
+                continue
+            if edge in ('left', 'right'):
+                span = (box['top'], box['bottom'])
+            else:
+                span = (box['left'], box['right'])
+            box[edge] = self.snap_edge(edge, box[edge], span[0], span[1], radius, padding)
+        return box['left'], box['top'], box['right'], box['bottom']
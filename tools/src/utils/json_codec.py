@@ -0,0 +1,114 @@
+"""書籍 JSON 的編碼 / 解碼
+
+有安裝 orjson 時使用 orjson，否則使用標準函式庫 json。書籍 JSON 只含字串、整數、
+布林值與 null（座標一律存成整數），對這類資料兩者輸出的位元組完全相同：
+- 美化模式 (pretty)：縮排 2 格、保留中文，與原本 json.dump(..., ensure_ascii=False, indent=2) 一致，供版本控制比對差異
+- 精簡模式 (compact)：無空白，供網頁匯出使用
+
+浮點數不保證一致：orjson 與 json 的指數寫法不同（1e16 / 1e+16），NaN 與無限大
+orjson 會輸出 null。orjson 無法處理的值（超過 64 位元的整數、非字串鍵等）會自動改用標準函式庫編碼。
+
+效能比較（於 tools 目錄下）：
+    python -m src.utils.json_codec ../assets/Book_data/V1_book_data.json ../assets/Book_data/V2_book_data.json
+"""
+import sys
+import json
+import time
+import argparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _stdlib_dumps(value, pretty):
+    if pretty:
+        text = json.dumps(value, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return text.encode('utf-8')
+
+
+def dumps(value, pretty=True):
+    """編碼為 UTF-8 位元組"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            pass
+    return _stdlib_dumps(value, pretty)
+
+
+def loads(data):
+    """由位元組或字串解碼"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def load(path):
+    """讀取 JSON 檔案"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump(value, path, pretty=True):
+    """寫入 JSON 檔案（不含暫存檔處理，需要原子寫入時由呼叫端處理）"""
+    with open(path, 'wb') as f:
+        f.write(dumps(value, pretty))
+
+
+def _best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(path, repeat=5):
+    """比較標準函式庫與目前編碼器的讀取 / 寫入時間，並確認美化輸出一致"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    value = json.loads(raw.decode('utf-8'))
+    rows = [
+        ('load', lambda: json.loads(raw.decode('utf-8')), lambda: loads(raw)),
+        ('dump pretty', lambda: _stdlib_dumps(value, True), lambda: dumps(value, True)),
+        ('dump compact', lambda: _stdlib_dumps(value, False), lambda: dumps(value, False)),
+    ]
+    print(f"{path} ({len(value)} elements, {len(raw) / 1024:.1f} KB)")
+    for name, baseline, current in rows:
+        baseline_time = _best_time(baseline, repeat)
+        current_time = _best_time(current, repeat)
+        print(f"  {name:<13} json {baseline_time * 1000:7.2f} ms  {BACKEND} {current_time * 1000:7.2f} ms  "
+              f"x{baseline_time / current_time:.1f}")
+    pretty = dumps(value, True)
+    compact = dumps(value, False)
+    print(f"  pretty {len(pretty) / 1024:.1f} KB (identical to json: {pretty == _stdlib_dumps(value, True)}), "
+          f"compact {len(compact) / 1024:.1f} KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='比較 JSON 編碼器的效能')
+    parser.add_argument('json_paths', nargs='+', help='書籍 JSON 檔案')
+    parser.add_argument('--repeat', type=int, default=5, help='每項測試重複次數（取最快）')
+    args = parser.parse_args(argv)
+
+    print(f"Backend: {BACKEND}")
+    for path in args.json_paths:
+        try:
+            benchmark(path, args.repeat)
+        except (OSError, ValueError) as e:
+            print(f"Error: {str(e)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""書籍 JSON 的資料遷移
+
+遷移是以 @migration 註冊、逐一修改元素 dict 的函式。多個檔案以行程池同時處理，
+只有元素內容實際改變的檔案才會寫回；乾跑 (dry run) 模式只列出差異，不寫入任何檔案。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.migrations ../assets/Book_data --dry-run
+    python -m src.utils.migrations ../assets/Book_data/V1_book_data.json --only translation_from_audio
+"""
+import os
+import sys
+import glob
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from src.utils import json_codec
+
+# 名稱 -> (函式, 說明)，依註冊順序執行
+MIGRATIONS = {}
+# 乾跑報告中每個檔案最多列出的差異數
+MAX_DIFF_LINES = 20
+
+
+def migration(name, description=''):
+    """註冊遷移函式：func(elem) 直接修改元素 dict"""
+    def register(func):
+        if name in MIGRATIONS:
+            raise ValueError(f"Migration already registered: {name}")
+        MIGRATIONS[name] = (func, description)
+        return func
+    return register
+
+
+@migration('translation_from_audio', '由 Chinese_Audio_File 的檔名（zh_<翻譯>.mp3）推導中文翻譯')
+def translation_from_audio(elem):
+    audio_file = elem.get('Chinese_Audio_File')
+    if not audio_file or not audio_file.startswith('zh_') or '中文翻譯' not in elem:
+        return
+    translation_text = audio_file[3:]
+    if translation_text.lower().endswith('.mp3'):
+        translation_text = translation_text[:-4]
+    elem['中文翻譯'] = translation_text
+
+
+def resolve_names(names=None):
+    """檢查遷移名稱，未指定時回傳全部已註冊的遷移"""
+    if not names:
+        return list(MIGRATIONS)
+    unknown = [name for name in names if name not in MIGRATIONS]
+    if unknown:
+        raise ValueError(f"Unknown migration: {', '.join(unknown)}")
+    return list(names)
+
+
+def expand_paths(paths):
+    """展開目錄為其中的 JSON 檔案"""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            result.extend(sorted(glob.glob(os.path.join(path, '*.json'))))
+        else:
+            result.append(path)
+    return result
+
+
+def apply_migrations(elements, names):
+    """對元素副本套用遷移，回傳 (新元素列表, [(列索引, 欄位, 舊值, 新值)])"""
+    migrated, changes = [], []
+    for row, elem in enumerate(elements):
+        if not isinstance(elem, dict):
+            migrated.append(elem)
+            continue
+        new_elem = dict(elem)
+        for name in names:
+            MIGRATIONS[name][0](new_elem)
+        for key in list(elem) + [key for key in new_elem if key not in elem]:
+            if elem.get(key) != new_elem.get(key) or (key in elem) != (key in new_elem):
+                changes.append((row, key, elem.get(key), new_elem.get(key)))
+        migrated.append(new_elem)
+    return migrated, changes
+
+
+def migrate_file(job):
+    """遷移單一檔案，內容有變更且非乾跑時以原子方式寫回（供行程池使用）"""
+    path, names, dry_run, backup_dir = job
+    elements = json_codec.load(path)
+    if not isinstance(elements, list):
+        raise ValueError(f"{path} 不是元素列表")
+
+    migrated, changes = apply_migrations(elements, names)
+    images = [elem.get('Image', '') if isinstance(elem, dict) else '' for elem in elements]
+    report = {
+        'path': path,
+        'elements': len(elements),
+        'changed_elements': len({row for row, _, _, _ in changes}),
+        'changes': [(row, images[row], key, old, new) for row, key, old, new in changes],
+        'written': False,
+    }
+    if changes and not dry_run:
+        if backup_dir:
+            os.makedirs(backup_dir, exist_ok=True)
+            shutil.copy2(path, os.path.join(backup_dir, os.path.basename(path)))
+        temp_path = path + '.tmp'
+        json_codec.dump(migrated, temp_path)
+        os.replace(temp_path, path)
+        report['written'] = True
+    return report
+
+
+def format_report(report, max_lines=MAX_DIFF_LINES):
+    """將單一檔案的遷移結果整理成精簡的差異文字"""
+    name = os.path.basename(report['path'])
+    if not report['changes']:
+        return f"{name}: unchanged"
+    status = 'written' if report['written'] else 'dry run'
+    lines = [f"{name}: {report['changed_elements']}/{report['elements']} elements changed ({status})"]
+    for row, image, key, old, new in report['changes'][:max_lines]:
+        lines.append(f"  [{row}] {image} {key}: {old!r} -> {new!r}")
+    if len(report['changes']) > max_lines:
+        lines.append(f"  ... {len(report['changes']) - max_lines} more")
+    return '\n'.join(lines)
+
+
+def run_migrations(paths, names=None, dry_run=False, backup_dir=None, workers=None):
+    """對多個 JSON 檔案執行遷移並印出報告，回傳各檔案的報告列表"""
+    names = resolve_names(names)
+    paths = expand_paths(paths)
+    jobs = [(path, names, dry_run, backup_dir) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        reports = list(executor.map(migrate_file, jobs))
+    for report in reports:
+        print(format_report(report))
+    changed = sum(1 for report in reports if report['changes'])
+    print(f"{len(reports)} files checked, {changed} changed"
+          + (" (dry run, nothing written)" if dry_run else ''))
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='執行書籍 JSON 資料遷移')
+    parser.add_argument('paths', nargs='*', help='書籍 JSON 檔案或目錄')
+    parser.add_argument('--only', nargs='+', default=None, help='只執行指定的遷移（預設全部）')
+    parser.add_argument('--dry-run', action='store_true', help='只列出差異，不寫入檔案')
+    parser.add_argument('--backup', default=None, help='寫入前將原檔複製到此目錄')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    parser.add_argument('--list', action='store_true', help='列出已註冊的遷移')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, description) in MIGRATIONS.items():
+            print(f"{name}: {description}")
+        return 0
+    if not args.paths:
+        parser.error('請指定 JSON 檔案或目錄')
+    try:
+        run_migrations(args.paths, args.only, args.dry_run, args.backup, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""文字框重疊與重複檢查
+
+以 x 軸掃描線（依 x1 排序、以 x2 為鍵的最小堆積維護活動集合）找出
+同頁重疊的文字框，時間複雜度 O((n + k) log n)，k 為候選配對數。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.overlap_analyzer V1_book_data.json [--iou 0.3]
+"""
+import sys
+import json
+import heapq
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Tuple
+import numpy as np
+from src.utils.coord_store import CoordinateStore
+
+
+@dataclass
+class OverlapReport:
+    """檢查結果（皆為座標列索引）"""
+    duplicates: List[List[int]] = field(default_factory=list)  # 座標完全相同的群組
+    overlaps: List[Tuple[int, int, float]] = field(default_factory=list)  # (列 a, 列 b, IoU)
+    orphan_words: List[int] = field(default_factory=list)  # 不在任何句子內的單字
+
+    def flagged_rows(self):
+        """回傳各類問題涉及的列索引集合"""
+        duplicate_rows = {row for group in self.duplicates for row in group}
+        overlap_rows = {row for a, b, _ in self.overlaps for row in (a, b)}
+        return duplicate_rows, overlap_rows, set(self.orphan_words)
+
+
+def find_duplicates(boxes, pages):
+    """找出同頁座標完全相同的文字框群組"""
+    if len(boxes) == 0:
+        return []
+    keys = np.column_stack((pages, boxes))
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    groups = []
+    for group_id in np.flatnonzero(counts > 1).tolist():
+        groups.append(np.flatnonzero(inverse == group_id).tolist())
+    return groups
+
+
+def sweep_overlaps(boxes, pages, categories, iou_threshold=0.3, same_category_only=True):
+    """掃描線找出 IoU 超過門檻的文字框配對（排除座標完全相同者）"""
+    overlaps = []
+    order = np.lexsort((boxes[:, 0], pages))  # 依頁面、x1 排序
+    active = []  # (x2, 列索引) 最小堆積
+    current_page = None
+    for row in order.tolist():
+        x1, y1, x2, y2 = boxes[row].tolist()
+        if pages[row] != current_page:
+            current_page = pages[row]
+            active = []
+        # 移除右緣已在目前左緣之前的文字框
+        while active and active[0][0] <= x1:
+            heapq.heappop(active)
+        for _, other in active:
+            if same_category_only and categories[other] != categories[row]:
+                continue
+            ox1, oy1, ox2, oy2 = boxes[other].tolist()
+            if oy2 <= y1 or y2 <= oy1:
+                continue
+            if (ox1, oy1, ox2, oy2) == (x1, y1, x2, y2):
+                continue  # 完全相同者由重複檢查回報
+            inter = (min(x2, ox2) - max(x1, ox1)) * (min(y2, oy2) - max(y1, oy1))
+            union = (x2 - x1) * (y2 - y1) + (ox2 - ox1) * (oy2 - oy1) - inter
+            iou = inter / union if union > 0 else 0.0
+            if iou >= iou_threshold:
+                overlaps.append((min(row, other), max(row, other), float(iou)))
+        heapq.heappush(active, (x2, row))
+    return overlaps
+
+
+def find_orphan_words(boxes, pages, categories, word_code, sentence_code, tolerance=5):
+    """找出不被同頁任何句子框包含的單字框"""
+    orphans = []
+    for page in np.unique(pages).tolist():
+        on_page = pages == page
+        words = np.flatnonzero(on_page & (categories == word_code))
+        sentences = np.flatnonzero(on_page & (categories == sentence_code))
+        if len(words) == 0:
+            continue
+        if len(sentences) == 0:
+            orphans.extend(words.tolist())
+            continue
+        w = boxes[words][:, None, :]
+        s = boxes[sentences][None, :, :]
+        contained = ((w[..., 0] >= s[..., 0] - tolerance) & (w[..., 1] >= s[..., 1] - tolerance) &
+                     (w[..., 2] <= s[..., 2] + tolerance) & (w[..., 3] <= s[..., 3] + tolerance))
+        orphans.extend(words[~contained.any(axis=1)].tolist())
+    return sorted(orphans)
+
+
+def analyze_boxes(boxes, pages, categories, category_names, iou_threshold=0.3, tolerance=5):
+    """對任意文字框陣列執行所有檢查"""
+    boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+    pages = np.asarray(pages)
+    categories = np.asarray(categories)
+    word_code = category_names.index('Word') if 'Word' in category_names else -1
+    sentence_code = category_names.index('Sentence') if 'Sentence' in category_names else -1
+    return OverlapReport(
+        duplicates=find_duplicates(boxes, pages),
+        overlaps=sweep_overlaps(boxes, pages, categories, iou_threshold),
+        orphan_words=find_orphan_words(boxes, pages, categories, word_code, sentence_code, tolerance),
+    )
+
+
+def analyze_store(coord_store: CoordinateStore, iou_threshold=0.3, tolerance=5):
+    """檢查整本書，回傳的索引為 coord_store 的列索引"""
+    rows = np.flatnonzero(coord_store.has_coords)
+    report = analyze_boxes(coord_store.boxes(rows), coord_store.page[rows],
+                           coord_store.category[rows], coord_store.categories,
+                           iou_threshold, tolerance)
+    # 轉換回整本書的列索引
+    return OverlapReport(
+        duplicates=[[int(rows[i]) for i in group] for group in report.duplicates],
+        overlaps=[(int(rows[a]), int(rows[b]), iou) for a, b, iou in report.overlaps],
+        orphan_words=[int(rows[i]) for i in report.orphan_words],
+    )
+
+
+def format_report(report: OverlapReport, elements):
+    """產生文字報告"""
+    def describe(row):
+        elem = elements[row]
+        return (f"{elem.get('Image', '')} [{elem.get('Category', '')}] {elem.get('Text', '')} "
+                f"({elem.get('X1')}, {elem.get('Y1')}, {elem.get('X2')}, {elem.get('Y2')})")
+
+    lines = [f"重複文字框: {len(report.duplicates)} 組"]
+    for group in report.duplicates:
+        lines.append("  " + " == ".join(describe(row) for row in group))
+    lines.append(f"重疊文字框: {len(report.overlaps)} 對")
+    for a, b, iou in report.overlaps:
+        lines.append(f"  IoU={iou:.2f}: {describe(a)} <-> {describe(b)}")
+    lines.append(f"不在句子內的單字: {len(report.orphan_words)} 個")
+    for row in report.orphan_words:
+        lines.append(f"  {describe(row)}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='文字框重疊與重複檢查')
+    parser.add_argument('json_paths', nargs='+', help='書籍 JSON 檔案')
+    parser.add_argument('--iou', type=float, default=0.3, help='回報重疊的 IoU 門檻')
+    parser.add_argument('--tolerance', type=int, default=5, help='單字包含於句子的容許誤差（像素）')
+    args = parser.parse_args(argv)
+
+    for json_path in args.json_paths:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            elements = json.load(f)
+        store = CoordinateStore.from_elements(elements)
+        report = analyze_store(store, args.iou, args.tolerance)
+        print(f"=== {json_path} ===")
+        print(format_report(report, elements))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import numpy as np
+from PIL import Image
+
+
+def load_gray_array(image_path, max_side=1024):
+    """以縮小解碼載入灰階陣列，回傳 (陣列, 原始寬高)"""
+    with Image.open(image_path) as img:
+        full_size = img.size
+        # JPEG 可直接以 1/2、1/4、1/8 解碼
+        img.draft('L', (max_side, max_side))
+        img = img.convert('L')
+        img.thumbnail((max_side, max_side))
+        return np.asarray(img, dtype=np.float32), full_size
+
+
+def otsu_threshold(gray):
+    """以 Otsu 法計算二值化門檻"""
+    hist = np.bincount(np.clip(gray, 0, 255).astype(np.uint8).ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128.0
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    mean_cum = np.cumsum(hist * levels)
+    mean_bg = mean_cum / np.maximum(weight_bg, 1)
+    mean_fg = (mean_cum[-1] - mean_cum) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return float(np.argmax(between))
+
+
+def ink_mask(gray):
+    """二值化，回傳墨跡（深色）為 True 的遮罩"""
+    return gray < otsu_threshold(gray)
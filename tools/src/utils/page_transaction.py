@@ -0,0 +1,84 @@
+"""新增模式的批次編輯
+
+新增、刪除與修改先暫存在記憶體，介面上即時顯示暫存後的結果，提交時一次套用到
+BookData 的元素列表與頁面列表（刪除以單次過濾完成，不逐筆 pop），之後只需保存
+一次並重新整理一次頁面。元素以物件本身識別，不依賴文字或類別比對。
+"""
+
+
+class PageTransaction:
+    """暫存的新增 / 刪除 / 修改操作"""
+
+    def __init__(self):
+        self.added = []  # 新元素（提交時依序加入）
+        self.deleted = {}  # id(元素) -> 元素
+        self.updates = {}  # id(元素) -> (元素, 變更欄位)
+        self.audio_copies = []  # (來源路徑, 目標路徑, 新元素)，提交後由呼叫端匯入
+
+    def __len__(self):
+        return len(self.added) + len(self.deleted) + len(self.updates)
+
+    def is_added(self, element):
+        return any(element is added for added in self.added)
+
+    def is_deleted(self, element):
+        return id(element) in self.deleted
+
+    def add(self, element, audio_source=None, audio_target=None):
+        """暫存新元素，音檔於提交時才匯入"""
+        self.added.append(element)
+        if audio_source and audio_target:
+            self.audio_copies.append((audio_source, audio_target, element))
+
+    def delete(self, element):
+        """暫存刪除；刪除尚未提交的新元素時直接取消新增"""
+        if self.is_added(element):
+            self.added = [added for added in self.added if added is not element]
+            self.audio_copies = [copy for copy in self.audio_copies if copy[2] is not element]
+            return
+        self.deleted[id(element)] = element
+        self.updates.pop(id(element), None)
+
+    def update(self, element, **fields):
+        """暫存欄位變更（尚未提交的新元素直接修改）"""
+        if self.is_added(element):
+            element.update(fields)
+            return
+        if self.is_deleted(element):
+            return
+        _, pending = self.updates.setdefault(id(element), (element, {}))
+        pending.update(fields)
+
+    def pending_fields(self, element):
+        """已存在元素暫存的欄位變更"""
+        return self.updates.get(id(element), (None, {}))[1]
+
+    def pending_for_page(self, image_name):
+        """指定頁面暫存的新元素"""
+        return [element for element in self.added if element.get('Image') == image_name]
+
+    def commit(self, book_data):
+        """一次套用所有暫存操作，回傳 (新增數, 刪除數, 修改數)"""
+        if self.deleted:
+            book_data.elements[:] = [elem for elem in book_data.elements if id(elem) not in self.deleted]
+            images = {elem.get('Image') for elem in self.deleted.values()}
+            for image in images:
+                page = book_data.pages.get(image)
+                if page is not None:
+                    page[:] = [elem for elem in page if id(elem) not in self.deleted]
+        for element, fields in self.updates.values():
+            element.update(fields)
+        for element in self.added:
+            book_data.elements.append(element)
+            book_data.pages.setdefault(element.get('Image'), []).append(element)
+
+        summary = (len(self.added), len(self.deleted), len(self.updates))
+        self.rollback()
+        return summary
+
+    def rollback(self):
+        """捨棄所有暫存操作"""
+        self.added = []
+        self.deleted = {}
+        self.updates = {}
+        self.audio_copies = []
@@ -0,0 +1,175 @@
+"""音檔波形的多解析度峰值金字塔與磁碟快取
+
+音檔以 soundfile 分段串流讀取，每 BASE_SAMPLES 個取樣以向量化運算取最小 / 最大值
+作為第 0 層，之後每層再將 LEVEL_FACTOR 個相鄰區間合併，直到區間數少於 MIN_BUCKETS。
+繪製時依每個像素涵蓋的取樣數選最接近的一層，任何縮放比例都只需處理約「寬度」個數值。
+
+金字塔以 .npz 存入 tools/.cache/waveforms，快取鍵為音檔路徑 + 修改時間 + 檔案大小，
+音檔未變更時不需重新讀取。
+
+預先產生整冊書（於 tools 目錄下執行）：
+    python -m src.utils.peak_pyramid ../assets/audio/en/V1/*.mp3
+"""
+import io
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import soundfile as sf
+from src.utils.file_hash import bytes_digest
+from src.utils.disk_cache import DiskCache
+
+# 第 0 層每個區間的取樣數
+BASE_SAMPLES = 64
+# 每往上一層合併的區間數
+LEVEL_FACTOR = 4
+# 最粗的一層至少保留的區間數
+MIN_BUCKETS = 64
+# 每次串流讀取的區間數
+BLOCK_BUCKETS = 4096
+PYRAMID_EXT = '.npz'
+
+
+def pyramid_key(audio_path):
+    """以路徑、修改時間與檔案大小產生快取鍵（不讀取音檔內容）"""
+    stat = os.stat(audio_path)
+    source = (f"{os.path.abspath(audio_path)}|{stat.st_mtime_ns}|{stat.st_size}|"
+              f"{BASE_SAMPLES}|{LEVEL_FACTOR}")
+    return bytes_digest(source.encode('utf-8'))
+
+
+class PeakPyramid:
+    """各層的 (最小值, 最大值) 陣列；第 i 層每個區間涵蓋 BASE_SAMPLES * LEVEL_FACTOR ** i 個取樣"""
+
+    def __init__(self, levels, samplerate, frames):
+        self.levels = levels
+        self.samplerate = samplerate
+        self.frames = frames
+
+    @property
+    def duration(self):
+        return self.frames / self.samplerate if self.samplerate else 0.0
+
+    def bucket_samples(self, level):
+        return BASE_SAMPLES * LEVEL_FACTOR ** level
+
+    def level_for(self, samples_per_pixel):
+        """每個區間不超過一個像素的最粗層"""
+        level = 0
+        while (level + 1 < len(self.levels)
+               and self.bucket_samples(level + 1) <= samples_per_pixel):
+            level += 1
+        return level
+
+    def peaks(self, start, end, width):
+        """將 start～end 秒分成 width 欄，回傳每欄的 (最小值, 最大值) 陣列"""
+        width = int(width)
+        if width <= 0 or end <= start or not self.levels:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+        level = self.level_for((end - start) * self.samplerate / width)
+        mins, maxs = self.levels[level]
+        bucket = self.bucket_samples(level)
+        # 每一欄起點對應的區間索引（放大超過第 0 層時相鄰欄會取到同一區間）
+        edges = np.linspace(start * self.samplerate / bucket, end * self.samplerate / bucket, width + 1)
+        starts = np.clip(np.floor(edges[:-1]).astype(np.int64), 0, len(mins) - 1)
+        column_mins = np.minimum.reduceat(mins, starts)
+        column_maxs = np.maximum.reduceat(maxs, starts)
+        # reduceat 在索引遞減 / 相同時只取單一元素，最後一欄要截到範圍結尾
+        stop = int(np.clip(np.ceil(edges[-1]), starts[-1] + 1, len(mins)))
+        column_mins[-1] = mins[starts[-1]:stop].min()
+        column_maxs[-1] = maxs[starts[-1]:stop].max()
+        # 超出音檔長度的欄位不顯示
+        outside = edges[:-1] >= len(mins)
+        column_mins[outside] = 0
+        column_maxs[outside] = 0
+        return column_mins, column_maxs
+
+    def to_bytes(self):
+        arrays = {'info': np.array([self.samplerate, self.frames], dtype=np.int64)}
+        for level, (mins, maxs) in enumerate(self.levels):
+            arrays[f'min{level}'] = mins
+            arrays[f'max{level}'] = maxs
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data)) as arrays:
+            samplerate, frames = (int(value) for value in arrays['info'])
+            levels = []
+            while f'min{len(levels)}' in arrays:
+                levels.append((arrays[f'min{len(levels)}'], arrays[f'max{len(levels)}']))
+        return cls(levels, samplerate, frames)
+
+
+def build_pyramid(audio_path):
+    """分段讀取音檔並建立峰值金字塔"""
+    info = sf.info(audio_path)
+    mins, maxs = [], []
+    for block in sf.blocks(audio_path, blocksize=BASE_SAMPLES * BLOCK_BUCKETS,
+                           dtype='float32', always_2d=True):
+        # 多聲道取所有聲道的範圍
+        low, high = block.min(axis=1), block.max(axis=1)
+        usable = len(low) - len(low) % BASE_SAMPLES
+        mins.append(low[:usable].reshape(-1, BASE_SAMPLES).min(axis=1))
+        maxs.append(high[:usable].reshape(-1, BASE_SAMPLES).max(axis=1))
+        if usable < len(low):
+            # 只有最後一段會有不足一個區間的尾端
+            mins.append(low[usable:].min(keepdims=True))
+            maxs.append(high[usable:].max(keepdims=True))
+
+    empty = np.zeros(0, dtype=np.float32)
+    levels = [(np.concatenate(mins) if mins else empty, np.concatenate(maxs) if maxs else empty)]
+    while len(levels[-1][0]) > MIN_BUCKETS:
+        low, high = levels[-1]
+        pad = -len(low) % LEVEL_FACTOR
+        low = np.pad(low, (0, pad), mode='edge').reshape(-1, LEVEL_FACTOR).min(axis=1)
+        high = np.pad(high, (0, pad), mode='edge').reshape(-1, LEVEL_FACTOR).max(axis=1)
+        levels.append((low, high))
+    return PeakPyramid(levels, info.samplerate, info.frames)
+
+
+def cached_pyramid(audio_path, cache=None):
+    """讀取已快取的金字塔，尚未產生或快取損毀時回傳 None"""
+    cache = cache or DiskCache('waveforms')
+    try:
+        data = cache.get_bytes(pyramid_key(audio_path), PYRAMID_EXT)
+        return PeakPyramid.from_bytes(data) if data else None
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_pyramid(audio_path, cache=None):
+    """讀取快取的金字塔，沒有時建立並寫入快取"""
+    cache = cache or DiskCache('waveforms')
+    pyramid = cached_pyramid(audio_path, cache)
+    if pyramid is None:
+        pyramid = build_pyramid(audio_path)
+        cache.set_bytes(pyramid_key(audio_path), PYRAMID_EXT, pyramid.to_bytes())
+    return pyramid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='預先產生音檔波形的峰值金字塔')
+    parser.add_argument('audio_files', nargs='+', help='音檔')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(load_pyramid, path) for path in args.audio_files]
+        for audio_path, future in zip(args.audio_files, futures):
+            try:
+                pyramid = future.result()
+            except (OSError, RuntimeError, ValueError) as e:
+                print(f"Error reading {audio_path}: {str(e)}")
+                failed += 1
+                continue
+            print(f"{os.path.basename(audio_path)}: {pyramid.duration:.2f}s, {len(pyramid.levels)} levels")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
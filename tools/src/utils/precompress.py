@@ -0,0 +1,179 @@
+"""網站文字資源的精簡化與預先壓縮
+
+將目錄中的文字資源（JSON、JS、HTML 等）複製到輸出目錄，JSON 會移除縮排與空白，
+並在旁邊產生最高壓縮等級的 .gz 與 .br 檔案，網頁伺服器可直接送出壓縮版本。
+以行程池同時壓縮多個檔案，來源內容雜湊未變更時略過。
+
+Brotli 需要另外安裝 brotli 套件（pip install brotli），未安裝時只產生 .gz。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.precompress ../assets/Book_data 輸出目錄
+"""
+import os
+import sys
+import gzip
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.file_hash import file_digest
+from src.utils import json_codec
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 需要處理的文字資源副檔名
+TEXT_EXTENSIONS = ('.json', '.js', '.mjs', '.css', '.html', '.txt', '.svg', '.map')
+# 小於此大小的檔案壓縮效益不大，只複製不壓縮
+MIN_COMPRESS_BYTES = 1024
+# 輸出參數變更時遞增，使舊的建置狀態失效
+COMPRESS_VERSION = 1
+STATE_NAME = '.compress_state.json'
+
+
+def encodings():
+    """可輸出的壓縮格式（Brotli 依是否安裝 brotli 套件而定）"""
+    return ('gz', 'br') if brotli is not None else ('gz',)
+
+
+def minify(path, data):
+    """JSON 移除縮排與空白，其他格式維持原樣"""
+    if not path.endswith('.json'):
+        return data
+    return json_codec.dumps(json_codec.loads(data), pretty=False)
+
+
+def list_text_assets(source_dir):
+    """列出目錄下的文字資源（相對路徑，以 / 分隔）"""
+    paths = []
+    for directory, dirnames, filenames in os.walk(source_dir):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for name in sorted(filenames):
+            if name.lower().endswith(TEXT_EXTENSIONS) and not name.startswith('.'):
+                path = os.path.join(directory, name)
+                paths.append(os.path.relpath(path, source_dir).replace(os.sep, '/'))
+    return paths
+
+
+def _write(path, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def compress_asset(job):
+    """精簡化並壓縮單一檔案，回傳各版本的位元組數（供行程池使用）"""
+    source_path, output_path, formats = job
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    sizes = {'source': len(data)}
+    data = minify(output_path, data)
+    sizes['minified'] = len(data)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    _write(output_path, data)
+    compressed = {}
+    if len(data) >= MIN_COMPRESS_BYTES:
+        if 'gz' in formats:
+            # mtime=0 使相同內容產生相同的壓縮檔
+            compressed['gz'] = gzip.compress(data, compresslevel=9, mtime=0)
+        if 'br' in formats:
+            compressed['br'] = brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    for ext in formats:
+        path = f"{output_path}.{ext}"
+        if ext in compressed:
+            _write(path, compressed[ext])
+            sizes[ext] = len(compressed[ext])
+        elif os.path.exists(path):
+            os.remove(path)
+    return sizes
+
+
+def _outputs_exist(output_path, sizes):
+    return os.path.exists(output_path) and all(
+        os.path.exists(f"{output_path}.{ext}") for ext in ('gz', 'br') if ext in sizes)
+
+
+def _format_size(size):
+    return f"{size / 1024:.1f}K" if size is not None else '-'
+
+
+def precompress(source_dir, output_dir, workers=None, force=False):
+    """輸出整個目錄的精簡化與預先壓縮檔案，回傳 {相對路徑: 各版本位元組數}"""
+    os.makedirs(output_dir, exist_ok=True)
+    formats = encodings()
+    state_path = os.path.join(output_dir, STATE_NAME)
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    if state.get('version') != COMPRESS_VERSION or state.get('formats') != list(formats):
+        state = {}
+    built = state.get('assets', {})
+
+    jobs, hashes = [], {}
+    for path in list_text_assets(source_dir):
+        source_path = os.path.join(source_dir, path)
+        output_path = os.path.join(output_dir, path)
+        digest = file_digest(source_path)
+        hashes[path] = digest
+        previous = built.get(path)
+        if not force and previous and previous['hash'] == digest \
+                and _outputs_exist(output_path, previous['sizes']):
+            continue
+        jobs.append((path, (source_path, output_path, formats)))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(compress_asset, [job for _, job in jobs])
+            for (path, _), sizes in zip(jobs, results):
+                built[path] = {'hash': hashes[path], 'sizes': sizes}
+
+    # 大小報告
+    report = {path: built[path]['sizes'] for path in hashes}
+    fresh = {path for path, _ in jobs}
+    for path, sizes in report.items():
+        mark = '*' if path in fresh else ' '
+        print(f"{mark} {path}: {_format_size(sizes['source'])} -> "
+              f"min {_format_size(sizes['minified'])}, gz {_format_size(sizes.get('gz'))}, "
+              f"br {_format_size(sizes.get('br'))}")
+    total = {key: sum(sizes.get(key, sizes['minified']) for sizes in report.values())
+             for key in ('source', 'minified', *formats)}
+    print(f"Compressed {len(jobs)} assets, {len(hashes) - len(jobs)} unchanged; total "
+          + ', '.join(f"{key} {_format_size(size)}" for key, size in total.items()))
+    if brotli is None:
+        print("brotli 未安裝，略過 .br 輸出")
+
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': COMPRESS_VERSION,
+            'formats': list(formats),
+            'assets': {path: built[path] for path in hashes},
+        }, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='精簡化並預先壓縮網站文字資源')
+    parser.add_argument('source_dir', help='來源目錄')
+    parser.add_argument('output_dir', help='輸出目錄')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    parser.add_argument('--force', action='store_true', help='忽略建置狀態，全部重新壓縮')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.source_dir):
+        print(f"Error: 找不到目錄 {args.source_dir}")
+        return 1
+    try:
+        precompress(args.source_dir, args.output_dir, args.workers, args.force)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""頁面圖片的文字框自動偵測（不使用 OCR）
+
+流程：縮小解碼 → Otsu 二值化 → 以水平線段 (run) 做連通元件標記 →
+依垂直重疊分行 → 依水平間距分成單字與句子。結果以圖片內容雜湊快取在磁碟上。
+
+預先計算整冊書（於 tools 目錄下執行）：
+    python -m src.utils.region_proposals ../assets/Books/V1/*.jpg
+"""
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.utils.page_image import load_gray_array, ink_mask
+from src.utils.file_hash import file_digest
+from src.utils.disk_cache import DiskCache
+
+# 演算法或參數變更時遞增，使舊快取失效
+PROPOSAL_VERSION = 1
+# 偵測時使用的最大邊長（像素）
+WORK_SIZE = 1600
+# 單字 / 句子的分隔間距（相對於行高）
+WORD_GAP_RATIO = 0.35
+SENTENCE_GAP_RATIO = 1.5
+# 文字元件高度範圍（相對於頁面高度）
+MIN_HEIGHT_RATIO = 0.006
+MAX_HEIGHT_RATIO = 0.15
+# 候選框向外擴張的邊距（相對於框高），與人工標註的留白一致
+PADDING_RATIO = 0.25
+
+
+def find_runs(mask):
+    """找出每列的連續墨跡線段，回傳 (列, 起點, 終點(不含)) 陣列"""
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    diff = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(diff == 1)
+    _, ends = np.nonzero(diff == -1)
+    return rows, starts, ends
+
+
+def label_runs(rows, starts, ends, width):
+    """以 8 連通將線段合併成連通元件，回傳每個線段的元件標籤"""
+    n = len(rows)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    stride = width + 2
+    start_keys = rows.astype(np.int64) * stride + starts
+    end_keys = rows.astype(np.int64) * stride + ends
+
+    # 上一列中與本線段相接的線段為連續區間 [lo, hi)
+    prev_row = (rows.astype(np.int64) - 1) * stride
+    lo = np.searchsorted(end_keys, prev_row + starts, side='left')
+    hi = np.searchsorted(start_keys, prev_row + ends, side='right')
+    counts = np.maximum(hi - lo, 0)
+    a = np.repeat(np.arange(n), counts)
+    offsets = np.arange(len(a)) - np.repeat(np.cumsum(counts) - counts, counts)
+    b = np.repeat(lo, counts) + offsets
+
+    # 最小標籤傳遞加上指標跳躍，直到收斂
+    labels = np.arange(n)
+    while True:
+        previous = labels
+        low = np.minimum(labels[a], labels[b])
+        labels = labels.copy()
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def component_boxes(mask):
+    """計算連通元件的外接矩形，回傳 (n, 4) 的 x1, y1, x2, y2（不含右下）"""
+    rows, starts, ends = find_runs(mask)
+    if len(rows) == 0:
+        return np.zeros((0, 4), dtype=np.int64)
+    labels = label_runs(rows, starts, ends, mask.shape[1])
+    _, components = np.unique(labels, return_inverse=True)
+    count = components.max() + 1
+    boxes = np.empty((count, 4), dtype=np.int64)
+    boxes[:, :2] = np.iinfo(np.int64).max
+    boxes[:, 2:] = np.iinfo(np.int64).min
+    np.minimum.at(boxes[:, 0], components, starts)
+    np.minimum.at(boxes[:, 1], components, rows)
+    np.maximum.at(boxes[:, 2], components, ends)
+    np.maximum.at(boxes[:, 3], components, rows + 1)
+    return boxes
+
+
+def filter_text_components(boxes, image_shape):
+    """去除雜點與插圖等非文字元件"""
+    if len(boxes) == 0:
+        return boxes
+    heights = boxes[:, 3] - boxes[:, 1]
+    widths = boxes[:, 2] - boxes[:, 0]
+    page_height, page_width = image_shape
+    keep = (heights >= max(3, MIN_HEIGHT_RATIO * page_height)) & (widths >= 1)
+    keep &= heights <= MAX_HEIGHT_RATIO * page_height
+    keep &= widths <= MAX_HEIGHT_RATIO * page_width * 2
+    return boxes[keep]
+
+
+def _merge(boxes):
+    return [int(boxes[:, 0].min()), int(boxes[:, 1].min()),
+            int(boxes[:, 2].max()), int(boxes[:, 3].max())]
+
+
+def pad_boxes(boxes, width, height, ratio=PADDING_RATIO):
+    """依框高向外擴張候選框並限制在圖片範圍內"""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    pad = (boxes[:, 3] - boxes[:, 1]) * ratio
+    boxes[:, 0] = np.maximum(boxes[:, 0] - pad, 0)
+    boxes[:, 1] = np.maximum(boxes[:, 1] - pad, 0)
+    boxes[:, 2] = np.minimum(boxes[:, 2] + pad, width)
+    boxes[:, 3] = np.minimum(boxes[:, 3] + pad, height)
+    return boxes
+
+
+def group_lines(boxes):
+    """依垂直重疊與相近的高度將元件分行，回傳每行元件的索引列表"""
+    lines = []  # [y1, y2, 起始高度, [索引...]]
+    for i in np.argsort((boxes[:, 1] + boxes[:, 3]) / 2, kind='stable').tolist():
+        y1, y2 = boxes[i, 1], boxes[i, 3]
+        height = y2 - y1
+        for line in lines:
+            overlap = min(y2, line[1]) - max(y1, line[0])
+            similar = max(height, line[2]) <= 3 * min(height, line[2])
+            if similar and overlap >= 0.5 * min(height, line[1] - line[0]):
+                line[0], line[1] = min(y1, line[0]), max(y2, line[1])
+                line[3].append(i)
+                break
+        else:
+            lines.append([y1, y2, height, [i]])
+    return [line[3] for line in lines]
+
+
+def split_segments(line):
+    """依水平間距（相對於相鄰元件高度）將一行切成數段，line 需依 x1 排序"""
+    heights = line[:, 3] - line[:, 1]
+    right = np.maximum.accumulate(line[:, 2])
+    gaps = line[1:, 0] - right[:-1]
+    limit = SENTENCE_GAP_RATIO * np.maximum(heights[1:], heights[:-1])
+    cuts = np.flatnonzero(gaps > limit) + 1
+    return np.split(line, cuts)
+
+
+def split_words(segment):
+    """將一段元件依字間距分成單字框"""
+    word_gap = max(WORD_GAP_RATIO * float(np.median(segment[:, 3] - segment[:, 1])), 1.0)
+    right = np.maximum.accumulate(segment[:, 2])
+    gaps = segment[1:, 0] - right[:-1]
+    cuts = np.flatnonzero(gaps > word_gap) + 1
+    return [_merge(part) for part in np.split(segment, cuts)]
+
+
+def group_words(boxes):
+    """將元件分成單字與句子，回傳 (單字框列表, 句子框列表)"""
+    words, sentences = [], []
+    for members in group_lines(boxes):
+        line = boxes[members]
+        line = line[np.argsort(line[:, 0], kind='stable')]
+        for segment in split_segments(line):
+            words.extend(split_words(segment))
+            sentences.append(_merge(segment))
+    return words, sentences
+
+
+def compute_proposals(image_path, max_side=WORK_SIZE):
+    """計算單頁圖片的單字與句子候選框（原始像素座標）"""
+    gray, full_size = load_gray_array(image_path, max_side)
+    boxes = filter_text_components(component_boxes(ink_mask(gray)), gray.shape)
+    words, sentences = group_words(boxes) if len(boxes) else ([], [])
+
+    scale = np.array([full_size[0] / gray.shape[1], full_size[1] / gray.shape[0]] * 2)
+    def to_full(items):
+        if not items:
+            return []
+        padded = pad_boxes(items, gray.shape[1], gray.shape[0])
+        return np.rint(padded * scale).astype(int).tolist()
+
+    return {
+        'image_size': list(full_size),
+        'words': to_full(words),
+        'sentences': to_full(sentences),
+    }
+
+
+def get_proposals(image_path, cache=None):
+    """取得候選框，優先讀取以圖片雜湊為鍵的磁碟快取"""
+    cache = cache or DiskCache('proposals')
+    key = f"{file_digest(image_path)}_v{PROPOSAL_VERSION}"
+    proposals = cache.get_json(key)
+    if proposals is None:
+        proposals = compute_proposals(image_path)
+        cache.set_json(key, proposals)
+    return proposals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='預先計算頁面文字框候選')
+    parser.add_argument('images', nargs='+', help='頁面圖片檔案')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    args = parser.parse_args(argv)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for image_path, proposals in zip(args.images, executor.map(get_proposals, args.images)):
+            print(f"{os.path.basename(image_path)}: {len(proposals['words'])} words, "
+                  f"{len(proposals['sentences'])} sentences")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""頁面重新掃描後的座標重新投影工具
+
+以縮小解碼的灰階陣列估計新舊頁面圖片之間的縮放 / 平移關係，
+再以向量化方式套用到該頁所有文字框。
+
+批次模式（於 tools 目錄下執行）：
+    python -m src.utils.reprojection V1_book_data.json 舊圖片目錄 新圖片目錄 [--apply]
+"""
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.utils.page_image import load_gray_array, ink_mask
+
+# 估計轉換時使用的最大邊長（像素）
+WORK_SIZE = 1024
+
+
+def ink_profiles(gray):
+    """計算墨跡遮罩的列 / 欄投影（已去除平均值）"""
+    ink = ink_mask(gray).astype(np.float64)
+    rows = ink.sum(axis=1)
+    cols = ink.sum(axis=0)
+    return rows - rows.mean(), cols - cols.mean()
+
+
+def _best_shift(template, signal):
+    """以 FFT 互相關找出 template 在 signal 中的最佳位移與正規化分數"""
+    n = len(template) + len(signal) - 1
+    size = 1 << (n - 1).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(signal, size) * np.conj(np.fft.rfft(template, size)), size)
+    # 負位移在循環尾端
+    corr = np.concatenate((corr[-(len(template) - 1):], corr[:len(signal)])) if len(template) > 1 else corr[:len(signal)]
+    index = int(np.argmax(corr))
+    norm = np.linalg.norm(template) * np.linalg.norm(signal)
+    score = float(corr[index] / norm) if norm else 0.0
+    return index - (len(template) - 1), score
+
+
+def estimate_axis(old_profile, new_profile, old_factor, new_factor, base_scale,
+                  search=0.15, steps=61):
+    """估計單一軸向的縮放與平移：new_full = scale * old_full + offset
+
+    old_factor / new_factor 為原始像素與工作陣列像素的比例。
+    """
+    old_index = np.arange(len(old_profile), dtype=np.float64)
+
+    def evaluate(scale):
+        # 將舊投影拉伸到新工作陣列的像素單位
+        stretch = scale * old_factor / new_factor
+        length = max(int(round(len(old_profile) * stretch)), 2)
+        resampled = np.interp(np.arange(length) / stretch, old_index, old_profile)
+        shift, score = _best_shift(resampled, new_profile)
+        return score, shift * new_factor
+
+    best = (-np.inf, 0.0, base_scale)
+    for scale in np.linspace(base_scale * (1 - search), base_scale * (1 + search), steps):
+        score, offset = evaluate(scale)
+        if score > best[0]:
+            best = (score, offset, scale)
+
+    # 在最佳值附近細化
+    step = base_scale * 2 * search / (steps - 1)
+    for scale in np.linspace(best[2] - step, best[2] + step, 21):
+        score, offset = evaluate(scale)
+        if score > best[0]:
+            best = (score, offset, scale)
+
+    score, offset, scale = best
+    return float(scale), float(offset), float(score)
+
+
+def estimate_transform(old_image_path, new_image_path):
+    """估計舊圖片座標到新圖片座標的 2x3 仿射矩陣，回傳 (矩陣, 信心分數)"""
+    old_gray, old_size = load_gray_array(old_image_path, WORK_SIZE)
+    new_gray, new_size = load_gray_array(new_image_path, WORK_SIZE)
+    old_rows, old_cols = ink_profiles(old_gray)
+    new_rows, new_cols = ink_profiles(new_gray)
+
+    sx, tx, score_x = estimate_axis(
+        old_cols, new_cols,
+        old_size[0] / old_gray.shape[1], new_size[0] / new_gray.shape[1],
+        new_size[0] / old_size[0])
+    sy, ty, score_y = estimate_axis(
+        old_rows, new_rows,
+        old_size[1] / old_gray.shape[0], new_size[1] / new_gray.shape[0],
+        new_size[1] / old_size[1])
+
+    matrix = np.array([[sx, 0.0, tx], [0.0, sy, ty]])
+    return matrix, min(score_x, score_y)
+
+
+def preview_boxes(coord_store, page_index, matrix):
+    """計算套用轉換後的頁面文字框（不修改資料），回傳 (列索引, (n, 4) 陣列)"""
+    rows = coord_store.page_rows(page_index)
+    rows = rows[coord_store.has_coords[rows]]
+    boxes = coord_store.boxes(rows).astype(np.float64)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    scale = np.array([matrix[0, 0], matrix[1, 1], matrix[0, 0], matrix[1, 1]])
+    offset = np.array([matrix[0, 2], matrix[1, 2], matrix[0, 2], matrix[1, 2]])
+    return rows, np.rint(boxes * scale + offset).astype(np.int32)
+
+
+def _estimate_job(job):
+    """供行程池使用的單頁估計"""
+    image_name, old_path, new_path = job
+    try:
+        matrix, score = estimate_transform(old_path, new_path)
+        return image_name, matrix, score, None
+    except Exception as e:
+        return image_name, None, 0.0, str(e)
+
+
+def reproject_volume(book_data, old_dir, new_dir, min_score=0.5, apply=False, workers=None):
+    """批次估計並套用整冊書的重新投影，回傳每頁結果列表"""
+    jobs = []
+    for image_name in book_data.pages.keys():
+        old_path = os.path.join(old_dir, image_name)
+        new_path = os.path.join(new_dir, image_name)
+        if os.path.exists(old_path) and os.path.exists(new_path):
+            jobs.append((image_name, old_path, new_path))
+        else:
+            print(f"Skipping {image_name}: old or new image not found")
+
+    page_index = {key: i for i, key in enumerate(book_data.pages.keys())}
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for image_name, matrix, score, error in executor.map(_estimate_job, jobs):
+            if error:
+                print(f"{image_name}: error {error}")
+                results.append({'image': image_name, 'error': error})
+                continue
+            applied = apply and score >= min_score
+            if applied:
+                book_data.transform_page_coords(page_index[image_name], matrix)
+            print(f"{image_name}: scale=({matrix[0, 0]:.4f}, {matrix[1, 1]:.4f}) "
+                  f"offset=({matrix[0, 2]:.1f}, {matrix[1, 2]:.1f}) score={score:.3f}"
+                  f"{' applied' if applied else ''}")
+            results.append({'image': image_name, 'matrix': matrix.tolist(),
+                            'score': score, 'applied': applied})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='頁面重新掃描後的座標重新投影')
+    parser.add_argument('json_path', help='書籍 JSON 檔案')
+    parser.add_argument('old_dir', help='舊頁面圖片目錄')
+    parser.add_argument('new_dir', help='新頁面圖片目錄')
+    parser.add_argument('--apply', action='store_true', help='套用轉換並寫回 JSON 檔案')
+    parser.add_argument('--min-score', type=float, default=0.5, help='套用轉換的最低信心分數')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    args = parser.parse_args(argv)
+
+    from src.utils.book_data import BookData
+    book_data = BookData(args.json_path)
+    if not book_data.load():
+        return 1
+    reproject_volume(book_data, args.old_dir, args.new_dir,
+                     min_score=args.min_score, apply=args.apply, workers=args.workers)
+    if args.apply and not book_data.save():
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""書籍元素的全文搜尋索引
+
+以反向索引 (inverted index) 對 Text 與 中文翻譯 建立記憶體內索引：
+- 英文以單字為詞元，最後一個查詢詞以前綴比對，找不到時以編輯距離做模糊比對
+- 中文以單字與相鄰兩字 (bigram) 為詞元，查詢的所有 bigram 都出現才算符合
+
+索引可包含多本書，元素編輯後以 update_element 增量更新。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.search_index ../assets/Book_data/V1_book_data.json ../assets/Book_data/V2_book_data.json -q "look"
+"""
+import re
+import sys
+import time
+import bisect
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+# 建立索引的欄位
+TEXT_FIELDS = ('Text', '中文翻譯')
+ENGLISH_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+CJK_PATTERN = re.compile(r'[㐀-鿿豈-﫿]+')
+MAX_RESULTS = 200
+
+# 比對方式的分數（越高越前面）
+SCORE_EXACT = 3
+SCORE_PREFIX = 2
+SCORE_FUZZY = 1
+
+
+def english_tokens(text):
+    return ENGLISH_PATTERN.findall(text.lower())
+
+
+def chinese_tokens(text):
+    """中文詞元：每個字與相鄰兩字"""
+    tokens = []
+    for run in CJK_PATTERN.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def element_tokens(elem):
+    tokens = set()
+    for field in TEXT_FIELDS:
+        value = elem.get(field)
+        if isinstance(value, str) and value:
+            tokens.update(english_tokens(value))
+            tokens.update(chinese_tokens(value))
+    return tokens
+
+
+def within_distance(a, b, limit):
+    """判斷兩字串的編輯距離是否不超過 limit（超過時提早結束）"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char_a != char_b))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+@dataclass
+class SearchHit:
+    """搜尋結果"""
+    volume: str
+    image: str
+    element: dict
+    score: int
+
+
+class SearchIndex:
+    """多本書的記憶體內反向索引"""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = {}  # 詞元 -> 文件編號集合
+        self.vocabulary: List[str] = []  # 排序後的英文詞元（前綴 / 模糊比對用）
+        self.documents: Dict[int, tuple] = {}  # 文件編號 -> (書籍, 元素)
+        self.doc_tokens: Dict[int, Set[str]] = {}
+        self.doc_ids: Dict[int, int] = {}  # id(元素) -> 文件編號
+        self.order: Dict[int, tuple] = {}  # 文件編號 -> 排序鍵（書籍、頁面、元素順序）
+        self.next_id = 0
+
+    def add_book(self, book_data):
+        """加入整本書（同一本書重新加入時先移除舊資料）"""
+        volume = book_data.book_id
+        self.remove_volume(volume)
+        page_order = {image: index for index, image in enumerate(book_data.pages)}
+        for position, elem in enumerate(book_data.elements):
+            self.add_element(volume, elem, (volume, page_order.get(elem.get('Image'), -1), position))
+
+    def remove_volume(self, volume):
+        for doc_id in [doc_id for doc_id, (doc_volume, _) in self.documents.items() if doc_volume == volume]:
+            self._remove_doc(doc_id)
+
+    def add_element(self, volume, elem, order_key=None):
+        doc_id = self.next_id
+        self.next_id += 1
+        self.documents[doc_id] = (volume, elem)
+        self.doc_ids[id(elem)] = doc_id
+        self.order[doc_id] = order_key or (volume, -1, doc_id)
+        self._index(doc_id, element_tokens(elem))
+        return doc_id
+
+    def remove_element(self, elem):
+        doc_id = self.doc_ids.get(id(elem))
+        if doc_id is not None:
+            self._remove_doc(doc_id)
+
+    def update_element(self, elem):
+        """元素文字變更後重新建立其詞元（只更新差異）"""
+        doc_id = self.doc_ids.get(id(elem))
+        if doc_id is None:
+            return
+        old_tokens = self.doc_tokens.get(doc_id, set())
+        new_tokens = element_tokens(elem)
+        self._unindex(doc_id, old_tokens - new_tokens)
+        self._index(doc_id, new_tokens - old_tokens)
+
+    def _index(self, doc_id, tokens):
+        self.doc_tokens.setdefault(doc_id, set()).update(tokens)
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = set()
+                if not CJK_PATTERN.match(token):
+                    bisect.insort(self.vocabulary, token)
+            postings.add(doc_id)
+
+    def _unindex(self, doc_id, tokens):
+        self.doc_tokens.get(doc_id, set()).difference_update(tokens)
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                del self.postings[token]
+                index = bisect.bisect_left(self.vocabulary, token)
+                if index < len(self.vocabulary) and self.vocabulary[index] == token:
+                    del self.vocabulary[index]
+
+    def _remove_doc(self, doc_id):
+        self._unindex(doc_id, set(self.doc_tokens.get(doc_id, set())))
+        _, elem = self.documents.pop(doc_id)
+        self.doc_tokens.pop(doc_id, None)
+        self.order.pop(doc_id, None)
+        self.doc_ids.pop(id(elem), None)
+
+    def _prefix_tokens(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + '￿')
+        return self.vocabulary[start:end]
+
+    def _fuzzy_tokens(self, term):
+        limit = 1 if len(term) < 6 else 2
+        return [token for token in self.vocabulary if within_distance(term, token, limit)]
+
+    def _match_english(self, term, allow_prefix):
+        """回傳 {文件編號: 分數}"""
+        scores = {doc_id: SCORE_EXACT for doc_id in self.postings.get(term, ())}
+        if allow_prefix:
+            for token in self._prefix_tokens(term):
+                for doc_id in self.postings[token]:
+                    scores.setdefault(doc_id, SCORE_PREFIX)
+        if not scores and len(term) >= 3:
+            for token in self._fuzzy_tokens(term):
+                for doc_id in self.postings[token]:
+                    scores.setdefault(doc_id, SCORE_FUZZY)
+        return scores
+
+    def _match_chinese(self, run):
+        grams = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+        docs = None
+        for gram in sorted(grams, key=lambda gram: len(self.postings.get(gram, ()))):
+            postings = self.postings.get(gram, set())
+            docs = set(postings) if docs is None else docs & postings
+            if not docs:
+                return {}
+        return {doc_id: SCORE_EXACT for doc_id in docs}
+
+    def search(self, query, limit=MAX_RESULTS):
+        """搜尋元素，所有查詢詞都需符合，依比對方式與書中順序排序"""
+        terms = english_tokens(query)
+        matches = [self._match_english(term, allow_prefix=(i == len(terms) - 1))
+                   for i, term in enumerate(terms)]
+        matches.extend(self._match_chinese(run) for run in CJK_PATTERN.findall(query))
+        if not matches:
+            return []
+
+        matches.sort(key=len)
+        scores = dict(matches[0])
+        for match in matches[1:]:
+            scores = {doc_id: score + match[doc_id] for doc_id, score in scores.items() if doc_id in match}
+            if not scores:
+                return []
+
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], self.order[doc_id]))
+        hits = []
+        for doc_id in ranked[:limit]:
+            volume, elem = self.documents[doc_id]
+            hits.append(SearchHit(volume, elem.get('Image', ''), elem, scores[doc_id]))
+        return hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='搜尋書籍元素的 Text 與中文翻譯')
+    parser.add_argument('json_paths', nargs='+', help='書籍 JSON 檔案')
+    parser.add_argument('-q', '--query', action='append', required=True, help='查詢字串（可重複）')
+    parser.add_argument('--limit', type=int, default=20, help='每個查詢顯示的結果數')
+    args = parser.parse_args(argv)
+
+    import io
+    import contextlib
+    from src.utils.book_data import BookData
+    index = SearchIndex()
+    start = time.perf_counter()
+    for json_path in args.json_paths:
+        book_data = BookData(json_path)
+        # BookData.load 會逐筆印出座標轉換資訊，建立索引時略過
+        with contextlib.redirect_stdout(io.StringIO()):
+            loaded = book_data.load()
+        if not loaded:
+            print(f"Error loading {json_path}")
+            return 1
+        index.add_book(book_data)
+    print(f"Indexed {len(index.documents)} elements, {len(index.postings)} tokens "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for query in args.query:
+        start = time.perf_counter()
+        hits = index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{query!r}: {len(hits)} hits in {elapsed:.2f} ms")
+        for hit in hits[:args.limit]:
+            print(f"  {hit.volume} {hit.image} [{hit.element.get('Category', '')}] "
+                  f"{hit.element.get('Text', '')} / {hit.element.get('中文翻譯', '')}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
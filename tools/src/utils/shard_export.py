@@ -0,0 +1,115 @@
+"""將書籍 JSON 依頁面拆分成分片，並產生索引 (manifest)
+
+網頁閱讀器可先讀取 manifest，只下載目前頁面的分片並預先載入相鄰頁面。
+分片內容未變更時不重寫檔案，manifest 中的雜湊可供快取失效判斷。
+
+輸出結構：
+    <輸出目錄>/manifest.json
+    <輸出目錄>/page_000.json ...
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.shard_export ../assets/Book_data/V1_book_data.json [--out 目錄]
+"""
+import os
+import sys
+import json
+import glob
+import argparse
+from src.utils.file_hash import bytes_digest
+from src.utils import json_codec
+
+# 分片格式版本，閱讀器可據此判斷相容性
+SHARD_FORMAT = 1
+MANIFEST_NAME = 'manifest.json'
+
+
+def default_output_dir(json_path, book_id):
+    """預設輸出目錄：與書籍 JSON 同層的 <book_id>_pages"""
+    return os.path.join(os.path.dirname(os.path.abspath(json_path)), f"{book_id}_pages")
+
+
+def shard_name(page_index):
+    return f"page_{page_index:03d}.json"
+
+
+def encode_shard(elements):
+    """以精簡格式編碼分片（網頁傳輸用，不縮排）"""
+    return json_codec.dumps(elements, pretty=False)
+
+
+def _write_if_changed(path, data):
+    """內容不同時才以原子方式寫入，回傳是否有寫入"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return True
+
+
+def export_shards(book_data, output_dir=None):
+    """輸出每頁一個分片與 manifest，回傳 manifest 內容"""
+    output_dir = output_dir or default_output_dir(book_data.json_path, book_data.book_id)
+    os.makedirs(output_dir, exist_ok=True)
+
+    pages = []
+    written = 0
+    for page_index, (image_name, page) in enumerate(book_data.pages.items()):
+        data = encode_shard(book_data.serializable_elements(page))
+        name = shard_name(page_index)
+        if _write_if_changed(os.path.join(output_dir, name), data):
+            written += 1
+        pages.append({
+            'index': page_index,
+            'image': image_name,
+            'shard': name,
+            'elements': len(page),
+            'bytes': len(data),
+            'hash': bytes_digest(data),
+        })
+
+    # 移除已不存在頁面的舊分片
+    current = {page['shard'] for page in pages}
+    for path in glob.glob(os.path.join(output_dir, 'page_*.json')):
+        if os.path.basename(path) not in current:
+            os.remove(path)
+            print(f"Removed stale shard: {path}")
+
+    manifest = {
+        'format': SHARD_FORMAT,
+        'book_id': book_data.book_id,
+        'source': os.path.basename(book_data.json_path),
+        'total_pages': len(pages),
+        'total_elements': sum(page['elements'] for page in pages),
+        'pages': pages,
+    }
+    manifest_data = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+    _write_if_changed(os.path.join(output_dir, MANIFEST_NAME), manifest_data)
+    print(f"Exported {len(pages)} shards to {output_dir} ({written} updated)")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='將書籍 JSON 依頁面拆分成分片')
+    parser.add_argument('json_paths', nargs='+', help='書籍 JSON 檔案')
+    parser.add_argument('--out', default=None, help='輸出目錄（僅限單一檔案，預設為 <book_id>_pages）')
+    args = parser.parse_args(argv)
+    if args.out and len(args.json_paths) > 1:
+        parser.error('--out 只能搭配單一 JSON 檔案使用')
+
+    from src.utils.book_data import BookData
+    for json_path in args.json_paths:
+        book_data = BookData(json_path)
+        if not book_data.load():
+            return 1
+        export_shards(book_data, args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
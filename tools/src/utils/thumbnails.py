@@ -0,0 +1,72 @@
+"""頁面縮圖產生與磁碟快取
+
+縮圖以 JPEG 縮小解碼產生，快取鍵為圖片路徑 + 修改時間 + 檔案大小，
+圖片未變更時重新開啟即可直接使用。
+
+預先產生整冊書（於 tools 目錄下執行）：
+    python -m src.utils.thumbnails ../assets/Books/V1/*.jpg
+"""
+import os
+import io
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from src.utils.file_hash import bytes_digest
+from src.utils.disk_cache import DiskCache
+
+# 縮圖最大邊長（像素）
+THUMBNAIL_SIZE = 200
+THUMBNAIL_EXT = '.jpg'
+
+
+def thumbnail_key(image_path):
+    """以路徑、修改時間與檔案大小產生快取鍵（不讀取圖片內容）"""
+    stat = os.stat(image_path)
+    source = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{THUMBNAIL_SIZE}"
+    return bytes_digest(source.encode('utf-8'))
+
+
+def cached_thumbnail(image_path, cache=None):
+    """回傳已存在的縮圖檔路徑，尚未產生時回傳 None"""
+    cache = cache or DiskCache('thumbnails')
+    try:
+        path = cache.path_for(thumbnail_key(image_path), THUMBNAIL_EXT)
+    except OSError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def make_thumbnail(image_path, cache=None):
+    """產生（或讀取快取）縮圖，回傳縮圖檔路徑"""
+    cache = cache or DiskCache('thumbnails')
+    key = thumbnail_key(image_path)
+    path = cache.path_for(key, THUMBNAIL_EXT)
+    if os.path.exists(path):
+        return path
+
+    with Image.open(image_path) as img:
+        # JPEG 可直接以 1/2、1/4、1/8 解碼
+        img.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        img = img.convert('RGB')
+        img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=85)
+    cache.set_bytes(key, THUMBNAIL_EXT, buffer.getvalue())
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='預先產生頁面縮圖')
+    parser.add_argument('images', nargs='+', help='頁面圖片檔案')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    args = parser.parse_args(argv)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for image_path, path in zip(args.images, executor.map(make_thumbnail, args.images)):
+            print(f"{os.path.basename(image_path)}: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
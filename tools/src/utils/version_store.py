@@ -0,0 +1,267 @@
+"""書籍 JSON 的版本歷史
+
+每次保存時將各頁元素編碼成一個區塊 (chunk)，以內容雜湊命名存放，未變更的頁面
+沿用既有區塊，因此保留大量版本也只佔用變更部分的空間。版本紀錄只包含
+各頁的區塊雜湊與元素順序，可快速還原或比較任意兩個版本。
+
+同一個 VersionStore 連續記錄時，最新版本與各頁內容保留在記憶體中：只有標記為
+變更（或內容與上一版不同）的頁面才重新編碼與計算雜湊，也不需重新讀取整個 log。
+
+存放位置（與書籍 JSON 同層的隱藏目錄，不會被打包進 Flutter 資源）：
+    <JSON 目錄>/.versions/<JSON 檔名>/log.jsonl          每行一個版本
+    <JSON 目錄>/.versions/<JSON 檔名>/objects/ab/cdef...  zlib 壓縮的頁面區塊
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.version_store ../assets/Book_data/V1_book_data.json list
+    python -m src.utils.version_store ../assets/Book_data/V1_book_data.json diff 3 5
+    python -m src.utils.version_store ../assets/Book_data/V1_book_data.json restore 3
+"""
+import os
+import sys
+import json
+import zlib
+import argparse
+from datetime import datetime
+from src.utils import json_codec
+from src.utils.file_hash import bytes_digest
+
+VERSIONS_DIR = '.versions'
+LOG_NAME = 'log.jsonl'
+
+
+def _file_stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class VersionStore:
+    """以頁面區塊去重的版本歷史"""
+
+    def __init__(self, json_path, root=None):
+        self.json_path = json_path
+        directory = root or os.path.join(os.path.dirname(os.path.abspath(json_path)), VERSIONS_DIR)
+        self.directory = os.path.join(directory, os.path.basename(json_path))
+        self.log_path = os.path.join(self.directory, LOG_NAME)
+        self._head = None  # 最新版本紀錄
+        self._head_stat = None  # 讀取 / 寫入最新版本時 log 的 (大小, 修改時間)，用來偵測其他程式寫入
+        self._groups = {}  # 圖片名稱 -> 本物件最近一次記錄時該頁的元素
+        self._json_stat = None  # 最近一次記錄後 JSON 檔案的 (大小, 修改時間)
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest[2:])
+
+    def _write_object(self, data):
+        """寫入區塊（已存在時略過），回傳雜湊"""
+        digest = bytes_digest(data)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(zlib.compress(data))
+            os.replace(temp_path, path)
+        return digest
+
+    def _read_object(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return json_codec.loads(zlib.decompress(f.read()))
+
+    def versions(self):
+        """回傳所有版本紀錄（由舊到新）"""
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except OSError:
+            return []
+
+    def _log_stat(self):
+        return _file_stat(self.log_path)
+
+    def json_changed(self):
+        """JSON 檔案在最近一次記錄後是否被其他途徑寫入（此時變更頁面的提示不可靠）"""
+        return self._json_stat is None or _file_stat(self.json_path) != self._json_stat
+
+    def _read_last_line(self):
+        """只從檔尾讀取 log 的最後一行"""
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                chunk = 4096
+                while True:
+                    start = max(0, size - chunk)
+                    f.seek(start)
+                    lines = f.read().splitlines()
+                    lines = [line for line in lines if line.strip()]
+                    # 讀到的第一行可能不完整，除非已讀到檔頭
+                    if len(lines) > 1 or start == 0:
+                        return lines[-1].decode('utf-8') if lines else None
+                    chunk *= 2
+        except OSError:
+            return None
+
+    def head(self):
+        """最新版本紀錄（沒有時為 None）；log 未被其他程式變更時直接使用記憶體中的紀錄"""
+        stat = self._log_stat()
+        if self._head_stat is None or stat != self._head_stat:
+            line = self._read_last_line()
+            self._head = json.loads(line) if line else None
+            self._head_stat = stat
+            # 最新版本不是本物件記錄的，各頁內容需重新比對
+            self._groups = {}
+        return self._head
+
+    def get_version(self, version_id):
+        for version in self.versions():
+            if version['id'] == version_id:
+                return version
+        raise ValueError(f"Version not found: {version_id}")
+
+    def commit(self, elements, label='', dirty_pages=None):
+        """記錄一個版本，內容與最新版本相同時不記錄並回傳 None
+
+        dirty_pages 為上次記錄後有變更的圖片名稱；提供時其餘頁面直接沿用上一版的區塊，
+        未提供時以元素內容比對找出變更的頁面。傳入的元素記錄後不可再就地修改
+        （自動保存傳入的是快照）。
+        """
+        # 依頁面分組，並以 (頁面索引, 連續數量) 記錄元素在檔案中的順序
+        pages, groups, layout = {}, [], []
+        for elem in elements:
+            image = elem.get('Image', '')
+            if image not in pages:
+                pages[image] = len(groups)
+                groups.append([])
+            page_index = pages[image]
+            groups[page_index].append(elem)
+            if layout and layout[-1][0] == page_index:
+                layout[-1][1] += 1
+            else:
+                layout.append([page_index, 1])
+
+        head = self.head()
+        previous = dict(head['pages']) if head else {}
+        chunks = []
+        for image, group in zip(pages, groups):
+            digest = previous.get(image)
+            known = self._groups.get(image)
+            if digest is None or known is None or (
+                    image in dirty_pages if dirty_pages is not None else known != group):
+                digest = self._write_object(json_codec.dumps(group, pretty=False))
+            chunks.append([image, digest])
+        if head and head['pages'] == chunks and head['layout'] == layout:
+            self._groups = dict(zip(pages, groups))
+            self._json_stat = _file_stat(self.json_path)
+            return None
+
+        version = {
+            'id': head['id'] + 1 if head else 1,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'label': label,
+            'elements': len(elements),
+            'pages': chunks,
+            'layout': layout,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(version, ensure_ascii=False) + '\n')
+        self._head = version
+        self._head_stat = self._log_stat()
+        # 寫入成功後才更新各頁內容，失敗時下次重新比對
+        self._groups = dict(zip(pages, groups))
+        self._json_stat = _file_stat(self.json_path)
+        return version
+
+    def load_pages(self, version_id):
+        """回傳指定版本的 {圖片名稱: 元素列表}"""
+        version = self.get_version(version_id)
+        return {image: self._read_object(digest) for image, digest in version['pages']}
+
+    def load(self, version_id):
+        """回傳指定版本的完整元素列表（順序與保存時相同）"""
+        version = self.get_version(version_id)
+        groups = [self._read_object(digest) for _, digest in version['pages']]
+        positions = [0] * len(groups)
+        elements = []
+        for page_index, count in version['layout']:
+            start = positions[page_index]
+            elements.extend(groups[page_index][start:start + count])
+            positions[page_index] = start + count
+        return elements
+
+    def restore(self, version_id, json_path=None):
+        """將指定版本寫回 JSON 檔案，回傳寫入的路徑"""
+        json_path = json_path or self.json_path
+        temp_path = json_path + '.tmp'
+        json_codec.dump(self.load(version_id), temp_path)
+        os.replace(temp_path, json_path)
+        return json_path
+
+    def diff(self, old_id, new_id):
+        """比較兩個版本，只讀取區塊不同的頁面，回傳 [(圖片名稱, 狀態, [(元素索引, [變更欄位])])]"""
+        old_pages = dict(self.get_version(old_id)['pages'])
+        new_pages = dict(self.get_version(new_id)['pages'])
+        result = []
+        for image in list(old_pages) + [image for image in new_pages if image not in old_pages]:
+            if image not in new_pages:
+                result.append((image, 'removed', []))
+            elif image not in old_pages:
+                result.append((image, 'added', []))
+            elif old_pages[image] != new_pages[image]:
+                old_elements = self._read_object(old_pages[image])
+                new_elements = self._read_object(new_pages[image])
+                changes = []
+                for index in range(max(len(old_elements), len(new_elements))):
+                    old_elem = old_elements[index] if index < len(old_elements) else {}
+                    new_elem = new_elements[index] if index < len(new_elements) else {}
+                    keys = [key for key in {**old_elem, **new_elem} if old_elem.get(key) != new_elem.get(key)]
+                    if keys:
+                        changes.append((index, keys))
+                result.append((image, 'changed', changes))
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='書籍 JSON 的版本歷史')
+    parser.add_argument('json_path', help='書籍 JSON 檔案')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='列出所有版本')
+    commit_parser = subparsers.add_parser('commit', help='記錄目前的檔案內容')
+    commit_parser.add_argument('--label', default='', help='版本說明')
+    diff_parser = subparsers.add_parser('diff', help='比較兩個版本')
+    diff_parser.add_argument('old_id', type=int)
+    diff_parser.add_argument('new_id', type=int)
+    restore_parser = subparsers.add_parser('restore', help='還原指定版本')
+    restore_parser.add_argument('version_id', type=int)
+    args = parser.parse_args(argv)
+
+    store = VersionStore(args.json_path)
+    try:
+        if args.command == 'list':
+            for version in store.versions():
+                print(f"{version['id']:>4}  {version['time']}  {version['elements']:>5} elements  {version['label']}")
+        elif args.command == 'commit':
+            version = store.commit(json_codec.load(args.json_path), args.label)
+            print(f"Recorded version {version['id']}" if version else "No changes since the last version")
+        elif args.command == 'diff':
+            for image, status, changes in store.diff(args.old_id, args.new_id):
+                print(f"{image}: {status}")
+                for index, keys in changes:
+                    print(f"  [{index}] {', '.join(keys)}")
+        elif args.command == 'restore':
+            # 還原前先記錄目前內容，還原本身也可以再還原
+            if os.path.exists(args.json_path):
+                store.commit(json_codec.load(args.json_path), '還原前')
+            store.restore(args.version_id)
+            store.commit(store.load(args.version_id), f'還原版本 {args.version_id}')
+            print(f"Restored version {args.version_id} to {args.json_path}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""以句子音檔的停頓切出單字音檔
+
+對每個 Sentence 元素的英文音檔，以 soundfile 分段串流讀取，用向量化的短時能量找出
+字與字之間的停頓；句子框內的 Word 元素依閱讀順序排列，以框的寬度估計每個字的
+長度，選出與估計位置最接近、且停頓最明顯的切點（動態規劃），再以行程池平行輸出
+每個字的音檔與切點報告，供人工試聽後採用。同名單字音檔由第一個切割成功的句子
+輸出；無法解碼或停頓不足的句子記錄在報告中，不影響其他句子。
+
+命令列執行（於 tools 目錄下）：
+    python -m src.utils.word_segments ../assets/Book_data/V1_book_data.json ../assets/audio 輸出目錄 [--pages 3 7]
+
+輸出結構：
+    <輸出目錄>/en_<單字>.mp3
+    <輸出目錄>/segments.json    每個句子的切點（秒）與對應的單字
+"""
+import os
+import re
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import soundfile as sf
+
+# 短時能量的音框長度（秒）
+FRAME_SECONDS = 0.01
+# 每次串流讀取的音框數
+BLOCK_FRAMES = 512
+# 低於最大能量多少 dB 視為靜音
+SILENCE_DB = 35.0
+# 視為字間停頓的最短長度（秒）
+MIN_PAUSE = 0.04
+# 切點前後保留的長度（秒）與淡入淡出長度（秒）
+PAD_SECONDS = 0.03
+FADE_SECONDS = 0.005
+# 找能量局部最小值前的平滑長度（秒）
+SMOOTH_SECONDS = 0.05
+# 停頓長度在切點評分中的權重（相對於與估計位置的距離）
+PAUSE_WEIGHT = 0.5
+
+
+def frame_energy(path, frame_seconds=FRAME_SECONDS):
+    """分段讀取音檔，回傳 (每個音框的能量 dB, 音框秒數, 取樣率)"""
+    info = sf.info(path)
+    hop = max(1, int(round(info.samplerate * frame_seconds)))
+    energies = []
+    carry = np.zeros(0, dtype=np.float32)
+    for block in sf.blocks(path, blocksize=hop * BLOCK_FRAMES, dtype='float32', always_2d=True):
+        samples = np.concatenate([carry, block.mean(axis=1)])
+        usable = len(samples) - len(samples) % hop
+        frames = samples[:usable].reshape(-1, hop)
+        energies.append(np.mean(frames * frames, axis=1))
+        carry = samples[usable:]
+    if len(carry):
+        energies.append(np.array([np.mean(carry * carry)], dtype=np.float32))
+    energy = np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+    return 10 * np.log10(energy + 1e-10), hop / info.samplerate, info.samplerate
+
+
+def find_pauses(energy_db, frame_seconds, silence_db=SILENCE_DB, min_pause=MIN_PAUSE):
+    """回傳 (有聲範圍 (開始, 結束) 秒, 句中停頓 [(開始, 結束)] 秒)"""
+    if not len(energy_db):
+        return (0.0, 0.0), []
+    silent = energy_db < energy_db.max() - silence_db
+    voiced = np.flatnonzero(~silent)
+    if not len(voiced):
+        return (0.0, len(energy_db) * frame_seconds), []
+    first, last = voiced[0], voiced[-1] + 1
+    # 有聲範圍內的靜音連續區段
+    inner = np.concatenate([[False], silent[first:last], [False]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(inner))
+    starts, ends = edges[0::2] + first, edges[1::2] + first
+    keep = (ends - starts) * frame_seconds >= min_pause
+    pauses = [(start * frame_seconds, end * frame_seconds) for start, end in zip(starts[keep], ends[keep])]
+    return (first * frame_seconds, last * frame_seconds), pauses
+
+
+def local_minima(energy_db, frame_seconds, span):
+    """有聲範圍內的能量局部最小值（停頓不足時的備用切點，先以 50 毫秒平滑）"""
+    start, end = (int(round(value / frame_seconds)) for value in span)
+    width = max(1, int(round(SMOOTH_SECONDS / frame_seconds)))
+    segment = np.convolve(energy_db[start:end], np.ones(width) / width, mode='same')
+    if len(segment) < 3:
+        return []
+    rows = np.flatnonzero((segment[1:-1] <= segment[:-2]) & (segment[1:-1] <= segment[2:])) + 1
+    return [((start + row) * frame_seconds, (start + row) * frame_seconds) for row in rows]
+
+
+def choose_cuts(candidates, targets, duration):
+    """從候選停頓中依序選出 len(targets) 個切點，使與估計位置的距離小、停頓長（動態規劃）"""
+    count = len(targets)
+    if count == 0:
+        return []
+    if len(candidates) < count:
+        return None
+    centers = np.array([(start + end) / 2 for start, end in candidates])
+    lengths = np.array([end - start for start, end in candidates])
+    # cost[i, j]：第 i 個切點使用第 j 個候選
+    cost = np.abs(centers[None, :] - np.asarray(targets)[:, None]) / max(duration, 1e-6) \
+        - PAUSE_WEIGHT * np.minimum(lengths, 0.3)[None, :] / 0.3
+    best = np.full(cost.shape, np.inf)
+    choice = np.zeros(cost.shape, dtype=np.int64)
+    best[0] = cost[0]
+    for i in range(1, count):
+        # 前一個切點必須使用更早的候選
+        running = np.minimum.accumulate(best[i - 1])
+        argmin = np.maximum.accumulate(np.where(best[i - 1] == running, np.arange(len(candidates)), 0))
+        best[i, 1:] = cost[i, 1:] + running[:-1]
+        choice[i, 1:] = argmin[:-1]
+    j = int(np.argmin(best[-1]))
+    picked = [j]
+    for i in range(count - 1, 0, -1):
+        j = int(choice[i, j])
+        picked.append(j)
+    return [candidates[j] for j in reversed(picked)]
+
+
+def segment_words(path, weights):
+    """依單字的相對長度估計切開句子音檔，回傳每個字的 (開始, 結束) 秒"""
+    energy_db, frame_seconds, _ = frame_energy(path)
+    (speech_start, speech_end), pauses = find_pauses(energy_db, frame_seconds)
+    duration = speech_end - speech_start
+    fractions = np.cumsum(weights)[:-1] / np.sum(weights)
+    targets = speech_start + fractions * duration
+    cuts = choose_cuts(pauses, targets, duration)
+    if cuts is None:
+        # 停頓不足，加入能量局部最小值作為候選
+        candidates = sorted(set(pauses) | set(local_minima(energy_db, frame_seconds, (speech_start, speech_end))))
+        cuts = choose_cuts(candidates, targets, duration)
+    if cuts is None:
+        return None
+    bounds = [speech_start - PAD_SECONDS] + [value for start, end in cuts
+                                             for value in (start + PAD_SECONDS, end - PAD_SECONDS)] \
+        + [speech_end + PAD_SECONDS]
+    return [(round(max(0.0, bounds[i]), 3), round(bounds[i + 1], 3)) for i in range(0, len(bounds), 2)]
+
+
+def write_clip(source_path, start, end, output_path):
+    """只讀取需要的範圍，加上淡入淡出後輸出 MP3"""
+    info = sf.info(source_path)
+    data, rate = sf.read(source_path, start=int(start * info.samplerate),
+                         stop=min(info.frames, int(end * info.samplerate)), dtype='float32', always_2d=True)
+    fade = min(len(data) // 2, int(FADE_SECONDS * rate))
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)[:, None]
+        data[:fade] *= ramp
+        data[-fade:] *= ramp[::-1]
+    temp_path = f"{output_path}.tmp"
+    sf.write(temp_path, data, rate, format='MP3', subtype='MPEG_LAYER_III')
+    os.replace(temp_path, output_path)
+
+
+def segment_sentence(job):
+    """計算一個句子的切點（供行程池使用），回傳切點報告；失敗時在報告中記錄錯誤"""
+    source_path, words = job
+    report = {'source': os.path.basename(source_path), 'words': []}
+    try:
+        spans = segment_words(source_path, [weight for _, _, weight in words])
+    except Exception as e:
+        # 無法解碼的音檔只影響這個句子
+        report['error'] = f"無法讀取音檔：{str(e)}"
+        return report
+    if spans is None:
+        report['error'] = '停頓數量不足，無法切開'
+        return report
+    report['words'] = [{'text': text, 'file': name, 'start': start, 'end': end, 'written': False}
+                       for (text, name, _), (start, end) in zip(words, spans)]
+    return report
+
+
+def assign_clips(reports, output_dir, overwrite=False):
+    """同名單字音檔由第一個切割成功且包含該字的句子輸出，標記在報告的 written 欄位"""
+    assigned = set()
+    for report in reports:
+        if 'error' in report:
+            continue
+        for word in report['words']:
+            if word['file'] in assigned:
+                continue
+            assigned.add(word['file'])
+            word['written'] = overwrite or not os.path.exists(os.path.join(output_dir, word['file']))
+
+
+def write_clips(job):
+    """輸出一個句子中指定的單字音檔（供行程池使用），回傳 (已輸出的檔名, 錯誤訊息或 None)"""
+    source_path, clips, output_dir = job
+    written = []
+    try:
+        for name, start, end in clips:
+            write_clip(source_path, start, end, os.path.join(output_dir, name))
+            written.append(name)
+    except Exception as e:
+        return written, str(e)
+    return written, None
+
+
+def clip_name(text):
+    """與既有音檔相同的命名：en_<小寫單字>.mp3"""
+    stem = re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+    return f"en_{stem}.mp3" if stem else None
+
+
+def sentence_words(book_data, view):
+    """句子框內（以中心點判斷）的 Word 元素，依閱讀順序排列"""
+    x1, y1, x2, y2 = view.box
+    words = [word for word in book_data.query().page(view.page).category('Word').intersects(x1, y1, x2, y2)
+             if x1 <= (word.box[0] + word.box[2]) / 2 <= x2 and y1 <= (word.box[1] + word.box[3]) / 2 <= y2]
+    if not words:
+        return []
+    # 中心點高度差小於半個字高的視為同一行
+    words.sort(key=lambda word: word.box[1] + word.box[3])
+    line_height = np.median([word.box[3] - word.box[1] for word in words])
+    lines, line_top = [], None
+    for word in words:
+        center = (word.box[1] + word.box[3]) / 2
+        if line_top is None or center - line_top > line_height / 2:
+            lines.append([])
+            line_top = center
+        lines[-1].append(word)
+    return [word for line in lines for word in sorted(line, key=lambda word: word.box[0])]
+
+
+def build_jobs(book_data, audio_root, pages=None):
+    """每個有音檔且包含兩個以上單字的句子一個工作：(句子音檔路徑, [(單字, 音檔名稱, 寬度)])"""
+    query = book_data.query().category('Sentence').has_coords()
+    if pages:
+        query = query.pages(*pages)
+    jobs = []
+    for view in query:
+        name = view.get('English_Audio_File')
+        source_path = os.path.join(audio_root, 'en', book_data.book_id, name) if name else None
+        if not source_path or not os.path.exists(source_path):
+            continue
+        words = []
+        for word in sentence_words(book_data, view):
+            name = clip_name(word.get('Text', ''))
+            if name:
+                words.append((word.get('Text', ''), name, word.box[2] - word.box[0]))
+        if len(words) >= 2:
+            jobs.append((source_path, words))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='以句子音檔的停頓切出單字音檔')
+    parser.add_argument('json_path', help='書籍 JSON 檔案')
+    parser.add_argument('audio_root', help='音檔根目錄（包含 en 子目錄）')
+    parser.add_argument('output_dir', help='輸出目錄')
+    parser.add_argument('--pages', type=int, nargs=2, default=None, metavar=('START', 'STOP'),
+                        help='頁面範圍（從 1 開始，皆包含）')
+    parser.add_argument('--overwrite', action='store_true', help='覆寫輸出目錄中已存在的音檔')
+    parser.add_argument('--workers', type=int, default=None, help='行程數量')
+    args = parser.parse_args(argv)
+
+    import io
+    import contextlib
+    from src.utils.book_data import BookData
+    book_data = BookData(args.json_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded = book_data.load()
+    if not loaded:
+        print(f"Error loading {args.json_path}")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    pages = (args.pages[0] - 1, args.pages[1] - 1) if args.pages else None
+    jobs = build_jobs(book_data, args.audio_root, pages)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        # 先切割所有句子，再只從切割成功的句子分配要輸出的單字音檔
+        reports = list(executor.map(segment_sentence, jobs))
+        assign_clips(reports, args.output_dir, args.overwrite)
+        write_jobs = [(source_path, [(word['file'], word['start'], word['end'])
+                                     for word in report['words'] if word['written']], args.output_dir)
+                      for (source_path, _), report in zip(jobs, reports)]
+        for report, (written, error) in zip(reports, executor.map(write_clips, write_jobs)):
+            for word in report['words']:
+                word['written'] = word['file'] in written
+            if error:
+                report['write_error'] = error
+    for report in reports:
+        if 'error' in report:
+            print(f"{report['source']}: {report['error']}")
+            continue
+        print(f"{report['source']}: " + ' | '.join(
+            f"{word['text']} {word['start']:.2f}-{word['end']:.2f}" for word in report['words']))
+        if 'write_error' in report:
+            print(f"  error writing clips: {report['write_error']}")
+    with open(os.path.join(args.output_dir, 'segments.json'), 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+    written = sum(word['written'] for report in reports for word in report['words'])
+    failed = sum('error' in report for report in reports)
+    write_failed = sum('write_error' in report for report in reports)
+    print(f"Segmented {len(reports) - failed} sentences ({failed} failed), wrote {written} word clips"
+          + (f" ({write_failed} sentences with write errors)" if write_failed else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
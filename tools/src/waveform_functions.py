@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QTimer
+from src.utils.peak_pyramid import pyramid_key, cached_pyramid, load_pyramid
+
+
+class WaveformFunctions:
+    # 記憶體中保留的金字塔數量（切換元素時不需再讀取磁碟快取）
+    MEMORY_LIMIT = 128
+
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pyramids = OrderedDict()  # 快取鍵 -> PeakPyramid
+        self.futures = {}  # 快取鍵 -> Future
+        self.current_key = None  # 目前要顯示的音檔
+
+        # 定期檢查背景計算是否完成
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(100)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def show_element(self, element):
+        """顯示元素英文音檔的波形"""
+        view = self.main_window.waveform_view
+        self.current_key = None
+        audio_file = element.get("audioFile", element.get("English_Audio_File")) if element else None
+        if not audio_file:
+            view.set_message('未選擇' if not element else '未設置音檔')
+            return
+        audio_path, _ = self.main_window.audio_functions.find_audio_path(audio_file)
+        if not audio_path:
+            view.set_message(f'音檔不存在: {audio_file}')
+            return
+        self.show_path(audio_path)
+
+    def show_path(self, audio_path):
+        """已快取時立即顯示，否則在背景執行緒計算"""
+        view = self.main_window.waveform_view
+        try:
+            key = pyramid_key(audio_path)
+        except OSError as e:
+            view.set_message(f'無法讀取音檔: {str(e)}')
+            return
+        self.current_key = key
+
+        pyramid = self.pyramids.get(key) or cached_pyramid(audio_path)
+        if pyramid is not None:
+            self.remember(key, pyramid)
+            view.set_pyramid(pyramid)
+            return
+
+        if key not in self.futures:
+            self.futures[key] = self.executor.submit(load_pyramid, audio_path)
+        view.set_message('波形計算中…')
+        self.poll_timer.start()
+
+    def remember(self, key, pyramid):
+        self.pyramids[key] = pyramid
+        self.pyramids.move_to_end(key)
+        while len(self.pyramids) > self.MEMORY_LIMIT:
+            self.pyramids.popitem(last=False)
+
+    def poll(self):
+        """保存已完成的金字塔，若仍是目前選取的音檔則顯示"""
+        for key, future in list(self.futures.items()):
+            if not future.done():
+                continue
+            del self.futures[key]
+            try:
+                pyramid = future.result()
+            except Exception as e:
+                print(f"Error building waveform: {str(e)}")
+                if key == self.current_key:
+                    self.main_window.waveform_view.set_message('無法讀取音檔')
+                continue
+            self.remember(key, pyramid)
+            if key == self.current_key:
+                self.main_window.waveform_view.set_pyramid(pyramid)
+        if not self.futures:
+            self.poll_timer.stop()
+
+    def shutdown(self):
+        """取消尚未開始的計算並結束背景執行緒"""
+        self.poll_timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.futures = {}
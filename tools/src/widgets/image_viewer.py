@@ -1,17 +1,36 @@
+import os
+import math
+import numpy as np
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QRectF, QPointF, pyqtSignal
-from PyQt5.QtGui import QPainter, QImage, QColor, QPen, QBrush, QCursor
-from src.utils.history_manager import HistoryManager, HistoryAction
+from PyQt5.QtCore import Qt, QRectF, QPointF, QSize, QSizeF, pyqtSignal
+from PyQt5.QtGui import QPainter, QImageReader, QColor, QPen, QBrush, QCursor
+from src.utils.history_manager import HistoryManager, HistoryAction, GroupHistoryAction
+from src.utils import group_transform
+
+# JPEG 可依 DCT 縮放直接解碼的倍率（由小到大的解析度）
+DECODE_FACTORS = (8, 4, 2, 1)
+
+# 各控制點移動的邊（供邊緣吸附）
+RESIZE_EDGES = {
+    'topLeft': ('left', 'top'),
+    'topRight': ('right', 'top'),
+    'bottomRight': ('right', 'bottom'),
+    'bottomLeft': ('left', 'bottom'),
+}
 
 class ImageViewer(QWidget):
     regionSelected = pyqtSignal(object)
     regionMoved = pyqtSignal(object)
     regionResized = pyqtSignal(object)
     newRegionCreated = pyqtSignal(QRectF)
+    regionsTransformed = pyqtSignal(list)  # 多選文字框一起變換（拖曳、對齊、縮放、復原）後發出一次
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.image = None
+        self.image_path = None
+        self.image_size = QSize()  # 原始圖片尺寸（所有座標計算皆以此為準）
+        self.decode_factor = 1  # 目前解碼的縮小倍率
         self.current_scale = 1.0
         self.regions = []
         self.selected_region = None
@@ -28,9 +47,20 @@ class ImageViewer(QWidget):
         self.drawing_start_pos = None
         self.current_drawing_rect = None
         self.is_add_mode = False  # 用於標記是否處於新增模式
+        self.overlays = {}  # 疊加圖層：名稱 -> {'rects': [...], 'color': QColor}
+        self.proposals = []  # 新增模式下可點選的自動偵測文字框
+        self.ink_integral = None  # 目前頁面的墨跡積分影像（供邊緣吸附）
+        self.snap_enabled = False
+        self.selected_regions = []  # 編輯模式下的多選文字框（Shift 點選或框選）
+        self.rubber_band_start = None
+        self.rubber_band_rect = None
+        self.group_original = None  # 群組拖曳開始時的 (n, 4) 座標
+        self.history = HistoryManager()
         
         # 設置接受滑鼠追蹤
         self.setMouseTracking(True)
+        # 點擊後可接收鍵盤（復原 / 重做、方向鍵微調）
+        self.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
         
     def get_control_point(self, rect, pos, point_size=12):
         """檢查是否點擊到控制點，返回控制點位置"""
@@ -47,25 +77,64 @@ class ImageViewer(QWidget):
         return None
         
     def load_image(self, image_path):
-        """載入圖片並自動調整縮放比例"""
-        self.image = QImage(image_path)
-        if self.image.isNull():
+        """載入圖片並自動調整縮放比例（依縮放比例以縮小解析度解碼）"""
+        self.ink_integral = None  # 新頁面的積分影像由背景建立後再設置
+        self.history.clear()  # 歷史記錄以文字框 ID 對應，只在同一頁內有效
+        self.image = None
+        # 只讀取檔頭取得原始尺寸
+        size = QImageReader(image_path).size()
+        if not size.isValid():
             print(f'Failed to load image: {image_path}')
+            self.image_path = None
+            self.image_size = QSize()
             return
+        self.image_path = image_path
+        self.image_size = size
             
         # 計算適當的縮放比例
         self.calculate_initial_scale()
         self.image_offset = QPointF(0, 0)  # 重置偏移量
+        self.ensure_resolution()
         self.update()
         
+    def required_decode_factor(self):
+        """目前縮放比例下仍足夠清晰的最大縮小倍率"""
+        display_scale = self.current_scale * self.devicePixelRatioF()
+        for factor in DECODE_FACTORS:
+            if display_scale * factor <= 1.0:
+                return factor
+        return 1
+        
+    def ensure_resolution(self):
+        """解碼解析度不足時重新解碼（只往較高解析度升級）"""
+        if not self.image_path:
+            return
+        factor = self.required_decode_factor()
+        if self.image is not None and self.decode_factor <= factor:
+            return
+            
+        reader = QImageReader(self.image_path)
+        if factor > 1:
+            # JPEG 外掛會以 DCT 縮放直接解碼出較小的圖片
+            reader.setScaledSize(QSize(math.ceil(self.image_size.width() / factor),
+                                       math.ceil(self.image_size.height() / factor)))
+        image = reader.read()
+        if image.isNull():
+            print(f'Failed to load image: {self.image_path} ({reader.errorString()})')
+            return
+        self.image = image
+        self.decode_factor = factor
+        print(f'Decoded {os.path.basename(self.image_path)} at 1/{factor}: '
+              f'{image.width()}x{image.height()}')
+        
     def calculate_initial_scale(self):
         """計算適合視窗的初始縮放比例"""
-        if not self.image or not self.width() or not self.height():
+        if self.image_size.isEmpty() or not self.width() or not self.height():
             return
             
         # 計算寬度和高度的縮放比例
-        scale_w = self.width() / self.image.width()
-        scale_h = self.height() / self.image.height()
+        scale_w = self.width() / self.image_size.width()
+        scale_h = self.height() / self.image_size.height()
         
         # 使用較小的縮放比例以確保圖片完全顯示
         self.current_scale = min(scale_w, scale_h) * 0.9  # 留些邊距
@@ -75,10 +144,12 @@ class ImageViewer(QWidget):
         """視窗大小改變時重新計算縮放比例"""
         super().resizeEvent(event)
         self.calculate_initial_scale()
+        self.ensure_resolution()
         
     def set_regions(self, regions):
         """設置文字框列表"""
         self.regions = regions
+        self.selected_regions = []
         # 保持選中狀態
         if self.selected_region and self.selected_region.get('new_created', False):
             self.regions.append(self.selected_region)
@@ -113,6 +184,149 @@ class ImageViewer(QWidget):
         self.update()
         return region
         
+    def selection(self):
+        """目前選取的文字框（多選時為整組）"""
+        if self.selected_regions:
+            return list(self.selected_regions)
+        return [self.selected_region] if self.selected_region else []
+        
+    def is_region_selected(self, region):
+        return any(region is selected for selected in self.selected_regions)
+        
+    def _apply_boxes(self, regions, boxes):
+        for region, rect in zip(regions, group_transform.boxes_to_rects(boxes)):
+            region['rect'] = rect
+        self.update()
+        
+    def transform_selection(self, action_type, transform):
+        """對選取的文字框套用一次陣列變換，記錄為一個歷史操作"""
+        regions = [region for region in self.selection() if region.get('rect') is not None]
+        if not regions or self.is_add_mode:
+            return False
+        old_boxes = group_transform.rects_to_boxes([region['rect'] for region in regions])
+        new_boxes = np.rint(transform(old_boxes))
+        if np.array_equal(old_boxes, new_boxes):
+            return False
+        self._apply_boxes(regions, new_boxes)
+        self.history.add_action(GroupHistoryAction(
+            action_type, [region.get('id') for region in regions], old_boxes, new_boxes))
+        self.regionsTransformed.emit(regions)
+        return True
+        
+    def translate_selection(self, dx, dy):
+        return self.transform_selection('move', lambda boxes: group_transform.translate(boxes, dx, dy))
+        
+    def scale_selection(self, factor):
+        return self.transform_selection('scale', lambda boxes: group_transform.scale(boxes, factor))
+        
+    def align_selection(self, edge):
+        return self.transform_selection(f'align_{edge}', lambda boxes: group_transform.align(boxes, edge))
+        
+    def undo(self):
+        action = self.history.undo()
+        if action:
+            self._apply_history(action, action.old_boxes if isinstance(action, GroupHistoryAction) else action.old_rect)
+        return action is not None
+        
+    def redo(self):
+        action = self.history.redo()
+        if action:
+            self._apply_history(action, action.new_boxes if isinstance(action, GroupHistoryAction) else action.new_rect)
+        return action is not None
+        
+    def _apply_history(self, action, value):
+        """將歷史操作的座標套用回目前頁面的文字框"""
+        regions_by_id = {region.get('id'): region for region in self.regions}
+        if isinstance(action, GroupHistoryAction):
+            pairs = [(regions_by_id[region_id], row) for row, region_id in enumerate(action.region_ids)
+                     if region_id in regions_by_id]
+            if not pairs:
+                return
+            regions = [region for region, _ in pairs]
+            self._apply_boxes(regions, value[[row for _, row in pairs]])
+            self.regionsTransformed.emit(regions)
+            return
+        region = regions_by_id.get(action.region_id)
+        if region is None:
+            return
+        region['rect'] = QRectF(value)
+        self.update()
+        if action.action_type == 'resize':
+            self.regionResized.emit(region)
+        else:
+            self.regionMoved.emit(region)
+        
+    def keyPressEvent(self, event):
+        """Ctrl+Z 復原、Ctrl+Y / Ctrl+Shift+Z 重做、方向鍵微調選取的文字框"""
+        key = event.key()
+        modifiers = event.modifiers()
+        if modifiers & Qt.ControlModifier and key == Qt.Key_Z:
+            self.redo() if modifiers & Qt.ShiftModifier else self.undo()
+        elif modifiers & Qt.ControlModifier and key == Qt.Key_Y:
+            self.redo()
+        elif key in (Qt.Key_Left, Qt.Key_Right, Qt.Key_Up, Qt.Key_Down) and not self.is_add_mode:
+            step = 10 if modifiers & Qt.ShiftModifier else 1
+            dx = {Qt.Key_Left: -step, Qt.Key_Right: step}.get(key, 0)
+            dy = {Qt.Key_Up: -step, Qt.Key_Down: step}.get(key, 0)
+            self.translate_selection(dx, dy)
+        elif key == Qt.Key_Escape and self.selected_regions:
+            self.selected_regions = []
+            self.update()
+        else:
+            super().keyPressEvent(event)
+            return
+        event.accept()
+        
+    def center_on(self, rect):
+        """平移圖片使指定的圖片矩形位於畫面中央"""
+        center = rect.center()
+        self.image_offset = QPointF(
+            self.width() / 2 - center.x() * self.current_scale
+            - (self.width() - self.image_size.width() * self.current_scale) // 2,
+            self.height() / 2 - center.y() * self.current_scale
+            - (self.height() - self.image_size.height() * self.current_scale) // 2
+        )
+        self.update()
+        
+    def set_overlay(self, name, rects, color):
+        """設置疊加圖層（以虛線顯示，不可選取）"""
+        self.overlays[name] = {'rects': list(rects), 'color': QColor(color)}
+        self.update()
+        
+    def clear_overlay(self, name):
+        """清除疊加圖層"""
+        if self.overlays.pop(name, None) is not None:
+            self.update()
+        
+    def set_proposals(self, rects):
+        """設置自動偵測的候選文字框（新增模式下點選即可建立文字框）"""
+        self.proposals = list(rects)
+        if self.proposals:
+            self.set_overlay('proposals', self.proposals, QColor(0, 160, 255))
+        else:
+            self.clear_overlay('proposals')
+        
+    def proposal_at(self, pos):
+        """回傳螢幕座標 pos 所在的候選框（取面積最小者）"""
+        image_pos = self.screen_to_image_coords(pos)
+        hits = [rect for rect in self.proposals if rect.contains(image_pos)]
+        if not hits:
+            return None
+        return min(hits, key=lambda rect: rect.width() * rect.height())
+        
+    def set_ink_integral(self, ink_integral):
+        """設置目前頁面的墨跡積分影像"""
+        self.ink_integral = ink_integral
+        
+    def snap_rect(self, rect, edges):
+        """將文字框指定的邊吸附到附近的墨跡邊界"""
+        if not self.snap_enabled or self.ink_integral is None:
+            return rect
+        x1, y1, x2, y2 = self.ink_integral.snap_rect(
+            rect.left(), rect.top(), rect.right(), rect.bottom(), edges)
+        snapped = QRectF(QPointF(x1, y1), QPointF(x2, y2))
+        return snapped if snapped.width() > 0 and snapped.height() > 0 else rect
+        
     def set_add_mode(self, enabled):
         """設置是否處於新增模式"""
         self.is_add_mode = enabled
@@ -127,19 +341,17 @@ class ImageViewer(QWidget):
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
         
-        # 繪製圖片
-        scaled_width = int(self.image.width() * self.current_scale)
-        scaled_height = int(self.image.height() * self.current_scale)
-        x = (self.width() - scaled_width) // 2 + self.image_offset.x()
-        y = (self.height() - scaled_height) // 2 + self.image_offset.y()
-        painter.drawImage(x, y, self.image.scaled(scaled_width, scaled_height))
+        # 繪製圖片（解碼的圖片可能小於原始尺寸，直接縮放到目標範圍）
+        target = self.image_to_screen_rect(QRectF(QPointF(0, 0), QSizeF(self.image_size)))
+        painter.drawImage(target, self.image)
         
         # 繪製文字框
         for region in self.regions:
             # 確定文字框是否為選中狀態
             is_selected = (region == self.selected_region or 
                         region.get('selected', False) or 
-                        region.get('new_created', False))
+                        region.get('new_created', False) or
+                        self.is_region_selected(region))
             
             if is_selected:
                 pen = QPen(QColor(0, 255, 0), 2)  # 選中狀態為綠色
@@ -162,12 +374,20 @@ class ImageViewer(QWidget):
                         text = region.get('text', '')
                         if text:
                             painter.setPen(QPen(QColor(0, 0, 0)))
-                            painter.drawText(rect.topLeft().x(), rect.topLeft().y() - 5, text)
+                            painter.drawText(QPointF(rect.left(), rect.top() - 5), text)
                         
-            # 如果是選中狀態，繪製控制點
-            if is_selected and 'rect' in region and hasattr(region['rect'], 'isValid') and region['rect'].isValid():
+            # 如果是選中狀態，繪製控制點（多選時不能個別調整大小）
+            if is_selected and len(self.selected_regions) <= 1 and 'rect' in region and hasattr(region['rect'], 'isValid') and region['rect'].isValid():
                 self.draw_control_points(painter, self.image_to_screen_rect(region['rect']))
         
+        # 繪製疊加圖層
+        for overlay in self.overlays.values():
+            color = overlay['color']
+            painter.setPen(QPen(color, 2, Qt.DashLine))
+            painter.setBrush(QBrush(QColor(color.red(), color.green(), color.blue(), 40)))
+            for rect in overlay['rects']:
+                painter.drawRect(self.image_to_screen_rect(rect))
+        
         # 如果正在繪製新的文字框，繪製預覽
         if self.drawing_new_region and self.current_drawing_rect:
             pen = QPen(QColor(0, 255, 0), 2, Qt.DashLine)  # 虛線邊框
@@ -178,6 +398,12 @@ class ImageViewer(QWidget):
             # 轉換座標並繪製
             screen_rect = self.image_to_screen_rect(self.current_drawing_rect)
             painter.drawRect(screen_rect)
+        
+        # 框選範圍
+        if self.rubber_band_rect:
+            painter.setPen(QPen(QColor(0, 120, 215), 1, Qt.DashLine))
+            painter.setBrush(QBrush(QColor(0, 120, 215, 40)))
+            painter.drawRect(self.image_to_screen_rect(self.rubber_band_rect))
                 
     def draw_control_points(self, painter, rect):
         """繪製控制點"""
@@ -200,14 +426,14 @@ class ImageViewer(QWidget):
             
     def image_to_screen_coords(self, pos):
         """將圖片座標轉換為屏幕座標"""
-        x = pos.x() * self.current_scale + (self.width() - self.image.width() * self.current_scale) // 2 + self.image_offset.x()
-        y = pos.y() * self.current_scale + (self.height() - self.image.height() * self.current_scale) // 2 + self.image_offset.y()
+        x = pos.x() * self.current_scale + (self.width() - self.image_size.width() * self.current_scale) // 2 + self.image_offset.x()
+        y = pos.y() * self.current_scale + (self.height() - self.image_size.height() * self.current_scale) // 2 + self.image_offset.y()
         return QPointF(x, y)
         
     def screen_to_image_coords(self, pos):
         """將屏幕座標轉換為圖片座標"""
-        x = (pos.x() - (self.width() - self.image.width() * self.current_scale) // 2 - self.image_offset.x()) / self.current_scale
-        y = (pos.y() - (self.height() - self.image.height() * self.current_scale) // 2 - self.image_offset.y()) / self.current_scale
+        x = (pos.x() - (self.width() - self.image_size.width() * self.current_scale) // 2 - self.image_offset.x()) / self.current_scale
+        y = (pos.y() - (self.height() - self.image_size.height() * self.current_scale) // 2 - self.image_offset.y()) / self.current_scale
         return QPointF(x, y)
         
     def image_to_screen_rect(self, rect):
@@ -246,15 +472,58 @@ class ImageViewer(QWidget):
             delta = new_pos - old_pos
             self.image_offset += QPointF(delta.x() * self.current_scale, delta.y() * self.current_scale)
             
+            # 放大超過目前解碼解析度時升級
+            self.ensure_resolution()
             self.update()
             
+    def toggle_selection(self, region):
+        """將文字框加入或移出多選"""
+        if not self.selected_regions and self.selected_region and self.selected_region is not region:
+            self.selected_regions = [self.selected_region]
+        if self.is_region_selected(region):
+            self.selected_regions = [selected for selected in self.selected_regions if selected is not region]
+            self.selected_region = self.selected_regions[-1] if self.selected_regions else None
+        else:
+            self.selected_regions.append(region)
+            self.selected_region = region
+        self.regionSelected.emit(self.selected_region)
+        self.update()
+        
+    def select_in_rect(self, rect, extend=False):
+        """選取與矩形相交的所有文字框"""
+        regions = [region for region in self.regions if region.get('rect') is not None]
+        boxes = group_transform.rects_to_boxes([region['rect'] for region in regions])
+        x1, y1, x2, y2 = rect.left(), rect.top(), rect.right(), rect.bottom()
+        hits = np.flatnonzero((boxes[:, 0] < x2) & (boxes[:, 2] > x1) & (boxes[:, 1] < y2) & (boxes[:, 3] > y1))
+        selected = self.selection() if extend else []
+        for row in hits.tolist():
+            if not any(regions[row] is region for region in selected):
+                selected.append(regions[row])
+        self.selected_regions = selected
+        self.selected_region = selected[-1] if selected else None
+        self.regionSelected.emit(self.selected_region)
+        self.update()
+        
+    def commit_group_drag(self):
+        """群組拖曳結束：座標取整數，記錄為一個歷史操作"""
+        regions = self.selected_regions
+        old_boxes, self.group_original = self.group_original, None
+        new_boxes = np.rint(group_transform.rects_to_boxes([region['rect'] for region in regions]))
+        self._apply_boxes(regions, new_boxes)
+        if np.array_equal(old_boxes, new_boxes):
+            return
+        self.history.add_action(GroupHistoryAction(
+            'move', [region.get('id') for region in regions], old_boxes, new_boxes))
+        self.regionsTransformed.emit(regions)
+        
     def mousePressEvent(self, event):
         """處理滑鼠按下事件"""
         pos = event.pos()
         
         if event.button() == Qt.LeftButton:
+            shift = bool(event.modifiers() & Qt.ShiftModifier)
             # 先檢查是否點擊到控制點（如果已有選中的片段）
-            if self.selected_region and not self.is_add_mode:
+            if self.selected_region and not self.is_add_mode and not shift and len(self.selected_regions) <= 1:
                 screen_rect = self.image_to_screen_rect(self.selected_region['rect'])
                 handle = self.get_control_point(screen_rect, pos)
                 if handle:
@@ -271,7 +540,22 @@ class ImageViewer(QWidget):
             for region in self.regions:
                 screen_rect = self.image_to_screen_rect(region['rect'])
                 if screen_rect.contains(pos):
+                    if shift and not self.is_add_mode:
+                        # Shift 點選：加入或移出多選
+                        self.toggle_selection(region)
+                        event.accept()
+                        return
+                    if len(self.selected_regions) > 1 and self.is_region_selected(region) and not self.is_add_mode:
+                        # 拖曳多選中的文字框時整組一起移動
+                        self.selected_region = region
+                        self.dragging = True
+                        self.drag_start_pos = pos
+                        self.group_original = group_transform.rects_to_boxes(
+                            [selected['rect'] for selected in self.selected_regions])
+                        event.accept()
+                        return
                     # 選擇文字框
+                    self.selected_regions = []
                     self.selected_region = region
                     if not self.is_add_mode:
                         self.dragging = True  # 開始拖動
@@ -284,6 +568,14 @@ class ImageViewer(QWidget):
             if not clicked_on_region and self.is_add_mode:
                 # 在新增模式下，開始繪製新的文字框前清除未保存的框
                 self.regions = [region for region in self.regions if not region.get('new_created', False)]
+                proposal = self.proposal_at(pos)
+                if proposal is not None:
+                    # 點選候選框直接建立文字框
+                    new_region = self.add_region(QRectF(proposal))
+                    self.newRegionCreated.emit(new_region['rect'])
+                    self.regionSelected.emit(new_region)
+                    event.accept()
+                    return
                 self.drawing_new_region = True
                 self.drawing_start_pos = self.screen_to_image_coords(pos)
                 self.current_drawing_rect = None
@@ -292,8 +584,13 @@ class ImageViewer(QWidget):
                 self.update()  # 確保立即更新顯示
                 return
             elif not clicked_on_region:
-                self.selected_region = None
-                self.regionSelected.emit(None)
+                # 編輯模式下在空白處拖曳為框選（按住 Shift 時加入原本的選取）
+                if not shift:
+                    self.selected_regions = []
+                    self.selected_region = None
+                    self.regionSelected.emit(None)
+                self.rubber_band_start = self.screen_to_image_coords(pos)
+                self.rubber_band_rect = None
                 
         elif event.button() == Qt.MouseButton.RightButton:
             self.panning = True
@@ -314,6 +611,10 @@ class ImageViewer(QWidget):
                 self.drawing_start_pos,
                 current_pos
             ).normalized()  # normalized() 確保矩形的寬高為正值
+            # 只吸附游標所在的兩條邊
+            self.current_drawing_rect = self.snap_rect(self.current_drawing_rect, (
+                'right' if current_pos.x() >= self.drawing_start_pos.x() else 'left',
+                'bottom' if current_pos.y() >= self.drawing_start_pos.y() else 'top'))
             
             # 發出座標更新信號
             self.regionSelected.emit({
@@ -336,6 +637,19 @@ class ImageViewer(QWidget):
             self.drag_start_pos = event.pos()
             self.update()
             return
+        
+        if self.rubber_band_start is not None:
+            self.rubber_band_rect = QRectF(self.rubber_band_start, self.screen_to_image_coords(pos)).normalized()
+            self.update()
+            return
+        
+        if self.group_original is not None and self.drag_start_pos:
+            # 整組平移（一次陣列運算）
+            delta = pos - self.drag_start_pos
+            boxes = group_transform.translate(self.group_original, delta.x() / self.current_scale,
+                                              delta.y() / self.current_scale)
+            self._apply_boxes(self.selected_regions, boxes)
+            return
             
         if not self.selected_region:
             new_cursor = Qt.CursorShape.ArrowCursor
@@ -393,6 +707,7 @@ class ImageViewer(QWidget):
                 new_rect.setBottomRight(self.original_rect.bottomRight() + scaled_delta)
             elif self.resize_handle == 'bottomLeft':
                 new_rect.setBottomLeft(self.original_rect.bottomLeft() + scaled_delta)
+            new_rect = self.snap_rect(new_rect, RESIZE_EDGES[self.resize_handle])
             
             # 確保寬高不為負
             if new_rect.width() > 0 and new_rect.height() > 0:
@@ -442,6 +757,21 @@ class ImageViewer(QWidget):
                 self.setCursor(new_cursor)
                 self.last_cursor = new_cursor
         elif event.button() == Qt.MouseButton.LeftButton:
+            if self.rubber_band_start is not None:
+                # 範圍太小視為點擊空白處
+                rect = self.rubber_band_rect
+                if rect is not None and rect.width() * self.current_scale > 3 and rect.height() * self.current_scale > 3:
+                    self.select_in_rect(rect, extend=bool(event.modifiers() & Qt.ShiftModifier))
+                self.rubber_band_start = None
+                self.rubber_band_rect = None
+            elif self.group_original is not None:
+                self.commit_group_drag()
+            elif self.selected_region and self.original_rect is not None and \
+                    self.selected_region.get('id') is not None and \
+                    self.selected_region['rect'] != self.original_rect:
+                self.history.add_action(HistoryAction(
+                    'resize' if self.resize_handle else 'move', self.selected_region['id'],
+                    QRectF(self.original_rect), QRectF(self.selected_region['rect'])))
             self.dragging = False
             self.resize_handle = None
             self.drag_start_pos = None
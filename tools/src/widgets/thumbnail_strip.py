@@ -0,0 +1,87 @@
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+from PyQt5.QtCore import Qt, QSize, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QPixmap, QColor
+
+
+class ThumbnailModel(QAbstractListModel):
+    """頁面縮圖資料模型：只在檢視需要顯示某列時才載入該列的縮圖"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.labels = []
+        self.thumbnail_paths = []
+        self.pixmaps = {}  # 列 -> 已載入的 QPixmap
+        self.placeholder = None
+
+    def set_pages(self, labels, icon_size):
+        """設置頁面列表（縮圖稍後以 set_thumbnail 補上）"""
+        self.beginResetModel()
+        self.labels = list(labels)
+        self.thumbnail_paths = [None] * len(self.labels)
+        self.pixmaps = {}
+        self.placeholder = QPixmap(icon_size)
+        self.placeholder.fill(QColor(220, 220, 220))
+        self.endResetModel()
+
+    def set_thumbnail(self, row, path):
+        """設置某一列的縮圖檔路徑"""
+        if 0 <= row < len(self.thumbnail_paths):
+            self.thumbnail_paths[row] = path
+            self.pixmaps.pop(row, None)
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.labels)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self.labels[row]
+        if role == Qt.DecorationRole:
+            path = self.thumbnail_paths[row]
+            if path is None:
+                return self.placeholder
+            pixmap = self.pixmaps.get(row)
+            if pixmap is None:
+                pixmap = QPixmap(path)
+                self.pixmaps[row] = pixmap
+            return pixmap
+        return None
+
+
+class ThumbnailStrip(QListView):
+    """水平頁面縮圖列"""
+    pageSelected = pyqtSignal(int)
+
+    def __init__(self, parent=None, icon_size=QSize(160, 114)):
+        super().__init__(parent)
+        self.thumbnail_model = ThumbnailModel(self)
+        self.setModel(self.thumbnail_model)
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Static)
+        self.setIconSize(icon_size)
+        self.setUniformItemSizes(True)  # 固定項目大小，只繪製可見範圍
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setFixedHeight(icon_size.height() + 50)
+        self.clicked.connect(lambda index: self.pageSelected.emit(index.row()))
+
+    def set_pages(self, labels):
+        """設置頁面列表"""
+        self.thumbnail_model.set_pages(labels, self.iconSize())
+
+    def set_thumbnail(self, row, path):
+        """設置某一頁的縮圖"""
+        self.thumbnail_model.set_thumbnail(row, path)
+
+    def set_current_page(self, row):
+        """同步目前頁面（不發出 pageSelected）"""
+        if 0 <= row < self.thumbnail_model.rowCount():
+            index = self.thumbnail_model.index(row)
+            self.setCurrentIndex(index)
+            self.scrollTo(index, QAbstractItemView.PositionAtCenter)
@@ -0,0 +1,100 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QLineF, QRectF
+from PyQt5.QtGui import QPainter, QColor, QPen
+
+
+class WaveformView(QWidget):
+    """音檔波形：以峰值金字塔繪製，滾輪以游標為中心縮放，拖曳平移，雙擊顯示全部"""
+    ZOOM_STEP = 1.25
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pyramid = None
+        self.message = '未選擇'
+        self.view_start = 0.0
+        self.view_end = 0.0
+        self.drag_x = None
+        self.drag_start = 0.0
+        self.setMinimumHeight(80)
+
+    def set_pyramid(self, pyramid):
+        """顯示新的波形並重設為完整範圍"""
+        self.pyramid = pyramid
+        self.message = ''
+        self.view_start, self.view_end = 0.0, pyramid.duration
+        self.update()
+
+    def set_message(self, message):
+        """清除波形並顯示文字（未選擇、載入中、找不到音檔等）"""
+        self.pyramid = None
+        self.message = message
+        self.update()
+
+    def set_view(self, start, end):
+        """設置顯示範圍（秒），限制在音檔長度內，最多放大到每個像素一個第 0 層區間"""
+        if not self.pyramid:
+            return
+        duration = self.pyramid.duration
+        min_span = max(self.width(), 1) * self.pyramid.bucket_samples(0) / self.pyramid.samplerate
+        span = min(max(end - start, min_span), duration)
+        start = min(max(start, 0.0), duration - span)
+        self.view_start, self.view_end = start, start + span
+        self.update()
+
+    def time_at(self, x):
+        return self.view_start + (self.view_end - self.view_start) * x / max(self.width(), 1)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(250, 250, 250))
+        painter.setPen(QColor(200, 200, 200))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+        if not self.pyramid:
+            painter.setPen(QColor(120, 120, 120))
+            painter.drawText(QRectF(self.rect()), Qt.AlignCenter, self.message)
+            return
+
+        width, height = self.width(), self.height()
+        middle = height / 2
+        painter.drawLine(QLineF(0, middle, width, middle))
+        mins, maxs = self.pyramid.peaks(self.view_start, self.view_end, width)
+        tops = (middle - maxs * (middle - 2)).tolist()
+        bottoms = (middle - mins * (middle - 2)).tolist()
+        painter.setPen(QPen(QColor(30, 110, 200), 1))
+        painter.drawLines([QLineF(x + 0.5, top, x + 0.5, bottom)
+                           for x, (top, bottom) in enumerate(zip(tops, bottoms))])
+
+        painter.setPen(QColor(80, 80, 80))
+        painter.drawText(QRectF(4, 2, width - 8, height - 4), Qt.AlignLeft | Qt.AlignTop,
+                         f"{self.view_start:.2f}–{self.view_end:.2f} s / {self.pyramid.duration:.2f} s")
+
+    def wheelEvent(self, event):
+        if not self.pyramid:
+            return
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        anchor = self.time_at(event.pos().x())
+        factor = self.ZOOM_STEP ** -steps
+        self.set_view(anchor - (anchor - self.view_start) * factor,
+                      anchor + (self.view_end - anchor) * factor)
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if self.pyramid and event.button() == Qt.LeftButton:
+            self.drag_x = event.pos().x()
+            self.drag_start = self.view_start
+
+    def mouseMoveEvent(self, event):
+        if self.drag_x is None:
+            return
+        span = self.view_end - self.view_start
+        start = self.drag_start - (event.pos().x() - self.drag_x) * span / max(self.width(), 1)
+        self.set_view(start, start + span)
+
+    def mouseReleaseEvent(self, event):
+        self.drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        if self.pyramid:
+            self.set_view(0.0, self.pyramid.duration)